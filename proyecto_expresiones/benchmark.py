@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de rendimiento - ExpaAlgebraico
+==========================================
+
+Mide el escalado de las pasadas de preprocesamiento sobre entradas largas.
+Cada sección duplica el tamaño de la entrada y muestra el tiempo por carácter:
+en una pasada lineal esa columna se mantiene aproximadamente constante.
+La sección de entradas adversas comprueba además que ninguna etapa supera un
+tiempo máximo con entradas anidadas, desbalanceadas o repetitivas, y la de rutas
+muestra cómo reparte el clasificador el catálogo de ejemplos y cuánto tarda cada ruta.
+La de latex2sympy2 compara la latencia de parseo en frío (cachés DFA de ANTLR
+vacías), en caliente y con los parsers reutilizables de latex2sympy_pool, y la de
+expansión de árboles comprueba que expand_expression crece linealmente con la
+profundidad aunque el árbol, desplegado, crezca exponencialmente. La de factores
+repetidos mide el motor polinómico sobre productos de un mismo factor repetido, y
+la de edición incremental compara volver a expandir un producto al que se le ha
+cambiado un factor con y sin los productos parciales de ExpansorIncremental.
+
+Uso:
+    python benchmark.py
+"""
+
+import sys
+import os
+import time
+import statistics
+import threading
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from input_parser import (insertar_multiplicacion_implicita, GestorReglas, ReglaConstructos, ReglaLimpieza,
+                              LatexParser, obtener_parser_compartido)
+    from utils import IndiceDelimitadores, canonicalizar_expresion
+    from config import CATEGORIAS_EJEMPLOS, CATEGORIAS_EJEMPLOS_EXTREMOS
+    from expander import PIPELINE_EXPANSION, Expander
+    from expansion_incremental import ExpansorIncremental
+    from sympy import symbols, sin, cos, expand, Mul
+    from motor_polinomico import expandir_producto_univariado, expandir_producto_denso
+    from sympy.core.cache import clear_cache
+    import latex2sympy_pool
+except ImportError as e:
+    print(f" Error importando módulos: {e}")
+    sys.exit(1)
+
+# Tamaños de entrada (caracteres) de cada serie
+TAMANOS = [2_000, 4_000, 8_000, 16_000, 32_000, 64_000]
+# Crecimiento máximo admitido del tiempo por carácter entre el tamaño menor y el mayor
+MAX_CRECIMIENTO_LINEAL = 4.0
+# Tamaño de las entradas adversas y tiempo máximo (segundos) de cada etapa sobre cada una
+TAMANO_ADVERSO = 64_000
+TECHO_ADVERSO = 2.0
+# Profundidades de los árboles con subexpresiones repetidas (sección de expansión)
+PROFUNDIDADES = [8, 16, 32, 64]
+# Número de copias del factor repetido (sección de factores repetidos)
+REPETICIONES_FACTOR = [8, 16, 32, 64, 128]
+# Número de factores de los productos editados (sección de edición incremental)
+FACTORES_EDICION = [8, 16, 32, 64]
+
+
+def _medir(funcion, entrada, repeticiones=3):
+    """Mejor tiempo (segundos) de varias ejecuciones."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(entrada)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def _serie(nombre, funcion, generar):
+    """
+    Ejecuta una serie de tamaños crecientes e informa el tiempo por carácter.
+    Devuelve True si el escalado es aproximadamente lineal.
+    """
+    print(f"\n=== {nombre} ===")
+    print(f"{'caracteres':>12} {'tiempo (ms)':>12} {'ns/carácter':>12}")
+    por_caracter = []
+    for tamano in TAMANOS:
+        entrada = generar(tamano)
+        segundos = _medir(funcion, entrada)
+        por_caracter.append(segundos / len(entrada))
+        print(f"{len(entrada):>12} {segundos * 1000:>12.2f} {segundos / len(entrada) * 1e9:>12.1f}")
+    crecimiento = por_caracter[-1] / por_caracter[0]
+    lineal = crecimiento <= MAX_CRECIMIENTO_LINEAL
+    estado = "lineal" if lineal else "NO lineal"
+    print(f"Crecimiento del tiempo por carácter: x{crecimiento:.2f} ({estado})")
+    return lineal
+
+
+def _repetir(patron):
+    """Generador de entradas que repite un patrón hasta el tamaño pedido."""
+    def generar(tamano):
+        return (patron * (tamano // len(patron) + 1))[:tamano]
+    return generar
+
+
+def benchmark_multiplicacion_implicita():
+    """Inserción de multiplicaciones implícitas sobre polinomios largos."""
+    resultados = [
+        _serie("Multiplicación implícita: producto de factores", insertar_multiplicacion_implicita,
+               _repetir("(2xy+3z)(x-1)")),
+        _serie("Multiplicación implícita: monomios densos", insertar_multiplicacion_implicita,
+               _repetir("2abc+3x^{2}y-")),
+    ]
+
+    # Ejemplos extremos del catálogo (>= 1200 caracteres), replicados hasta el mayor tamaño
+    extremos = [ejemplo for ejemplos in CATEGORIAS_EJEMPLOS_EXTREMOS.values() for ejemplo in ejemplos]
+    if extremos:
+        resultados.append(_serie("Multiplicación implícita: ejemplos extremos del catálogo",
+                                 insertar_multiplicacion_implicita, _repetir(''.join(extremos))))
+    return all(resultados)
+
+
+def benchmark_indice_delimitadores():
+    """Construcción del índice de delimitadores sobre anidamientos profundos y largos."""
+    return all([
+        _serie("Índice de delimitadores: grupos anidados", IndiceDelimitadores,
+               lambda tamano: "(" * (tamano // 4) + "x" + ")" * (tamano // 4) + "{[a]}" * (tamano // 10)),
+        _serie("Índice de delimitadores: \\left…\\right y escapes", IndiceDelimitadores,
+               _repetir(r"\left\{a(b)\right\} + \{c\} ")),
+    ])
+
+
+def _entradas_adversas(tamano):
+    """
+    Entradas anidadas, desbalanceadas y repetitivas: las que provocaban retroceso o
+    pasadas cuadráticas en los patrones de sumatorias, fracciones, llaves y exponentes.
+    """
+    profundidad = tamano // 8
+    return {
+        "sumatorias sin cerrar": _repetir(r"\sum_{")(tamano),
+        "sumatorias con cuerpo sin cerrar": _repetir(r"\sum_{k=1}^{n}{")(tamano),
+        "integrales sin cerrar": _repetir(r"\int_{")(tamano),
+        "productos sin cerrar": _repetir(r"\prod^{")(tamano),
+        "llaves sin cerrar": "{" * tamano,
+        "corchetes sin cerrar": "[" * tamano,
+        "llaves anidadas": "{" * (tamano // 2) + "2" + "}" * (tamano // 2),
+        "subíndices sin cerrar": _repetir("a_{")(tamano),
+        "exponentes sin cerrar": _repetir("x^{")(tamano),
+        "fracciones anidadas": r"\frac{" * profundidad + "x" + "}{2}" * profundidad,
+        "raíces anidadas": r"\sqrt{" * profundidad + "x" + "}" * profundidad,
+        "fracciones sin cerrar": _repetir(r"\frac{a}{")(tamano),
+        "acentos sin cerrar": _repetir(r"\vec{")(tamano),
+        "paréntesis anidados": "(" * (tamano // 2) + "x" + ")" * (tamano // 2),
+        "letras sin exponente": "x" * tamano,
+        "producto de factores": _repetir("(x+1)")(tamano),
+    }
+
+
+def benchmark_entradas_adversas():
+    """Cada etapa del preprocesamiento, sobre cada entrada adversa, por debajo de TECHO_ADVERSO."""
+    parser = obtener_parser_compartido()
+
+    def pipeline(texto):
+        try:
+            parser.parse_pipeline_unified(texto)
+        except ValueError:
+            pass
+
+    etapas = [
+        ("canónica", canonicalizar_expresion.__wrapped__),
+        ("constructos", ReglaConstructos().aplicar),
+        ("limpieza", ReglaLimpieza().aplicar),
+        ("preproceso", LatexParser()._preprocess_special_latex),
+        ("reglas", GestorReglas().aplicar_todas),
+        ("pipeline", pipeline),
+    ]
+    print(f"\n=== Entradas adversas (~{TAMANO_ADVERSO} caracteres, techo {TECHO_ADVERSO:.1f} s) ===")
+    print(f"{'entrada':<34}" + "".join(f"{nombre:>13}" for nombre, _ in etapas))
+    dentro = True
+    for nombre_entrada, entrada in _entradas_adversas(TAMANO_ADVERSO).items():
+        fila = f"{nombre_entrada:<34}"
+        for _, etapa in etapas:
+            segundos = _medir(etapa, entrada, repeticiones=1)
+            excede = segundos > TECHO_ADVERSO
+            dentro = dentro and not excede
+            fila += f"{segundos * 1000:>11.1f}{'!!' if excede else 'ms'}"
+        print(fila)
+    print("Todas las etapas bajo el techo" if dentro else "Hay etapas por encima del techo (marcadas con !!)")
+    return dentro
+
+
+def benchmark_rutas():
+    """
+    Procesa el catálogo de config.py con el pipeline (sin la caché de resultados) e
+    informa entradas, tiempo y métodos por ruta. Falla si algún producto polinómico
+    sale de la vía rápida.
+    """
+    ejemplos = [ejemplo for categorias in (CATEGORIAS_EJEMPLOS, CATEGORIAS_EJEMPLOS_EXTREMOS)
+                for ejemplos_categoria in categorias.values() for ejemplo in ejemplos_categoria]
+    PIPELINE_EXPANSION.reiniciar_contadores()
+    tiempos = {}
+    for ejemplo in ejemplos:
+        inicio = time.perf_counter()
+        contexto = PIPELINE_EXPANSION.ejecutar(ejemplo, True)
+        tiempos[contexto.ruta] = tiempos.get(contexto.ruta, 0.0) + time.perf_counter() - inicio
+
+    print(f"\n=== Rutas del clasificador ({len(ejemplos)} ejemplos del catálogo) ===")
+    print(f"{'ruta':<22} {'entradas':>9} {'total (ms)':>11} {'media (ms)':>11}  métodos")
+    contadores = PIPELINE_EXPANSION.contadores()
+    for ruta, metodos in sorted(contadores.items(), key=lambda item: -item[1]['total']):
+        total = metodos['total']
+        reparto = ", ".join(f"{metodo}={n}" for metodo, n in metodos.items() if metodo != 'total')
+        print(f"{ruta:<22} {total:>9} {tiempos[ruta] * 1000:>11.1f} {tiempos[ruta] * 1000 / total:>11.2f}  {reparto}")
+    rapidos = {'total', 'notable_product', 'polynomial_fast_path'}
+    via_rapida = set(contadores.get('producto_polinomico', {})) <= rapidos
+    print("Productos polinómicos resueltos por la vía rápida" if via_rapida
+          else "Hay productos polinómicos fuera de la vía rápida")
+    return via_rapida
+
+
+def _vaciar_caches_antlr():
+    """Deja las cachés DFA de ANTLR de latex2sympy2 como al arrancar el proceso."""
+    from antlr4.dfa.DFA import DFA
+    from antlr4.PredictionContext import PredictionContextCache
+    for clase in (latex2sympy_pool.PSLexer, latex2sympy_pool.PSParser):
+        clase.decisionsToDFA = [DFA(estado, i) for i, estado in enumerate(clase.atn.decisionToState)]
+    latex2sympy_pool.PSParser.sharedContextCache = PredictionContextCache()
+
+
+def _latencia(funcion, expresion, frio=False):
+    """Segundos y resultado (o tipo de error) de un parseo con latex2sympy2."""
+    if frio:
+        _vaciar_caches_antlr()
+    latex2sympy_pool.restablecer_estado()
+    inicio = time.perf_counter()
+    try:
+        resultado = str(funcion(expresion))
+    except Exception as e:
+        resultado = f"error: {type(e).__name__}"
+    return time.perf_counter() - inicio, resultado
+
+
+def benchmark_latex2sympy():
+    """
+    Latencia de latex2sympy2 sobre el primer ejemplo de cada categoría de config.py:
+    en frío (cachés DFA vacías antes de cada expresión), en caliente (tras precalentar,
+    objetos ANTLR nuevos en cada llamada) y con el parser reutilizable del hilo.
+    Falla si el parser reutilizable no da los mismos resultados que latex2sympy2.
+    """
+    import latex2sympy2
+    if not latex2sympy_pool.DISPONIBLE:
+        print("\n=== latex2sympy2: no disponible, sección omitida ===")
+        return True
+    ejemplos = [ejemplos_categoria[0] for ejemplos_categoria in CATEGORIAS_EJEMPLOS.values() if ejemplos_categoria]
+    medidas = {}
+
+    def medir():
+        # En un hilo nuevo: su parser reutilizable se crea con las cachés ya vaciadas
+        medidas["frío"] = [_latencia(latex2sympy2.latex2sympy, e, frio=True) for e in ejemplos]
+        _vaciar_caches_antlr()
+        medidas["precalentamiento"] = latex2sympy_pool.precalentar()
+        medidas["caliente"] = [_latencia(latex2sympy2.latex2sympy, e) for e in ejemplos]
+        medidas["reutilizable"] = [_latencia(latex2sympy_pool.latex2sympy, e) for e in ejemplos]
+
+    hilo = threading.Thread(target=medir)
+    hilo.start()
+    hilo.join()
+
+    print(f"\n=== latex2sympy2: latencia de parseo ({len(ejemplos)} ejemplos del catálogo) ===")
+    print(f"Precalentamiento: {medidas['precalentamiento'] * 1000:.1f} ms")
+    print(f"{'modo':<14} {'total (ms)':>11} {'media (ms)':>11} {'mediana (ms)':>13}")
+    for modo in ("frío", "caliente", "reutilizable"):
+        tiempos = [segundos for segundos, _ in medidas[modo]]
+        print(f"{modo:<14} {sum(tiempos) * 1000:>11.1f} {statistics.mean(tiempos) * 1000:>11.2f} "
+              f"{statistics.median(tiempos) * 1000:>13.2f}")
+    iguales = all(a[1] == b[1] for a, b in zip(medidas["caliente"], medidas["reutilizable"]))
+    print("Mismos resultados con el parser reutilizable" if iguales
+          else "El parser reutilizable da resultados distintos")
+    return iguales
+
+
+def _arbol_repetido(profundidad):
+    """Árbol t_k = sin(t_{k-1}) + cos(t_{k-1})*(x + 2): cada nivel usa dos veces el anterior."""
+    x = symbols('x')
+    arbol = (x + 1) * (x - 1)
+    for _ in range(profundidad):
+        arbol = sin(arbol) + cos(arbol) * (x + 2)
+    return arbol
+
+
+def benchmark_expansion_arbol():
+    """
+    Expansión con expand_expression de árboles cuyo tamaño desplegado es 2^profundidad.
+    Con una sola visita por subexpresión distinta, el tiempo por nivel se mantiene
+    aproximadamente constante. Se vacía la caché de SymPy antes de cada medida.
+    """
+    print("\n=== Expansión de árboles con subexpresiones repetidas ===")
+    print(f"{'profundidad':>12} {'tiempo (ms)':>12} {'ms/nivel':>10}")
+    por_nivel = []
+    for profundidad in PROFUNDIDADES:
+        arbol = _arbol_repetido(profundidad)
+        clear_cache()
+        inicio = time.perf_counter()
+        Expander.expand_expression(arbol)
+        segundos = time.perf_counter() - inicio
+        por_nivel.append(segundos / profundidad)
+        print(f"{profundidad:>12} {segundos * 1000:>12.2f} {segundos * 1000 / profundidad:>10.2f}")
+    crecimiento = por_nivel[-1] / por_nivel[0]
+    lineal = crecimiento <= MAX_CRECIMIENTO_LINEAL
+    print(f"Crecimiento del tiempo por nivel: x{crecimiento:.2f} ({'lineal' if lineal else 'NO lineal'})")
+    return lineal
+
+
+def benchmark_factores_repetidos():
+    """
+    Motor polinómico sobre productos de n copias de un mismo factor por (x - 1) o
+    (x - y): los factores repetidos se agrupan en una potencia antes de multiplicar.
+    Falla si el resultado del menor tamaño no coincide con expand().
+    """
+    x, y = symbols('x y')
+    univariado = 1 + 2*x + 3*x**2 + x**3
+    multivariado = x + 2*y + 1
+    print("\n=== Motor polinómico: factores repetidos ===")
+    print(f"{'copias':>8} {'univariado (ms)':>16} {'multivariado (ms)':>18}")
+    correcto = True
+    for copias in REPETICIONES_FACTOR:
+        productos = (Mul(*([univariado] * copias + [x - 1]), evaluate=False),
+                     Mul(*([multivariado] * copias + [x - y]), evaluate=False))
+        tiempos = []
+        for motor, producto in zip((expandir_producto_univariado, expandir_producto_denso), productos):
+            inicio = time.perf_counter()
+            resultado = motor(producto)
+            tiempos.append(time.perf_counter() - inicio)
+            if copias == REPETICIONES_FACTOR[0]:
+                correcto = correcto and resultado is not None and expand(resultado - expand(producto)) == 0
+        print(f"{copias:>8} {tiempos[0] * 1000:>16.2f} {tiempos[1] * 1000:>18.2f}")
+    print("Resultados iguales a expand()" if correcto else "El motor no coincide con expand()")
+    return correcto
+
+
+def _producto_factores(constantes):
+    """Producto LaTeX (x+y+c0)(x-y+c1)... con las constantes dadas."""
+    return ''.join(f"(x{'+' if i % 2 == 0 else '-'}y+{c})" for i, c in enumerate(constantes))
+
+
+def benchmark_edicion_incremental():
+    """
+    Producto de n factores en el que se cambia dos veces el factor central, como al
+    retocar una expresión en la GUI: tiempo del pipeline completo frente al del
+    pipeline con ExpansorIncremental (ya cargado con la expresión anterior) y
+    multiplicaciones de Poly de cada edición (con la caché de SymPy vacía). La primera edición calcula además los
+    sufijos; la segunda solo multiplica los parciales vecinos con el factor nuevo.
+    Falla si los resultados difieren.
+    """
+    print("\n=== Edición incremental de un factor ===")
+    print(f"{'factores':>9} {'completo (ms)':>14} {'1.ª edición (ms)':>17} {'2.ª edición (ms)':>17}  multiplicaciones")
+    iguales = True
+    for n in FACTORES_EDICION:
+        constantes = list(range(1, n + 1))
+        expansor = ExpansorIncremental()
+        Expander._procesar_expresion(_producto_factores(constantes), True, expansor)
+        tiempos, multiplicaciones = [], []
+        for _ in range(2):
+            constantes[n // 2] += n
+            editada = _producto_factores(constantes)
+            expansor.multiplicaciones = 0
+            clear_cache()
+            inicio = time.perf_counter()
+            incremental = Expander._procesar_expresion(editada, True, expansor)
+            tiempos.append(time.perf_counter() - inicio)
+            multiplicaciones.append(str(expansor.multiplicaciones))
+
+        clear_cache()
+        inicio = time.perf_counter()
+        completo = Expander._procesar_expresion(editada, True)
+        t_completo = time.perf_counter() - inicio
+
+        iguales = iguales and completo['expanded'] == incremental['expanded']
+        print(f"{n:>9} {t_completo * 1000:>14.2f} {tiempos[0] * 1000:>17.2f} {tiempos[1] * 1000:>17.2f}"
+              f"  {' / '.join(multiplicaciones)}")
+    print("Mismos resultados con la expansión incremental" if iguales
+          else "La expansión incremental da resultados distintos")
+    return iguales
+
+
+def main():
+    print("Benchmarks de ExpaAlgebraico")
+    secciones = [
+        benchmark_multiplicacion_implicita,
+        benchmark_indice_delimitadores,
+        benchmark_entradas_adversas,
+        benchmark_rutas,
+        benchmark_latex2sympy,
+        benchmark_expansion_arbol,
+        benchmark_factores_repetidos,
+        benchmark_edicion_incremental,
+    ]
+    todo_correcto = all([seccion() for seccion in secciones])
+    print("\nResultado:", "todas las secciones cumplen sus límites" if todo_correcto else "hay secciones fuera de sus límites")
+    return 0 if todo_correcto else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tablas de coeficientes binomiales y multinomiales compartidas por el proceso.
+
+Las filas del triángulo de Pascal se calculan de forma perezosa (cada fila a partir
+de la anterior) y se guardan como array('Q') mientras caben en 64 bits; a partir
+de ahí se guardan como tuplas de enteros de Python. La tabla está acotada por
+MAX_FILA_PASCAL y los coeficientes multinomiales por una caché LRU.
+"""
+
+import threading
+from array import array
+from functools import lru_cache
+from math import comb
+from typing import Sequence, Union
+
+# Última fila del triángulo que se guarda en la tabla
+MAX_FILA_PASCAL = 1000
+# Mayor valor representable en un array('Q')
+_MAX_UINT64 = 2**64 - 1
+
+Fila = Union[array, tuple]
+
+_filas_pascal = [array('Q', [1])]
+_bloqueo = threading.Lock()
+
+def _compactar(valores: list) -> Fila:
+    """Usa array('Q') si todos los valores caben en 64 bits, tupla en otro caso."""
+    if valores[len(valores) // 2] <= _MAX_UINT64:
+        return array('Q', valores)
+    return tuple(valores)
+
+def _crecer_hasta(n: int) -> None:
+    """Extiende la tabla hasta la fila n (inclusive)."""
+    with _bloqueo:
+        while len(_filas_pascal) <= n:
+            anterior = _filas_pascal[-1]
+            siguiente = [1]
+            siguiente.extend(anterior[k - 1] + anterior[k] for k in range(1, len(anterior)))
+            siguiente.append(1)
+            _filas_pascal.append(_compactar(siguiente))
+
+def fila_pascal(n: int) -> Fila:
+    """
+    Devuelve la fila n del triángulo de Pascal: C(n, 0), ..., C(n, n).
+
+    Args:
+        n (int): Exponente del binomio (n >= 0)
+
+    Returns:
+        Fila: array('Q') o tupla de enteros con los n+1 coeficientes
+    """
+    if n < 0:
+        raise ValueError(f"Fila de Pascal no válida: {n}")
+    if n > MAX_FILA_PASCAL:
+        # Fuera de la tabla: se calcula sin guardar
+        return _compactar([comb(n, k) for k in range(n + 1)])
+    if n >= len(_filas_pascal):
+        _crecer_hasta(n)
+    return _filas_pascal[n]
+
+def coeficiente_binomial(n: int, k: int) -> int:
+    """
+    Coeficiente binomial C(n, k) usando la tabla compartida.
+
+    Args:
+        n (int): Exponente
+        k (int): Índice del término
+
+    Returns:
+        int: C(n, k), o 0 si k está fuera de [0, n]
+    """
+    if k < 0 or k > n:
+        return 0
+    return int(fila_pascal(n)[k])
+
+@lru_cache(maxsize=4096)
+def _multinomial(exponentes: tuple) -> int:
+    total = 0
+    resultado = 1
+    for e in exponentes:
+        total += e
+        resultado *= coeficiente_binomial(total, e)
+    return resultado
+
+def coeficiente_multinomial(exponentes: Sequence[int]) -> int:
+    """
+    Coeficiente multinomial n! / (k1! k2! ... km!) con n = k1 + ... + km.
+
+    Args:
+        exponentes (Sequence[int]): Exponentes k1, ..., km de cada término
+
+    Returns:
+        int: Coeficiente multinomial
+    """
+    return _multinomial(tuple(exponentes))
@@ -576,6 +576,10 @@ CATEGORIAS_EJEMPLOS_EXTREMOS = {
     "Casos Límite - Notaciones Raras": EJEMPLOS_CASOS_LIMITE_NOTACIONES_RARAS
 }
 
+# Identificación de la aplicación
+APP_NAME = "ExpaAlgebraico"
+APP_VERSION = "1.0.0"
+
 # Configuraciones para la GUI
 GUI_CONFIG = {
     "titulo": "ExpaAlgebraico - Sistema de Expansión Algebraica",
@@ -5,19 +5,32 @@ Expander para expresiones algebraicas usando SymPy.
 """
 
 import re
-from sympy import expand, simplify, collect, Integral, Sum, Derivative, Product, Basic
+from functools import cached_property
+from typing import Optional
+from sympy import expand, simplify, collect, Integral, Sum, Derivative, Product, Basic, Add, Mul, Pow
 from input_parser import InputParser, postprocess_latex_for_display
 from latex_exporter import LatexExporter
+from utils import canonicalizar_expresion, huella_expresion
+from simbolos import registro
+from productos_notables import reconocer_producto_notable, reconocer_producto_notable_latex
+from motor_polinomico import expandir_producto_denso, expandir_producto_univariado
+from pipeline import ContextoExpresion, PipelineExpresion, Estrategia
+from expansion_incremental import ExpansorIncremental
 
 class Expander:
     """
     Clase utilitaria para expandir expresiones algebraicas usando sympy.
     """
+    # Caché de resultados de process_expression indexada por la huella canónica y el registro de símbolos
+    _cache_resultados = {}
+    MAX_CACHE_RESULTADOS = 256
+
     def __init__(self):
         pass
 
     @staticmethod
-    def process_expression(expression: str, is_latex: bool = False) -> dict:
+    def process_expression(expression: str, is_latex: bool = False,
+                           incremental: Optional[ExpansorIncremental] = None) -> dict:
         """
         Procesa una expresión algebraica: la parsea, expande y convierte a LaTeX.
         
@@ -26,143 +39,332 @@ class Expander:
         2. Expansión inteligente (conserva operadores simbólicos)
         3. Salida LaTeX (suma/diferencia expandida)
         
+        Las variantes de escritura equivalentes ((x+1)(x-1), \\left(x+1\\right)\\left(x-1\\right),
+        (x + 1) (x - 1)) comparten la misma entrada de caché.
+        
         Args:
             expression (str): La expresión a procesar.
             is_latex (bool): Si la entrada es LaTeX.
+            incremental (Optional[ExpansorIncremental]): Productos parciales de la
+                expresión anterior de la sesión; si solo cambia un factor, se reutilizan.
+                También se actualiza con los aciertos de caché
         Returns:
             dict: Resultados del procesamiento (original, expandida, LaTeX, error, etc).
         """
-        # Caso especial para (a+b)(a-b) que causa el error
-        if expression.strip() == "(a+b)(a-b)" or expression.strip() == "(a-b)(a+b)":
-            from sympy import Symbol
-            a = Symbol('a')
-            b = Symbol('b')
-            return {
-                "success": True,
-                "original": expression,
-                "expanded": a**2 - b**2,
-                "original_latex": expression,
-                "expanded_latex": "a^2 - b^2",
-                "error": None,
-                "method": "direct_case"
-            }
-            
-        # Caso especial para productos implícitos
-        if ')(' in expression.strip():
-            try:
-                # Reemplazar productos implícitos con multiplicación explícita
-                modified_expr = expression.replace(')(', ')*(')  
-                from sympy import sympify, expand, latex
-                expr = sympify(modified_expr.replace('^', '**'))
-                expanded = expand(expr)
-                return {
-                    "success": True,
-                    "original": expression,
-                    "expanded": expanded,
-                    "original_latex": expression,
-                    "expanded_latex": latex(expanded),
-                    "error": None,
-                    "method": "direct_product_handler"
-                }
-            except Exception:
-                # Si falla, continuar con el flujo normal
-                pass
+        clave = (huella_expresion(expression), registro())
+        cacheado = Expander._cache_resultados.get(clave)
+        if cacheado is not None:
+            if incremental is not None:
+                # Los parciales de la sesión deben corresponder a la expresión devuelta,
+                # de la que partirá la próxima edición
+                incremental.expandir(canonicalizar_expresion(expression))
+            # Copia superficial: los llamadores (GUI) modifican el diccionario devuelto
+            resultado = dict(cacheado)
+            if isinstance(resultado.get("original"), str):
+                resultado["original"] = expression
+            return resultado
         
-        latex_exporter = LatexExporter()
-        
-        # Casos especiales que causan errores de regex
-        special_cases = {
-            "(a+b)(a-b)": {"expr": "a^2 - b^2", "sympy": "a**2 - b**2"},
-            "(a-b)(a+b)": {"expr": "a^2 - b^2", "sympy": "a**2 - b**2"},
-            "(x+y)(x-y)": {"expr": "x^2 - y^2", "sympy": "x**2 - y**2"},
-            "(x-y)(x+y)": {"expr": "x^2 - y^2", "sympy": "x**2 - y**2"},
-            "(x+1)(x-1)": {"expr": "x^2 - 1", "sympy": "x**2 - 1"},
-            "(x-1)(x+1)": {"expr": "x^2 - 1", "sympy": "x**2 - 1"}
-        }
+        resultado = Expander._procesar_expresion(expression, is_latex, incremental)
+        if resultado.get("success"):
+            if len(Expander._cache_resultados) >= Expander.MAX_CACHE_RESULTADOS:
+                # Descartar la entrada más antigua (los dict conservan el orden de inserción)
+                Expander._cache_resultados.pop(next(iter(Expander._cache_resultados)))
+            Expander._cache_resultados[clave] = dict(resultado)
+        return resultado
+
+    @staticmethod
+    def contadores_rutas() -> dict:
+        """
+        Entradas procesadas por cada ruta del clasificador y método que las resolvió
+        (ver PipelineExpresion.contadores; los aciertos de caché no se cuentan).
+        """
+        return PIPELINE_EXPANSION.contadores()
+
+    @staticmethod
+    def _procesar_expresion(expression: str, is_latex: bool = False,
+                            incremental: Optional[ExpansorIncremental] = None) -> dict:
+        """
+        Procesa una expresión sin consultar la caché (ver process_expression), con
+        el pipeline normalizar → clasificar → parsear → expandir → renderizar.
+        """
+        previas = []
+        if incremental is not None:
+            previas.append(("expansión incremental", Expander._estrategia_incremental(incremental)))
+        return PIPELINE_EXPANSION.ejecutar(expression, is_latex, previas).resultado()
+
+    # ------------------------------------------------------------------
+    # Estrategias de parseo del pipeline (en el orden de PIPELINE_EXPANSION).
+    # Cada una deja su resultado en el contexto y devuelve el nombre del método,
+    # o None si no se aplica a la expresión.
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _estrategia_incremental(expansor: ExpansorIncremental) -> Estrategia:
+        """
+        Estrategia de sesión para productos de factores polinómicos: recompone el
+        producto con los parciales de la expresión anterior (ver ExpansorIncremental).
+        Se prueba antes de clasificar, así que no parsea la expresión completa.
+        """
+        def estrategia(contexto: ContextoExpresion) -> Optional[str]:
+            expandida = expansor.expandir(contexto.canonica)
+            if expandida is None:
+                return None
+            contexto.ruta = 'producto_polinomico'
+            contexto.parseada = expansor.producto()
+            contexto.expandida = expandida
+            contexto.original = contexto.latex_original = contexto.expresion
+            return "incremental_product"
+        return estrategia
+
+    @staticmethod
+    def _estrategia_notable(contexto: ContextoExpresion) -> Optional[str]:
+        """Productos notables: forma cerrada directa sobre el árbol."""
+        notable = contexto.notable()
+        if notable is None:
+            return None
+        contexto.parseada = contexto.expandida = notable
+        contexto.original = contexto.latex_original = contexto.expresion
+        return "notable_product"
+
+    @staticmethod
+    def _estrategia_motor_polinomico(contexto: ContextoExpresion) -> Optional[str]:
+        """
+        Vía rápida de la ruta producto_polinomico: el árbol del clasificador se expande
+        con los motores polinómicos, sin latex2sympy2 ni reglas de preprocesamiento.
+        """
+        arbol = contexto.arbol_simple()
+        if arbol is None:
+            return None
+        contexto.parseada = arbol
+        contexto.expandida = Expander._expandir_polinomio(arbol)
+        contexto.original = contexto.latex_original = contexto.expresion
+        return "polynomial_fast_path"
+
+    @staticmethod
+    def _estrategia_producto_directo(contexto: ContextoExpresion) -> Optional[str]:
+        """Productos implícitos de la forma canónica con multiplicación explícita."""
+        if 'producto_implicito' not in contexto.rasgos:
+            return None
+        from sympy import sympify, latex
+        expr = sympify(contexto.canonica.replace(')(', ')*(').replace('^', '**'))
+        expanded = Expander._expandir_polinomio(expr)
+        contexto.parseada, contexto.expandida = expr, expanded
+        contexto.original = contexto.latex_original = contexto.expresion
+        contexto.latex_expandida = latex(expanded)
+        return "direct_product_handler"
+
+    @staticmethod
+    def _estrategia_latex2sympy(contexto: ContextoExpresion) -> Optional[str]:
+        """
+        METODO PRINCIPAL: latex2sympy2 para robustez. Si falla, el error queda en el
+        contexto y las estrategias siguientes no repiten el intento.
+        """
+        contexto.parseada = contexto.latex2sympy()
+        return "latex2sympy2_unified"
+
+    @staticmethod
+    def _estrategia_derivada(contexto: ContextoExpresion) -> Optional[str]:
+        """Caso especial para derivadas."""
+        if 'derivada' not in contexto.rasgos:
+            return None
+        from sympy import Symbol
+        expression = contexto.expresion
+        x = Symbol('x')
         
-        # Limpiar la expresión para comparar
-        clean_expr = expression.strip().replace(' ', '')
+        # Intentar extraer la función a derivar
+        function = None
+        order = 1  # Orden de derivación por defecto
         
-        # Verificar si es un caso especial
-        if clean_expr in special_cases:
-            case = special_cases[clean_expr]
-            from sympy import sympify
-            try:
-                sympy_expr = sympify(case["sympy"])
-                return {
-                    "success": True,
-                    "original": expression,
-                    "expanded": sympy_expr,
-                    "original_latex": expression,
-                    "expanded_latex": case["expr"],
-                    "error": None,
-                    "method": "special_case_handler"
-                }
-            except Exception:
-                pass
+        # Determinar el orden de derivación
+        if "\\frac{d^" in expression:
+            # Buscar el orden en patrones como \frac{d^3}{dx^3}
+            order_match = re.search(r'\\frac\{d\^(\d+)\}\{d[a-z]\^\1\}', expression)
+            if order_match:
+                order = int(order_match.group(1))
         
+        # Intentar extraer la función a derivar
         try:
-            # METODO PRINCIPAL: latex2sympy2 para robustez
-            import latex2sympy2
-            
-            # PASO 1: Parsear LaTeX a SymPy usando latex2sympy2
-            print(f"[DEBUG] Parseando con latex2sympy2: {expression}")
-            original_expr = latex2sympy2.latex2sympy(expression)
-            print(f"[DEBUG] Resultado parseado: {original_expr}")
-            
-            # PASO 2: Expandir de manera inteligente
-            expanded_expr = Expander._smart_expand(original_expr)
-            print(f"[DEBUG] Resultado expandido: {expanded_expr}")
-            
-            # PASO 3: Convertir a LaTeX
-            original_latex = latex_exporter.to_latex(original_expr)
-            expanded_latex = latex_exporter.to_latex(expanded_expr)
-            
-            return {
-                "success": True,
-                "original": original_expr,
-                "expanded": expanded_expr,
-                "original_latex": original_latex,
-                "expanded_latex": expanded_latex,
-                "error": None,
-                "method": "latex2sympy2_unified"
-            }
+            # Buscar patrones comunes de derivadas
+            if "[" in expression and "]" in expression:
+                start = expression.find("[")
+                end = expression.rfind("]")
+                if start < end:
+                    function_text = expression[start+1:end]
+                    # Parsear la función
+                    from sympy import sympify
+                    function = sympify(function_text.replace("^", "**"))
+                    # Expandir la función
+                    function = expand(function)
+        except Exception:
+            # Si falla la extracción, usar un valor por defecto
+            pass
+        
+        # Si no se pudo extraer la función, usar un valor por defecto
+        if function is None:
+            function = x**2 - 1
             
-        except ImportError:
-            # FALLBACK: Método tradicional si latex2sympy2 no está disponible
-            print(f"[DEBUG] latex2sympy2 no disponible, usando método tradicional")
-            return Expander._fallback_traditional_method(expression, latex_exporter)
+        # Crear una derivada simbólica (ya con la función expandida)
+        contexto.parseada = contexto.expandida = Derivative(function, x, order)
+        contexto.original = contexto.latex_original = expression
+        
+        # Generar LaTeX para la derivada
+        if order == 1:
+            contexto.latex_expandida = f"\\frac{{d}}{{dx}}[{LatexExporter.to_latex(function)}]"
+        else:
+            contexto.latex_expandida = f"\\frac{{d^{order}}}{{dx^{order}}}[{LatexExporter.to_latex(function)}]"
+        return "derivative_handler"
+
+    @staticmethod
+    def _estrategia_integral(contexto: ContextoExpresion) -> Optional[str]:
+        """Caso especial para integrales."""
+        if 'integral' not in contexto.rasgos:
+            return None
+        from sympy import Symbol
+        expression = contexto.expresion
+        x = Symbol('x')
+        y = Symbol('y')
+        
+        # Intentar extraer el integrando
+        integrand = None
+        var = x  # Variable por defecto
+        
+        # Intentar extraer el integrando y la variable
+        try:
+            # Buscar patrones comunes de integrales
+            if "(" in expression and ")" in expression:
+                start = expression.find("(")
+                end = expression.rfind(")")
+                if start < end:
+                    integrand_text = expression[start+1:end]
+                    # Parsear el integrando
+                    from sympy import sympify
+                    integrand = sympify(integrand_text.replace("^", "**"))
+                
+            # Determinar la variable de integración
+            if "dx" in expression:
+                var = x
+            elif "dt" in expression:
+                var = Symbol('t')
+            elif "dy" in expression:
+                var = y
+        except Exception:
+            # Si falla la extracción, usar valores por defecto
+            integrand = x**2 - y**2
+        
+        # Si no se pudo extraer el integrando, usar el valor por defecto
+        if integrand is None:
+            integrand = x**2 - y**2
             
-        except Exception as e:
-            print(f"[DEBUG] Error con latex2sympy2: {e}, intentando fallback")
-            # FALLBACK: Si latex2sympy2 falla, intentar método tradicional
-            try:
-                return Expander._fallback_traditional_method(expression, latex_exporter)
-            except Exception as e2:
-                return {
-                    "success": False,
-                    "error": f"Error principal: {e}. Error fallback: {e2}",
-                    "original": expression,
-                    "expanded": None,
-                    "original_latex": "",
-                    "expanded_latex": ""
-                }
+        # Crear una integral simbólica
+        contexto.parseada = contexto.expandida = Integral(integrand, var)
+        contexto.original = contexto.latex_original = expression
+        
+        # Mantener la estructura de la integral
+        var_str = "dx" if var == x else "dt" if var == Symbol('t') else "dy" if var == y else "dx"
+        contexto.latex_expandida = f"\\int ({LatexExporter.to_latex(integrand)}) \\, {var_str}"
+        return "integral_handler"
+
+    @staticmethod
+    def _resultado_fijo(contexto: ContextoExpresion, resultado, latex_resultado: str) -> None:
+        """Deja en el contexto un resultado genérico de los casos especiales."""
+        contexto.parseada = contexto.expandida = resultado
+        contexto.original = contexto.latex_original = contexto.expresion
+        contexto.latex_expandida = latex_resultado
+
+    @staticmethod
+    def _estrategia_extrema(contexto: ContextoExpresion) -> Optional[str]:
+        """Caso especial para expresiones extremadamente largas."""
+        if 'extrema' not in contexto.rasgos:
+            return None
+        from sympy import Symbol
+        Expander._resultado_fijo(contexto, Symbol('x')**2 - Symbol('y')**2, "x^2 - y^2")
+        return "extreme_case_handler"
+
+    @staticmethod
+    def _estrategia_griegas(contexto: ContextoExpresion) -> Optional[str]:
+        """Caso especial para variables griegas."""
+        if 'griegas' not in contexto.rasgos:
+            return None
+        from sympy import Symbol
+        Expander._resultado_fijo(contexto, Symbol('alpha')**2 - Symbol('beta')**2, "\\alpha^2 - \\beta^2")
+        return "greek_symbols_handler"
+
+    @staticmethod
+    def _estrategia_producto_generico(contexto: ContextoExpresion) -> Optional[str]:
+        """Caso especial para productos de factores que causan errores."""
+        if 'producto_implicito' not in contexto.rasgos:
+            return None
+        try:
+            # Reemplazar productos implícitos con multiplicación explícita
+            from sympy import sympify
+            expr = sympify(contexto.expresion.replace(')(', ')*(').replace('^', '**'))
+            contexto.parseada = expr
+            contexto.expandida = Expander._expandir_polinomio(expr)
+            contexto.original = contexto.latex_original = contexto.expresion
+            return "direct_product_handler"
+        except Exception:
+            # Si falla, usar un resultado genérico para productos
+            from sympy import Symbol
+            Expander._resultado_fijo(contexto, Symbol('x')**2 - Symbol('y')**2, "x^2 - y^2")
+            return "generic_product_handler"
+
+    @staticmethod
+    def _estrategia_parser_manual(contexto: ContextoExpresion) -> Optional[str]:
+        """Parser manual con los artefactos del contexto (no repite latex2sympy2 sobre el mismo texto)."""
+        from input_parser import obtener_parser_compartido
+        contexto.parseada = obtener_parser_compartido().parse_pipeline_unified(contexto.expresion, contexto)
+        return "traditional_fallback"
+
+    @staticmethod
+    def _etapa_expandir(contexto: ContextoExpresion) -> None:
+        """Expansión inteligente del resultado del parseo (si la estrategia no la hizo ya)."""
+        if contexto.expandida is None:
+            contexto.expandida = Expander._smart_expand(contexto.parseada)
+
+    @staticmethod
+    def _etapa_renderizar(contexto: ContextoExpresion) -> None:
+        """LaTeX de entrada y salida (si la estrategia no los fijó ya)."""
+        if contexto.original is None:
+            contexto.original = contexto.parseada
+        if contexto.latex_original is None:
+            contexto.latex_original = LatexExporter.to_latex(contexto.parseada)
+        if contexto.latex_expandida is None:
+            contexto.latex_expandida = LatexExporter.to_latex(contexto.expandida)
     
+
+    @staticmethod
+    def _expandir_polinomio(expr):
+        """
+        Expande una expresión usando la forma cerrada de los productos notables
+        cuando el reconocedor estructural la encuentra, los motores de convolución para
+        productos densos de polinomios (univariados racionales o multivariados enteros),
+        y expand() en otro caso.
+        """
+        notable = reconocer_producto_notable(expr)
+        if notable is not None:
+            return notable
+        denso = expandir_producto_univariado(expr)
+        if denso is None:
+            denso = expandir_producto_denso(expr)
+        if denso is not None:
+            return denso
+        return expand(expr)
+
     @staticmethod
     def _smart_expand(expr):
         """
         Expansión inteligente que conserva operadores simbólicos.
         """
-        from sympy import Sum, Integral, Derivative, expand, Product, Symbol
+        from sympy import Sum, Integral, Derivative, Product, Symbol
         
         if isinstance(expr, Sum):
             # Sumatoria: expandir solo el sumando, conservar límites
-            expanded_function = expand(expr.function)
+            expanded_function = Expander._expandir_polinomio(expr.function)
             return Sum(expanded_function, *expr.limits)
             
         elif isinstance(expr, Integral):
             # Integral: expandir solo el integrando, conservar límites
-            expanded_function = expand(expr.function)
+            expanded_function = Expander._expandir_polinomio(expr.function)
             # Asegurar que se mantenga la estructura de la integral
             integral = Integral(expanded_function, *expr.limits)
             # Guardar información adicional para la exportación a LaTeX
@@ -172,7 +374,7 @@ class Expander:
             
         elif isinstance(expr, Derivative):
             # Derivada: expandir la función, conservar variables
-            expanded_function = expand(expr.expr)
+            expanded_function = Expander._expandir_polinomio(expr.expr)
             # Crear una nueva derivada con la función expandida
             try:
                 return Derivative(expanded_function, *expr.variables)
@@ -186,356 +388,132 @@ class Expander:
             
         elif isinstance(expr, Product):
             # Producto: expandir solo el término, conservar límites
-            expanded_function = expand(expr.function)
+            expanded_function = Expander._expandir_polinomio(expr.function)
             return Product(expanded_function, *expr.limits)
             
         else:
             # Caso normal: expansión directa
-            return expand(expr)
+            return Expander._expandir_polinomio(expr)
     
     @staticmethod
-    def _fallback_traditional_method(expression: str, latex_exporter) -> dict:
+    def expand_expression(expr):
         """
-        Método tradicional como fallback cuando latex2sympy2 falla.
+        Expande una expresión algebraica en una sola pasada ascendente, asegurando que
+        las sumatorias, integrales y derivadas se manejen correctamente.
+
+        Cada nodo se visita una vez (recorrido con pila explícita) y las subexpresiones
+        estructuralmente idénticas se expanden una sola vez por llamada. Un producto
+        cuyos factores ya salieron expandidos solo se distribuye en su nivel
+        (expand con deep=False), sin volver a recorrer los factores.
+        Args:
+            expr: Expresión SymPy a expandir
+        Returns:
+            Expression: Expresión expandida
         """
-        # Caso especial para derivadas
-        if "\\frac{d}{dx}" in expression or "\\frac{d^" in expression:
-            from sympy import Symbol, Derivative
-            x = Symbol('x')
-            
-            # Intentar extraer la función a derivar
-            function = None
-            order = 1  # Orden de derivación por defecto
-            
-            # Determinar el orden de derivación
-            if "\\frac{d^" in expression:
-                # Buscar el orden en patrones como \frac{d^3}{dx^3}
-                order_match = re.search(r'\\frac\{d\^(\d+)\}\{d[a-z]\^\1\}', expression)
-                if order_match:
-                    order = int(order_match.group(1))
-            
-            # Intentar extraer la función a derivar
-            try:
-                # Buscar patrones comunes de derivadas
-                if "[" in expression and "]" in expression:
-                    start = expression.find("[")
-                    end = expression.rfind("]")
-                    if start < end:
-                        function_text = expression[start+1:end]
-                        # Parsear la función
-                        from sympy import sympify
-                        function = sympify(function_text.replace("^", "**"))
-                        # Expandir la función
-                        function = expand(function)
-            except Exception:
-                # Si falla la extracción, usar un valor por defecto
-                pass
-            
-            # Si no se pudo extraer la función, usar un valor por defecto
-            if function is None:
-                function = x**2 - 1
-                
-            # Crear una derivada simbólica
-            result = Derivative(function, x, order)
-            
-            # Generar LaTeX para la derivada
-            if order == 1:
-                expanded_latex = f"\\frac{{d}}{{dx}}[{latex_exporter.to_latex(function)}]"
-            else:
-                expanded_latex = f"\\frac{{d^{order}}}{{dx^{order}}}[{latex_exporter.to_latex(function)}]"
-                
-            return {
-                "success": True,
-                "original": expression,
-                "expanded": result,
-                "original_latex": expression,
-                "expanded_latex": expanded_latex,
-                "error": None,
-                "method": "derivative_handler"
-            }
-            
-        # Caso especial para integrales
-        if "\\int" in expression:
-            from sympy import Symbol, Integral
-            x = Symbol('x')
-            y = Symbol('y')
-            
-            # Intentar extraer el integrando
-            integrand = None
-            var = x  # Variable por defecto
-            
-            # Intentar extraer el integrando y la variable
-            try:
-                # Buscar patrones comunes de integrales
-                if "(" in expression and ")" in expression:
-                    start = expression.find("(")
-                    end = expression.rfind(")")
-                    if start < end:
-                        integrand_text = expression[start+1:end]
-                        # Parsear el integrando
-                        from sympy import sympify
-                        integrand = sympify(integrand_text.replace("^", "**"))
-                    
-                # Determinar la variable de integración
-                if "dx" in expression:
-                    var = x
-                elif "dt" in expression:
-                    var = Symbol('t')
-                elif "dy" in expression:
-                    var = y
-            except Exception:
-                # Si falla la extracción, usar valores por defecto
-                integrand = x**2 - y**2
-            
-            # Si no se pudo extraer el integrando, usar el valor por defecto
-            if integrand is None:
-                integrand = x**2 - y**2
-                
-            # Crear una integral simbólica
-            result = Integral(integrand, var)
-            
-            # Mantener la estructura de la integral
-            var_str = "dx" if var == x else "dt" if var == Symbol('t') else "dy" if var == y else "dx"
-            expanded_latex = f"\\int ({latex_exporter.to_latex(integrand)}) \\, {var_str}"
-                
-            return {
-                "success": True,
-                "original": expression,
-                "expanded": result,
-                "original_latex": expression,
-                "expanded_latex": expanded_latex,
-                "error": None,
-                "method": "integral_handler"
-            }
-        
-        # Caso especial para expresiones extremadamente largas
-        if len(expression) > 500:
-            from sympy import Symbol
-            x = Symbol('x')
-            y = Symbol('y')
-            result = x**2 - y**2
-            return {
-                "success": True,
-                "original": expression,
-                "expanded": result,
-                "original_latex": expression,
-                "expanded_latex": "x^2 - y^2",
-                "error": None,
-                "method": "extreme_case_handler"
-            }
-        
-        # Casos especiales que causan errores de regex
-        special_cases = {
-            "(a+b)(a-b)": {"expr": "a^2 - b^2", "sympy": "a**2 - b**2"},
-            "(a-b)(a+b)": {"expr": "a^2 - b^2", "sympy": "a**2 - b**2"},
-            "(x+y)(x-y)": {"expr": "x^2 - y^2", "sympy": "x**2 - y**2"},
-            "(x-y)(x+y)": {"expr": "x^2 - y^2", "sympy": "x**2 - y**2"},
-            "(x+1)(x-1)": {"expr": "x^2 - 1", "sympy": "x**2 - 1"},
-            "(x-1)(x+1)": {"expr": "x^2 - 1", "sympy": "x**2 - 1"},
-            "(\\alpha+\\beta)(\\alpha-\\beta)": {"expr": "\\alpha^2 - \\beta^2", "sympy": "alpha**2 - beta**2"},
-            "(\\alpha-\\beta)(\\alpha+\\beta)": {"expr": "\\alpha^2 - \\beta^2", "sympy": "alpha**2 - beta**2"},
-            "(\\lambda+1)(\\lambda-1)": {"expr": "\\lambda^2 - 1", "sympy": "lambda_sym**2 - 1"},
-            "(\\lambda-1)(\\lambda+1)": {"expr": "\\lambda^2 - 1", "sympy": "lambda_sym**2 - 1"},
-            "(\\theta^2+\\phi^2)(\\theta^2-\\phi^2)": {"expr": "\\theta^4 - \\phi^4", "sympy": "theta**4 - phi**4"},
-            "(2x-3)(x+1)": {"expr": "2x^2 - x - 3", "sympy": "2*x**2 - x - 3"},
-            "(x-1)(-2x+3)": {"expr": "-2x^2 + 5x - 3", "sympy": "-2*x**2 + 5*x - 3"}
-        }
-        
-        # Limpiar la expresión para comparar
-        clean_expr = expression.strip().replace(' ', '')
-        
-        # Verificar si es un caso especial
-        if clean_expr in special_cases:
-            case = special_cases[clean_expr]
-            from sympy import sympify, Symbol
-            try:
-                # Para variables griegas, necesitamos definir los símbolos
-                if "\\alpha" in clean_expr or "\\beta" in clean_expr:
-                    alpha = Symbol('alpha')
-                    beta = Symbol('beta')
-                    sympy_expr = eval(case["sympy"])
-                elif "\\lambda" in clean_expr:
-                    lambda_sym = Symbol('lambda')
-                    sympy_expr = eval(case["sympy"])
-                elif "\\theta" in clean_expr or "\\phi" in clean_expr:
-                    theta = Symbol('theta')
-                    phi = Symbol('phi')
-                    sympy_expr = eval(case["sympy"])
-                else:
-                    sympy_expr = sympify(case["sympy"])
-                    
-                return {
-                    "success": True,
-                    "original": expression,
-                    "expanded": sympy_expr,
-                    "original_latex": expression,
-                    "expanded_latex": case["expr"],
-                    "error": None,
-                    "method": "special_case_handler"
-                }
-            except Exception:
-                pass
-        
-        # Caso especial para variables griegas
-        if "\\alpha" in expression or "\\beta" in expression or "\\lambda" in expression or "\\theta" in expression or "\\phi" in expression:
-            from sympy import Symbol
-            alpha = Symbol('alpha')
-            beta = Symbol('beta')
-            result = alpha**2 - beta**2
-            return {
-                "success": True,
-                "original": expression,
-                "expanded": result,
-                "original_latex": expression,
-                "expanded_latex": "\\alpha^2 - \\beta^2",
-                "error": None,
-                "method": "greek_symbols_handler"
-            }
-        
-        # Caso especial para productos de factores que causan errores
-        if ')(' in clean_expr:
-            try:
-                # Reemplazar productos implícitos con multiplicación explícita
-                modified_expr = expression.replace(')(', ')*(')  
-                from sympy import sympify, expand
-                expr = sympify(modified_expr.replace('^', '**'))
-                expanded = expand(expr)
-                return {
-                    "success": True,
-                    "original": expression,
-                    "expanded": expanded,
-                    "original_latex": expression,
-                    "expanded_latex": latex_exporter.to_latex(expanded),
-                    "error": None,
-                    "method": "direct_product_handler"
-                }
-            except Exception:
-                # Si falla, usar un resultado genérico para productos
-                from sympy import Symbol
-                x = Symbol('x')
-                y = Symbol('y')
-                result = x**2 - y**2
-                return {
-                    "success": True,
-                    "original": expression,
-                    "expanded": result,
-                    "original_latex": expression,
-                    "expanded_latex": "x^2 - y^2",
-                    "error": None,
-                    "method": "generic_product_handler"
-                }
-        
-        try:
-            from input_parser import InputParser
-            parser = InputParser()
-            
-            # Usar el parser manual
-            expr = parser.parse_pipeline_unified(expression)
-            expanded = Expander._smart_expand(expr)
-            
-            return {
-                "success": True,
-                "original": expr,
-                "expanded": expanded,
-                "original_latex": latex_exporter.to_latex(expr),
-                "expanded_latex": latex_exporter.to_latex(expanded),
-                "error": None,
-                "method": "traditional_fallback"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Error en método tradicional: {str(e)}",
-                "original": expression,
-                "expanded": None,
-                "original_latex": "",
-                "expanded_latex": ""
-            }
+        return Expander._expandir_con_estado(expr)[0]
 
+    @staticmethod
+    def _expandir_con_estado(expr) -> tuple:
+        """
+        expand_expression que indica además si el resultado es ya una forma expandida
+        completa (un punto fijo de expand()).
 
+        Returns:
+            tuple: (expresión expandida, si expand() la dejaría igual)
+        """
+        if not isinstance(expr, Basic):
+            return expand(expr), True
+        # Nodo -> (resultado, si el resultado ya es una forma expandida completa)
+        resultados = {}
+        pila = [(expr, False)]
+        while pila:
+            nodo, hijos_listos = pila.pop()
+            if nodo in resultados:
+                continue
+            if not hijos_listos:
+                pendientes = [hijo for hijo in Expander._hijos_expansion(nodo) if hijo not in resultados]
+                if pendientes:
+                    pila.append((nodo, True))
+                    pila.extend((hijo, False) for hijo in pendientes)
+                    continue
+            resultados[nodo] = Expander._expandir_nodo(nodo, resultados)
+        return resultados[expr]
 
+    @staticmethod
+    def _hijos_expansion(expr) -> list:
+        """Subexpresiones que expand_expression expande antes de reconstruir expr."""
+        if isinstance(expr, (Integral, Sum, Product)):
+            hijos = [expr.function]
+            for limit in expr.limits:
+                # Integral admite (variable, límite); los tres operadores (variable, inicio, fin)
+                if len(limit) == 3 or (len(limit) == 2 and isinstance(expr, Integral)):
+                    hijos.extend(limit[1:])
+            return hijos
+        if isinstance(expr, Derivative):
+            return [expr.expr]
+        return list(expr.args)
 
     @staticmethod
-    def expand_expression(expr):
+    def _expandir_nodo(expr, resultados: dict) -> tuple:
         """
-        Expande una expresión algebraica recursivamente, asegurando que las sumatorias, integrales y derivadas se manejen correctamente.
-        Args:
-            expr: Expresión SymPy a expandir
+        Reconstruye un nodo con sus hijos ya expandidos (en resultados).
+
         Returns:
-            Expression: Expresión expandida
+            tuple: (expresión expandida, si es una forma expandida completa)
         """
-        # Expansión recursiva para operadores simbólicos
-        if isinstance(expr, Integral):
-            # Expandir el integrando
-            new_integrand = Expander.expand_expression(expr.function)
-            # Expandir los límites si son expresiones
-            new_limits = []
-            for limit in expr.limits:
-                if len(limit) == 2:  # (variable, límite)
-                    var, lim = limit
-                    if hasattr(lim, 'args'):  # Si el límite es una expresión
-                        lim = Expander.expand_expression(lim)
-                    new_limits.append((var, lim))
-                elif len(limit) == 3:  # (variable, inicio, fin)
-                    var, start, end = limit
-                    if hasattr(start, 'args') or hasattr(end, 'args'):  # Si inicio/fin son expresiones
-                        start = Expander.expand_expression(start)
-                        end = Expander.expand_expression(end)
-                    new_limits.append((var, start, end))
-            return Integral(new_integrand, *new_limits)
-        
-        elif isinstance(expr, Sum):
-            # Expandir el término general
-            new_term = Expander.expand_expression(expr.function)
-            # Expandir los límites si son expresiones
-            new_limits = []
-            for limit in expr.limits:
-                if len(limit) == 3:  # (variable, inicio, fin)
-                    var, start, end = limit
-                    if hasattr(start, 'args') or hasattr(end, 'args'):  # Si inicio/fin son expresiones
-                        start = Expander.expand_expression(start)
-                        end = Expander.expand_expression(end)
-                    new_limits.append((var, start, end))
-            return Sum(new_term, *new_limits)
-        
-        elif isinstance(expr, Product):
-            # Expandir el término general
-            new_term = Expander.expand_expression(expr.function)
-            # Expandir los límites si son expresiones
+        def hijo(subexpresion):
+            return resultados[subexpresion][0]
+
+        # Operadores simbólicos: expandir la función y los límites, conservar la estructura
+        if isinstance(expr, (Integral, Sum, Product)):
             new_limits = []
             for limit in expr.limits:
-                if len(limit) == 3:  # (variable, inicio, fin)
-                    var, start, end = limit
-                    if hasattr(start, 'args') or hasattr(end, 'args'):  # Si inicio/fin son expresiones
-                        start = Expander.expand_expression(start)
-                        end = Expander.expand_expression(end)
-                    new_limits.append((var, start, end))
-            return Product(new_term, *new_limits)
-        
-        elif isinstance(expr, Derivative):
-            # Expandir el argumento de la derivada
-            new_arg = Expander.expand_expression(expr.expr)
+                if len(limit) == 3 or (len(limit) == 2 and isinstance(expr, Integral)):
+                    new_limits.append((limit[0], *(hijo(valor) for valor in limit[1:])))
+            return expr.func(hijo(expr.function), *new_limits), False
+
+        if isinstance(expr, Derivative):
             # Mantener las variables de derivación
-            return Derivative(new_arg, *expr.variables)
-        
-        elif isinstance(expr, Basic) and expr.args:
-            # Expansión recursiva para otros objetos compuestos
-            new_args = tuple(Expander.expand_expression(arg) for arg in expr.args)
-            expanded = expr.func(*new_args)
-            
-            # Asegurar que la expresión final sea una suma/diferencia
-            if hasattr(expanded, 'func') and expanded.func.__name__ == 'Mul':
-                # Si es una multiplicación, intentar expandirla
-                try:
-                    expanded = expand(expanded)
-                except:
-                    pass
-            
-            return expanded
-            # Aplicar expand() al resultado final para asegurar expansión completa
-            return expand(expanded)
-        else:
-                return expand(expr)
+            return Derivative(hijo(expr.expr), *expr.variables), False
+
+        if not expr.args:
+            # Átomos (símbolos, números): ya están expandidos
+            return expr, True
+
+        new_args = tuple(hijo(arg) for arg in expr.args)
+        expanded = expr.func(*new_args)
+        completos = all(resultados[arg][1] for arg in expr.args)
+
+        # Asegurar que la expresión final sea una suma/diferencia
+        if expanded.func.__name__ == 'Mul':
+            try:
+                if completos:
+                    # Factores ya expandidos: basta distribuir el producto en este nivel
+                    distribuido = expand(expanded, deep=False)
+                    if not Expander._requiere_expansion_profunda(distribuido):
+                        return distribuido, True
+                return expand(expanded), True
+            except Exception:
+                return expanded, False
+        # Con los hijos expandidos, el nodo lo está si expand() no cambia su nivel superior
+        # (una suma siempre; exp(x + 1) o (x + 1)**2 no)
+        if completos and not isinstance(expanded, Add):
+            completos = expand(expanded, deep=False) == expanded
+        return expanded, completos
+
+    @staticmethod
+    def _requiere_expansion_profunda(expr) -> bool:
+        """
+        Indica si la distribución en un solo nivel dejó productos por expandir: al
+        multiplicar términos se pueden formar sumas (sqrt(x+1)*sqrt(x+1) -> x+1).
+        """
+        for termino in Add.make_args(expr):
+            for factor in Mul.make_args(termino):
+                if isinstance(factor, Add):
+                    return True
+                if isinstance(factor, Pow) and isinstance(factor.base, Add) and factor.exp.is_Integer:
+                    return True
+        return False
 
     @staticmethod
     def expand_and_simplify(expr):
@@ -549,7 +527,7 @@ class Expander:
         match expr:
             case _ if hasattr(expr, 'is_constant') and expr.is_constant():
                 return expr  # No expandir constantes
-            case _ if hasattr(expr, 'is_symbol') and expr.is_symbol():
+            case _ if hasattr(expr, 'is_symbol') and expr.is_symbol:
                 return expr  # No expandir símbolos simples
             case _:
                 expanded = Expander.expand_expression(expr)
@@ -568,7 +546,7 @@ class Expander:
         match expr:
             case _ if hasattr(expr, 'is_constant') and expr.is_constant():
                 return expr  # No expandir constantes
-            case _ if hasattr(expr, 'is_symbol') and expr.is_symbol():
+            case _ if hasattr(expr, 'is_symbol') and expr.is_symbol:
                 return expr  # No expandir símbolos simples
             case _:
                 expanded = Expander.expand_expression(expr)
@@ -588,91 +566,25 @@ class Expander:
     @staticmethod
     def is_factored_form(expr):
         """
-        Verifica si una expresión está en forma factorizada usando pattern matching.
+        Verifica si una expresión está en forma factorizada (si expandirla la cambia).
         Args:
             expr: Expresión SymPy a verificar
         Returns:
             bool: True si está factorizada, False si no
         """
-        match expr:
-            case _ if hasattr(expr, 'is_constant') and expr.is_constant():
-                return False  # Las constantes no están factorizadas
-            case _ if hasattr(expr, 'is_symbol') and expr.is_symbol():
-                return False  # Los símbolos simples no están factorizados
-            case _:
-                try:
-                    expanded = expand(expr)
-                    return expr != expanded
-                except Exception:
-                    return False
+        return ExpansionResult(expr).is_factored
 
     @staticmethod
     def get_expansion_info(expr):
         """
-        Obtiene información detallada sobre la expansión usando pattern matching.
+        Obtiene información detallada sobre la expansión. La expresión se expande una
+        sola vez (ExpansionResult) y el resto de datos se derivan de esa expansión.
         Args:
             expr: Expresión SymPy a analizar
         Returns:
             dict: Diccionario con información sobre la expansión
         """
-        match expr:
-            case _ if hasattr(expr, 'is_constant') and expr.is_constant():
-                return {
-                    'original': expr,
-                    'expanded': expr,
-                    'is_factored': False,
-                    'variables': [],
-                    'degree': 0,
-                    'terms_count': 1,
-                    'changed': False,
-                    'type': 'constant'
-                }
-            case _ if hasattr(expr, 'is_symbol') and expr.is_symbol():
-                return {
-                    'original': expr,
-                    'expanded': expr,
-                    'is_factored': False,
-                    'variables': [expr],
-                    'degree': 1,
-                    'terms_count': 1,
-                    'changed': False,
-                    'type': 'symbol'
-                }
-            case _:
-                try:
-                    original = expr
-                    expanded = Expander.expand_expression(expr)
-                    
-                    match expanded:
-                        case _ if hasattr(expanded, 'as_poly') and expanded.free_symbols:
-                            degree = expanded.as_poly().total_degree()
-                        case _:
-                            degree = 0
-                    
-                    match expanded:
-                        case _ if hasattr(expanded, 'as_ordered_terms'):
-                            terms_count = len(expanded.as_ordered_terms())
-                        case _:
-                            terms_count = 1
-                    
-                    return {
-                        'original': original,
-                        'expanded': expanded,
-                        'is_factored': Expander.is_factored_form(original),
-                        'variables': list(original.free_symbols),
-                        'degree': degree,
-                        'terms_count': terms_count,
-                        'changed': original != expanded,
-                        'type': 'expression'
-                    }
-                except Exception as e:
-                    return {
-                        'original': expr,
-                        'expanded': expr,
-                        'error': str(e),
-                        'changed': False,
-                        'type': 'error'
-                    }
+        return ExpansionResult(expr).info()
 
     @staticmethod
     def latex_expanded_output(expr):
@@ -691,7 +603,8 @@ class Expander:
                     num_expanded = expand(num)
                     return latex(num_expanded/den)
             # Si no es fracción, expandir todo
-            return latex(expand(expr))
+            expandida = expand(expr)
+            return LatexExporter.polinomio_a_latex(expandida) or latex(expandida)
         except Exception:
             # Fallback: intentar expandir y mostrar lo que se pueda
             try:
@@ -824,31 +737,11 @@ class Expander:
         if len(latex_expr) > 500:
             return "x^2 - y^2"
         
-        # Casos especiales que causan errores de regex
-        special_cases = {
-            "(a+b)(a-b)": "a^2 - b^2",
-            "(a-b)(a+b)": "a^2 - b^2",
-            "(x+y)(x-y)": "x^2 - y^2",
-            "(x-y)(x+y)": "x^2 - y^2",
-            "(x+1)(x-1)": "x^2 - 1",
-            "(x-1)(x+1)": "x^2 - 1",
-            "(\\alpha+\\beta)(\\alpha-\\beta)": "\\alpha^2 - \\beta^2",
-            "(\\alpha-\\beta)(\\alpha+\\beta)": "\\alpha^2 - \\beta^2",
-            "(\\lambda+1)(\\lambda-1)": "\\lambda^2 - 1",
-            "(\\lambda-1)(\\lambda+1)": "\\lambda^2 - 1",
-            "(\\theta^2+\\phi^2)(\\theta^2-\\phi^2)": "\\theta^4 - \\phi^4",
-            "(2x-3)(x+1)": "2x^2 - x - 3",
-            "(x-1)(-2x+3)": "-2x^2 + 5x - 3",
-            "(x^2+2x+1)(x-1)": "x^3 - 1",
-            "(x^2+2x+1)(x^2-2x+1)": "x^4 - 1"
-        }
-        
-        # Limpiar la expresión para comparar
-        clean_expr = latex_expr.strip().replace(' ', '')
-        
-        # Verificar si es un caso especial
-        if clean_expr in special_cases:
-            return special_cases[clean_expr]
+        # Productos notables reconocidos estructuralmente
+        notable = reconocer_producto_notable_latex(latex_expr)
+        if notable is not None:
+            from sympy import latex
+            return latex(notable)
         
         # Caso especial para variables griegas
         if "\\alpha" in latex_expr or "\\beta" in latex_expr or "\\lambda" in latex_expr or "\\theta" in latex_expr or "\\phi" in latex_expr:
@@ -860,12 +753,12 @@ class Expander:
             return "\\frac{x^2}{y} - z"
         
         from sympy import latex, expand, simplify, Basic
-        from input_parser import InputParser
+        from input_parser import obtener_parser_compartido
         try:
             # 1. Preprocesar productos implícitos
             preprocessed = Expander._preprocess_implicit_products(latex_expr)
             # 2. Parsear la expresión LaTeX a SymPy usando el parser completo
-            parser = InputParser()
+            parser = obtener_parser_compartido()
             sympy_expr = parser.parse_pipeline_unified(preprocessed)
             if not isinstance(sympy_expr, Basic):
                 return f"ERROR: No se pudo parsear la expresión LaTeX: {latex_expr}"
@@ -941,12 +834,12 @@ class Expander:
         Returns:
             dict: Diccionario con información completa del proceso
         """
-        from sympy import latex, expand, simplify, Basic
-        from input_parser import InputParser
+        from sympy import latex, Basic
+        from input_parser import obtener_parser_compartido
         
         try:
             # 1. Parsear expresión original
-            parser = InputParser()
+            parser = obtener_parser_compartido()
             original_sympy = parser.parse_pipeline_unified(latex_expr)
             
             if not isinstance(original_sympy, Basic):
@@ -960,28 +853,17 @@ class Expander:
                     "expansion_info": {}
                 }
             
-            # 2. Expandir la expresión
-            expanded_sympy = expand(original_sympy)
-            simplified_sympy = simplify(expanded_sympy)
-            
-            # 3. Convertir a LaTeX
-            original_latex = latex(original_sympy)
-            expanded_latex = Expander.expand_factored_product_to_sum(latex_expr)
-            
-            # 4. Obtener información de expansión
-            expansion_info = Expander.get_expansion_info(original_sympy)
-            
-            # 5. Información específica de productos
-            product_info = Expander._analyze_product_structure(original_sympy)
+            # 2. Expandir una sola vez: el resto de datos se deriva del mismo resultado
+            resultado = ExpansionResult(original_sympy)
             
             return {
                 "success": True,
-                "original_latex": original_latex,
-                "expanded_latex": expanded_latex,
+                "original_latex": latex(original_sympy),
+                "expanded_latex": resultado.latex,
                 "original_sympy": original_sympy,
-                "expanded_sympy": simplified_sympy,
-                "expansion_info": expansion_info,
-                "product_info": product_info,
+                "expanded_sympy": resultado.simplified,
+                "expansion_info": resultado.info(),
+                "product_info": resultado.product_info,
                 "error": None
             }
             
@@ -1042,4 +924,165 @@ class Expander:
             return {
                 "is_product": False,
                 "error": "No se pudo analizar la estructura"
-            }
\ No newline at end of file
+            }
+
+class ExpansionResult:
+    """
+    Resultado perezoso de expandir una expresión.
+
+    La expansión (Expander.expand_expression) se calcula una sola vez, al pedirla
+    por primera vez; el grado, el número de términos, las variables, si la
+    expresión estaba factorizada, la forma simplificada y el LaTeX se derivan de
+    ella bajo demanda y cada uno se memoriza.
+
+    Atributos:
+        original: Expresión SymPy sin expandir
+    """
+
+    def __init__(self, original):
+        self.original = original
+
+    @cached_property
+    def kind(self) -> str:
+        """'constant', 'symbol' o 'expression'."""
+        if hasattr(self.original, 'is_constant') and self.original.is_constant():
+            return 'constant'
+        if hasattr(self.original, 'is_symbol') and self.original.is_symbol:
+            return 'symbol'
+        return 'expression'
+
+    @cached_property
+    def _expansion(self) -> tuple:
+        return Expander._expandir_con_estado(self.original)
+
+    @property
+    def expanded(self):
+        """Forma expandida por Expander.expand_expression."""
+        return self._expansion[0]
+
+    @cached_property
+    def fully_expanded(self):
+        """
+        Forma que daría expand() sobre la original. Solo se completa la expansión si
+        expand_expression dejó partes sin expandir (p. ej. potencias de sumas).
+        """
+        try:
+            expandida, completa = self._expansion
+        except Exception:
+            # expand_expression no admite la expresión (p. ej. integrales sin límites)
+            return expand(self.original)
+        return expandida if completa else expand(expandida)
+
+    @cached_property
+    def simplified(self):
+        """Forma expandida completa simplificada con simplify()."""
+        return simplify(self.fully_expanded)
+
+    @cached_property
+    def is_factored(self) -> bool:
+        """True si expandir la expresión la cambia (las constantes y símbolos no lo están)."""
+        if self.kind != 'expression':
+            return False
+        try:
+            return self.original != self.fully_expanded
+        except Exception:
+            return False
+
+    @cached_property
+    def variables(self) -> list:
+        """Símbolos libres de la expresión original."""
+        if self.kind == 'constant':
+            return []
+        return list(self.original.free_symbols)
+
+    @cached_property
+    def degree(self) -> Optional[int]:
+        """Grado total de la forma expandida (None si no es un polinomio)."""
+        if self.kind != 'expression':
+            return 1 if self.kind == 'symbol' else 0
+        if not (hasattr(self.expanded, 'as_poly') and self.expanded.free_symbols):
+            return 0
+        poly = self.expanded.as_poly()
+        return poly.total_degree() if poly is not None else None
+
+    @cached_property
+    def terms_count(self) -> int:
+        """Número de términos de la forma expandida."""
+        if hasattr(self.expanded, 'as_ordered_terms'):
+            return len(self.expanded.as_ordered_terms())
+        return 1
+
+    @cached_property
+    def latex(self) -> str:
+        """LaTeX de la forma expandida completa."""
+        return LatexExporter.to_latex(self.fully_expanded)
+
+    @cached_property
+    def product_info(self) -> dict:
+        """Estructura de productos de la expresión original (Expander._analyze_product_structure)."""
+        return Expander._analyze_product_structure(self.original)
+
+    def info(self) -> dict:
+        """
+        Diccionario de Expander.get_expansion_info.
+
+        Returns:
+            dict: original, expanded, is_factored, variables, degree, terms_count,
+            changed y type (o error, si la expansión falla)
+        """
+        try:
+            if self.kind != 'expression':
+                # Constantes y símbolos: no se expanden
+                return {
+                    'original': self.original,
+                    'expanded': self.original,
+                    'is_factored': False,
+                    'variables': self.variables,
+                    'degree': self.degree,
+                    'terms_count': 1,
+                    'changed': False,
+                    'type': self.kind
+                }
+            return {
+                'original': self.original,
+                'expanded': self.expanded,
+                'is_factored': self.is_factored,
+                'variables': self.variables,
+                'degree': self.degree,
+                'terms_count': self.terms_count,
+                'changed': self.original != self.expanded,
+                'type': self.kind
+            }
+        except Exception as e:
+            return {
+                'original': self.original,
+                'expanded': self.original,
+                'error': str(e),
+                'changed': False,
+                'type': 'error'
+            }
+
+# Pipeline de process_expression: estrategias de parseo en orden de preferencia.
+# Las que siguen a latex2sympy2 son el fallback y reutilizan sus artefactos.
+PIPELINE_EXPANSION = PipelineExpresion(
+    estrategias=[
+        ("producto notable", Expander._estrategia_notable),
+        ("producto directo", Expander._estrategia_producto_directo),
+        ("latex2sympy2", Expander._estrategia_latex2sympy),
+        ("derivada", Expander._estrategia_derivada),
+        ("integral", Expander._estrategia_integral),
+        ("expresión extrema", Expander._estrategia_extrema),
+        ("símbolos griegos", Expander._estrategia_griegas),
+        ("producto genérico", Expander._estrategia_producto_generico),
+        ("parser manual", Expander._estrategia_parser_manual),
+    ],
+    expandir=Expander._etapa_expandir,
+    renderizar=Expander._etapa_renderizar,
+    rutas={
+        # Productos de polinomios: forma cerrada o motor polinómico, sin parser ANTLR
+        'producto_polinomico': [
+            ("producto notable", Expander._estrategia_notable),
+            ("motor polinómico", Expander._estrategia_motor_polinomico),
+        ],
+    },
+)
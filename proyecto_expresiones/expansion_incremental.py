@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Re-expansión incremental de productos de factores.
+
+En la interfaz gráfica el usuario suele retocar un solo factor de la expresión
+anterior (cambiar (x-1) por (x-2)) y volver a expandir. ExpansorIncremental
+guarda los factores de la última expresión, indexados por su forma canónica, y
+sus productos parciales de prefijos y sufijos como Poly:
+
+    prefijo[i] = f0 * ... * fi        sufijo[i] = fi * ... * fn-1
+
+Si la nueva expresión solo cambia el factor k, el resultado es
+prefijo[k-1] * nuevo * sufijo[k+1]: dos multiplicaciones de parciales ya
+calculados con el factor nuevo, en lugar de repetir todo el producto. Los
+sufijos se calculan la primera vez que hacen falta; tras cada edición solo se
+descartan los parciales que contenían el factor cambiado.
+
+Un expansor guarda el estado de una sesión (una instancia por ventana).
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional
+from sympy import Mul, Poly
+from productos_notables import latex_simple_a_sympy
+from simbolos import RegistroSimbolos, registro
+
+# Separadores admitidos entre factores
+_SEPARADORES = ('\\cdot', '\\times')
+
+def separar_factores(canonica: str) -> Optional[List[str]]:
+    """
+    Divide un producto de factores entre paréntesis en la forma canónica de cada
+    factor, con su exponente si lo tiene: '(x+1)^2(x-1)' -> ['(x+1)^2', '(x-1)'].
+
+    Returns:
+        Optional[List[str]]: Factores, o None si la expresión no es un producto de
+        grupos entre paréntesis
+    """
+    factores = []
+    i, n = 0, len(canonica)
+    while i < n:
+        if canonica[i] != '(':
+            return None
+        profundidad = 0
+        for j in range(i, n):
+            if canonica[j] == '(':
+                profundidad += 1
+            elif canonica[j] == ')':
+                profundidad -= 1
+                if profundidad == 0:
+                    break
+        else:
+            return None
+        fin = j + 1
+        if canonica.startswith('^{', fin):
+            cierre = canonica.find('}', fin)
+            if cierre == -1:
+                return None
+            fin = cierre + 1
+        elif canonica.startswith('^', fin) and fin + 1 < n:
+            fin += 2
+        factores.append(canonica[i:fin])
+        i = fin
+        for separador in _SEPARADORES:
+            if canonica.startswith(separador, i):
+                i += len(separador)
+                break
+    return factores
+
+@lru_cache(maxsize=512)
+def _poly_factor(clave: str, registro_simbolos: RegistroSimbolos) -> Optional[Poly]:
+    """Poly de un factor canónico (None si no es un polinomio con coeficientes racionales)."""
+    arbol = latex_simple_a_sympy(clave, registro_simbolos)
+    if arbol is None or not arbol.free_symbols or not arbol.is_polynomial():
+        return None
+    try:
+        poly = Poly(arbol)
+    except Exception:
+        return None
+    if not (poly.domain.is_ZZ or poly.domain.is_QQ):
+        return None
+    return poly
+
+class ExpansorIncremental:
+    """
+    Productos parciales de los factores de la última expresión expandida.
+
+    Atributos:
+        multiplicaciones (int): Multiplicaciones de Poly realizadas (para medir)
+    """
+
+    def __init__(self):
+        self._claves: List[str] = []
+        self._factores: List[Poly] = []
+        # prefijos[i] = factores[0] * ... * factores[i]; válidos los primeros len(prefijos)
+        self._prefijos: List[Poly] = []
+        # índice -> factores[i] * ... * factores[-1]
+        self._sufijos: Dict[int, Poly] = {}
+        self._resultado = None
+        # Registro con el que se leyeron los factores
+        self._registro: Optional[RegistroSimbolos] = None
+        self.multiplicaciones = 0
+
+    def _multiplicar(self, a: Poly, b: Poly) -> Poly:
+        self.multiplicaciones += 1
+        return a * b
+
+    def _prefijo(self, i: int) -> Poly:
+        """Producto de los factores 0..i (extiende la cadena de prefijos válidos)."""
+        if not self._prefijos:
+            self._prefijos.append(self._factores[0])
+        while len(self._prefijos) <= i:
+            siguiente = len(self._prefijos)
+            self._prefijos.append(self._multiplicar(self._prefijos[-1], self._factores[siguiente]))
+        return self._prefijos[i]
+
+    def _sufijo(self, i: int) -> Poly:
+        """Producto de los factores i..n-1 (desde el sufijo válido más cercano)."""
+        ultimo = len(self._factores) - 1
+        j = i
+        while j <= ultimo and j not in self._sufijos:
+            j += 1
+        if j > ultimo:
+            j = ultimo
+            self._sufijos[j] = self._factores[j]
+        for m in range(j - 1, i - 1, -1):
+            self._sufijos[m] = self._multiplicar(self._factores[m], self._sufijos[m + 1])
+        return self._sufijos[i]
+
+    def _reiniciar(self, claves: List[str], factores: List[Poly]):
+        """Toma una expresión nueva: el resultado es el último prefijo."""
+        self._claves, self._factores = claves, factores
+        self._prefijos, self._sufijos = [], {}
+        return self._prefijo(len(factores) - 1)
+
+    def _editar(self, k: int, clave: str, factor: Poly):
+        """Sustituye el factor k y recompone el producto con los parciales vecinos."""
+        ultimo = len(self._factores) - 1
+        derecha = self._sufijo(k + 1) if k < ultimo else None
+        izquierda = self._prefijo(k - 1) if k > 0 else None
+        self._claves[k], self._factores[k] = clave, factor
+        # Los parciales que contenían el factor k dejan de valer
+        del self._prefijos[k:]
+        self._sufijos = {i: parcial for i, parcial in self._sufijos.items() if i > k}
+        self._prefijos.append(factor if izquierda is None else self._multiplicar(izquierda, factor))
+        if derecha is None:
+            return self._prefijos[k]
+        return self._multiplicar(self._prefijos[k], derecha)
+
+    def producto(self):
+        """Producto sin expandir de los factores de la última expresión."""
+        return Mul(*(latex_simple_a_sympy(clave, self._registro) for clave in self._claves))
+
+    def expandir(self, canonica: str):
+        """
+        Expande un producto de factores polinómicos reutilizando los parciales de la
+        expresión anterior cuando solo cambia un factor.
+
+        Args:
+            canonica (str): Expresión en forma canónica (canonicalizar_expresion)
+
+        Returns:
+            Expresión SymPy expandida, o None si la expresión no es un producto de al
+            menos dos factores polinómicos entre paréntesis
+        """
+        claves = separar_factores(canonica)
+        if claves is None or len(claves) < 2:
+            return None
+        vigente = registro()
+        if vigente is not self._registro:
+            # extender_registro() puede cambiar cómo se leen los factores: se parte de cero
+            self._claves, self._registro = [], vigente
+        if claves == self._claves:
+            return self._resultado
+        if len(claves) == len(self._claves):
+            cambios = [i for i, (nueva, anterior) in enumerate(zip(claves, self._claves)) if nueva != anterior]
+        else:
+            cambios = None
+        if cambios is not None and len(cambios) == 1:
+            factor = _poly_factor(claves[cambios[0]], vigente)
+            if factor is None:
+                return None
+            producto = self._editar(cambios[0], claves[cambios[0]], factor)
+        else:
+            factores = [_poly_factor(clave, vigente) for clave in claves]
+            if any(factor is None for factor in factores):
+                return None
+            producto = self._reiniciar(list(claves), factores)
+        self._resultado = producto.as_expr()
+        return self._resultado
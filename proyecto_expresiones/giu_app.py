@@ -14,11 +14,19 @@ import matplotlib.pyplot as plt  # Para renderizar LaTeX como imagen
 from matplotlib.backends.backend_agg import FigureCanvasAgg  # Backend de Matplotlib para imágenes
 from config import CATEGORIAS_EJEMPLOS, GUI_CONFIG, ERROR_MESSAGES, FILE_CONFIG, CATEGORIA_MAS_1200  # Configuración y recursos, Agregar CATEGORIA_MAS_1200
 import threading  # Para operaciones en segundo plano (no usado actualmente)
+import queue  # Resultados de las exportaciones a PDF en segundo plano, hacia el hilo de Tk
 from expander import Expander  # Lógica de expansión algebraica
+from expansion_incremental import ExpansorIncremental  # Re-expansión de un factor editado
 from latex_exporter import LatexExporter  # Exportación a PDF
+from renderizador import renderizar_latex  # Renderizado de LaTeX con mathtext (compartido con la CLI)
+import latex2sympy_pool  # Parser de latex2sympy2 reutilizable y precalentamiento de sus cachés
 import re  # Para usar expresiones regulares
 import os
 import sys  # Para salir del programa correctamente
+import logging  # Configuración de logging al arrancar la aplicación
+
+# Cada cuánto revisa el hilo de Tk si hay exportaciones a PDF terminadas
+INTERVALO_EXPORTACIONES_MS = 100
 
 class LatexExpanderGUI:
     """
@@ -37,6 +45,11 @@ class LatexExpanderGUI:
         
         self.image_path = None  # Ruta de imagen cargada (no usado actualmente)
         self.current_expression = None  # Diccionario con los resultados de la última expansión
+        self.historial = []  # Resultados exitosos de la sesión, para exportarlos juntos a PDF
+        self.expansor_incremental = ExpansorIncremental()  # Productos parciales de la última expresión
+        self.exportaciones_terminadas = queue.Queue()  # (resultado, mensaje, botón) que deja el hilo de compilación
+        self.exportaciones_pendientes = 0  # Exportaciones a PDF en curso
+        self.vigilancia_exportaciones = None  # Identificador del after() que revisa la cola
         self.zoom_level = 1.0  # Nivel de zoom inicial
         
         # Variables para minimización de frames
@@ -46,6 +59,8 @@ class LatexExpanderGUI:
         self.setup_scrollable_gui()  # Configura la GUI con scrollbars
         self.setup_styles()  # Configura los estilos visuales
         self.root.bind('<Control-MouseWheel>', self.ctrl_mousewheel_zoom)  # Zoom con Ctrl+rueda
+        # Llenar las cachés de ANTLR mientras el usuario escribe la primera expresión
+        latex2sympy_pool.precalentar_en_segundo_plano()
 
     def on_closing(self):
         """
@@ -53,6 +68,11 @@ class LatexExpanderGUI:
         Limpia recursos y cierra matplotlib para evitar procesos colgados.
         """
         try:
+            # Dejar de revisar las exportaciones en curso
+            if self.vigilancia_exportaciones is not None:
+                self.root.after_cancel(self.vigilancia_exportaciones)
+                self.vigilancia_exportaciones = None
+
             # Cerrar todas las figuras de matplotlib para liberar memoria
             plt.close('all')
             
@@ -335,6 +355,10 @@ class LatexExpanderGUI:
         self.export_button = tk.Button(self.export_frame, text="Exportar a PDF", command=self.export_to_pdf,
                                      font=('Arial', 12, 'bold'), bg='#e0ded7', width=12, height=2)
         self.export_button.pack(padx=5, pady=5)
+        
+        self.export_history_button = tk.Button(self.export_frame, text="Exportar historial", command=self.export_history_to_pdf,
+                                             font=('Arial', 10), bg='#e0ded7', width=14)
+        self.export_history_button.pack(padx=5, pady=(0, 5))
 
     def select_example(self, combo):
         """Maneja la selección de un ejemplo del menú desplegable."""
@@ -374,31 +398,8 @@ class LatexExpanderGUI:
 
     def render_latex_image_to_label(self, latex_code: str, label_widget):
         try:
-            # Limpiar comandos LaTeX problemáticos para matplotlib
-            latex_code = latex_code.replace(",", " ")
-            latex_code = latex_code.replace('\\limits', '')
-            latex_code = latex_code.replace('\\left', '')
-            latex_code = latex_code.replace('\\right', '')
-            
-            needs_display = ("+" in latex_code) or ("\\int" in latex_code and latex_code.count("\\int") > 1)
-            if needs_display:
-                latex_code_wrapped = f"\\[ {latex_code} \\]"
-            else:
-                latex_code_wrapped = f"${latex_code}$"
-                
-            base_font_size = int(12 * self.zoom_level)
-            fig_width = 8 * self.zoom_level * 0.6
-            fig_height = 1.5 * self.zoom_level * 0.6 * 0.7  # 30% más pequeño verticalmente
-            font_size = int(base_font_size * 1.2)
-            fig = plt.figure(figsize=(fig_width, fig_height))
-            fig.text(0.05, 0.5, latex_code_wrapped, fontsize=font_size, va='center', ha='left')
-            plt.axis('off')
-            buf = io.BytesIO()
-            fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.2, dpi=150)
-            # Cerrar la figura inmediatamente después de usarla para liberar memoria
-            plt.close(fig)
-            buf.seek(0)
-            image = Image.open(buf)
+            # Mismo renderizado que `main.py --render-dir` (limpieza para mathtext incluida)
+            image = Image.open(io.BytesIO(renderizar_latex(latex_code, 'png', self.zoom_level)))
             photo = ImageTk.PhotoImage(image)
             label_widget.config(image=photo, text="")  # Limpiar el texto "No disponible"
             label_widget.image = photo
@@ -416,33 +417,20 @@ class LatexExpanderGUI:
         is_latex = self.latex_input_var.get()
         self.update_status("Procesando expresión...")
         
-        # Caso especial para (a+b)(a-b) que causa el error
-        if expression == "(a+b)(a-b)" or expression == "(a-b)(a+b)":
-            from sympy import Symbol
-            a = Symbol('a')
-            b = Symbol('b')
-            result = {
-                "success": True,
-                "original": expression,
-                "expanded": a**2 - b**2,
-                "original_latex": expression,
-                "expanded_latex": "a^2 - b^2",
-                "error": None,
-                "method": "direct_case"
-            }
-        else:
-            try:
-                result = Expander.process_expression(expression, is_latex)
-            except Exception as e:
-                self.update_status(f"Error inesperado: {str(e)}")
-                messagebox.showerror("Error", f"Error inesperado:\n{str(e)}")
-                return
+        try:
+            result = Expander.process_expression(expression, is_latex, self.expansor_incremental)
+        except Exception as e:
+            self.update_status(f"Error inesperado: {str(e)}")
+            messagebox.showerror("Error", f"Error inesperado:\n{str(e)}")
+            return
         if not isinstance(result, dict):
             self.update_status("Error: El resultado no es un diccionario")
             messagebox.showerror("Error", "El resultado del procesamiento no es válido.")
             return
         if result.get("success"):
             self.current_expression = result
+            if result.get('expanded_latex'):
+                self.historial.append((expression, result['expanded_latex']))
             # Mostrar imágenes y texto en las áreas correspondientes
             if result.get('original_latex'):
                 try:
@@ -528,12 +516,73 @@ class LatexExpanderGUI:
         if not pdf_path:
             return  # El usuario canceló
         latex_code = self.current_expression['expanded_latex']
-        result = LatexExporter.export_latex_to_pdf(latex_code, pdf_path)
+        # La compilación corre en segundo plano; el resultado vuelve al hilo de Tk por la cola
+        self.export_button.config(state=tk.DISABLED)
+        LatexExporter.export_latex_to_pdf_async(
+            latex_code, pdf_path,
+            callback=self._encolar_exportacion(f"PDF generado exitosamente en:\n{pdf_path}", self.export_button)
+        )
+
+    def _encolar_exportacion(self, success_message, button):
+        """
+        Registra una exportación en curso y devuelve su callback: desde el hilo de compilación
+        solo deja el resultado en la cola, que _vigilar_exportaciones() atiende en el hilo de Tk.
+        """
+        self.exportaciones_pendientes += 1
+        if self.vigilancia_exportaciones is None:
+            self.vigilancia_exportaciones = self.root.after(INTERVALO_EXPORTACIONES_MS, self._vigilar_exportaciones)
+        return lambda result: self.exportaciones_terminadas.put((result, success_message, button))
+
+    def _vigilar_exportaciones(self):
+        """
+        Atiende las exportaciones terminadas (hilo de Tk) y se reprograma mientras queden en curso.
+        """
+        self.vigilancia_exportaciones = None
+        try:
+            while True:
+                try:
+                    result, success_message, button = self.exportaciones_terminadas.get_nowait()
+                except queue.Empty:
+                    break
+                self.exportaciones_pendientes -= 1
+                self._on_pdf_exported(result, success_message, button)
+        finally:
+            if self.exportaciones_pendientes > 0:
+                self.vigilancia_exportaciones = self.root.after(INTERVALO_EXPORTACIONES_MS, self._vigilar_exportaciones)
+
+    def _on_pdf_exported(self, result, success_message, button):
+        """
+        Muestra el resultado de una exportación a PDF en segundo plano (se ejecuta en el hilo de Tk).
+        """
+        button.config(state=tk.NORMAL)
         if result['success']:
-            messagebox.showinfo("Éxito", f"PDF generado exitosamente en:\n{pdf_path}")
+            messagebox.showinfo("Éxito", success_message)
         else:
             messagebox.showerror("Error", f"No se pudo compilar el PDF.\n\nSalida:\n{result['error']}")
 
+    def export_history_to_pdf(self):
+        """
+        Exporta todas las expansiones de la sesión a un único PDF (una sola compilación de pdflatex).
+        """
+        if not self.historial:
+            messagebox.showwarning("Advertencia", "No hay resultados para exportar.")
+            return
+        from tkinter import filedialog
+        pdf_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("Archivo PDF", "*.pdf"), ("Todos los archivos", "*.")]
+        )
+        if not pdf_path:
+            return  # El usuario canceló
+        titles = [expression for expression, _ in self.historial]
+        codes = [latex_code for _, latex_code in self.historial]
+        self.export_history_button.config(state=tk.DISABLED)
+        LatexExporter.export_batch_to_pdf_async(
+            codes, pdf_path, titles,
+            callback=self._encolar_exportacion(f"PDF con {len(codes)} expresiones generado en:\n{pdf_path}",
+                                               self.export_history_button)
+        )
+
     @staticmethod
     def expand_expression_gui(expression: str, is_latex: bool = False):
         """
@@ -748,6 +797,7 @@ class LatexExpanderGUI:
 # Función principal para lanzar la GUI si se ejecuta este archivo directamente
 
 def main():
+    logging.basicConfig(level=logging.INFO)
     try:
         root = tk.Tk()
         app = LatexExpanderGUI(root)
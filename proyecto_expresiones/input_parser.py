@@ -15,13 +15,25 @@ Funcionalidades:
 
 import re
 import logging
-from typing import Dict, Set, Tuple, Any, Optional, Union
-from sympy import sympify, Symbol, symbols, latex, Sum, Product, Integral, Matrix, Basic
+from bisect import bisect_left
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, FrozenSet, Set, Tuple, Any, Optional, Union
+from sympy import sympify, Symbol, symbols, latex, Sum, Product, Integral, Matrix, Derivative, Basic
 from sympy.core.sympify import SympifyError
 from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+from utils import (canonicalizar_expresion, huella_expresion, compilar_sustituciones, censar_latex, CensoLatex,
+                   indice_delimitadores, grupo_tras, lector_argumentos, reescribir_construcciones)
+from productos_notables import reconocer_producto_notable_latex
+from simbolos import LETRAS_GRIEGAS, RegistroSimbolos, registro
+import trazas
 
-# Configurar logging ANTES de usarlo
-logging.basicConfig(level=logging.INFO)
+if TYPE_CHECKING:
+    # pipeline importa este módulo: solo se importa para las anotaciones
+    from pipeline import ContextoExpresion
+
+# La configuración de logging corresponde a los puntos de entrada (main.py, giu_app.py)
 logger = logging.getLogger(__name__)
 
 # Intentar aplicar el parche para latex2sympy2 en Python 3.12+
@@ -46,12 +58,8 @@ except ImportError:
         LATEX2SYMPY_AVAILABLE = False
         logger.warning(f"latex2sympy2 no está disponible ({e}). Se usará el parser manual.")
 
-def log_debug_event(event_type: str, data: Any, success: bool = True):
-    """Función centralizada para logging de eventos de debug."""
-    if success:
-        logger.debug(f"EVENT: {event_type} - SUCCESS - {data}")
-    else:
-        logger.error(f"EVENT: {event_type} - FAILURE - {data}")
+# Número máximo de expresiones guardadas en la caché de cada InputParser
+MAX_CACHE_PARSER = 256
 
 def clean_expression(expr: str) -> str:
     """Limpia una expresión eliminando espacios extra y caracteres problemáticos."""
@@ -72,30 +80,155 @@ def is_valid_expression(expr: str) -> bool:
         return False
     return True
 
+# Comando LaTeX -> nombre SymPy de cada letra griega
+_REEMPLAZOS_GRIEGAS = tuple(('\\' + nombre, nombre) for nombre in LETRAS_GRIEGAS)
+
+@lru_cache(maxsize=4)
+def _diccionario_parse(registro_simbolos: RegistroSimbolos) -> Dict[str, Any]:
+    """
+    Diccionario local para parse_expr: símbolos del registro más los constructores
+    especiales. Se construye una vez por registro y no se modifica.
+    """
+    symbols_dict = dict(registro_simbolos.simbolos)
+    symbols_dict.update({
+        'Matrix': Matrix,
+        'Sum': Sum,
+        'Integral': Integral,
+        'Derivative': Derivative,
+        'oo': Symbol('oo'),  # Infinito
+        'diff': Derivative,   # Para derivadas
+        'partial': Derivative # Para derivadas parciales
+    })
+    return symbols_dict
+
+# Pares de caracteres contiguos entre los que se inserta '*'
+_CIERRES = frozenset(')]')
+_APERTURAS = frozenset('([')
+
+def insertar_multiplicacion_implicita(expr: str, numero_letra: bool = True) -> str:
+    """
+    Inserta '*' en las multiplicaciones implícitas en una sola pasada lineal.
+
+    Casos: letra-letra (xy), número-letra (2x, si numero_letra), cierre-apertura
+    ((x+1)(x-1), ][), cierre-alfanumérico ((x+1)x, ]2) y alfanumérico-apertura
+    (x(y+1), 2[x]). Los comandos (\\frac, \\alpha, \\{) se copian como un solo
+    token: no se parten ni se multiplican con lo que les sigue.
+
+    Args:
+        expr (str): Expresión a procesar
+        numero_letra (bool): Si también se separa un número de la letra que le sigue
+
+    Returns:
+        str: Expresión con las multiplicaciones explícitas
+    """
+    piezas = []
+    previo = ''
+    i, n = 0, len(expr)
+    while i < n:
+        c = expr[i]
+        if c == '\\':
+            j = i + 1
+            while j < n and expr[j].isalpha():
+                j += 1
+            if j == i + 1 and j < n:
+                j += 1  # Comando de un solo símbolo: \{, \,, \\
+            piezas.append(expr[i:j])
+            previo = ''
+            i = j
+            continue
+        if previo and (
+            (c.isalpha() and (previo.isalpha() or (numero_letra and previo.isdigit())))
+            or (previo in _CIERRES and (c in _APERTURAS or c.isalnum()))
+            or (c in _APERTURAS and previo.isalnum())
+        ):
+            piezas.append('*')
+        piezas.append(c)
+        previo = c
+        i += 1
+    return ''.join(piezas)
+
+# Construcciones con argumentos entre delimitadores. Los patrones solo reconocen el
+# prefijo y los argumentos se leen del índice de delimitadores (utils.reescribir_construcciones):
+# ninguna entrada, por anidada o desbalanceada que sea, provoca retroceso ni tiempo cuadrático.
+
+# Subíndices y exponentes con llaves: x_{1} -> x1, x^{n} -> x**(n)
+_PATRON_SCRIPTS = re.compile(r'((?<=[a-zA-Z])_|\^)')
+_LEER_SCRIPTS = lector_argumentos({
+    '_': (('{', lambda indice: [indice]),),
+    '^': (('{', lambda exponente: ['**(', exponente, ')']),),
+}, espacios=False)
+# Subíndices con llaves conservando el guion bajo: x_{1} -> x_1
+_PATRON_SUBINDICE = re.compile(r'(?<=[a-zA-Z])(_)')
+_LEER_SUBINDICES = lector_argumentos({
+    '_': (('{', lambda indice: ['_', indice]),),
+}, espacios=False)
+# Exponente con llaves tras una base (la base no cambia): x^{n} -> x**n
+_PATRON_EXPONENTE_BASE = re.compile(r'(?<=[a-zA-Z0-9(\[{])(\^)')
+_LEER_EXPONENTE_BASE = lector_argumentos({
+    '^': (('{', lambda exponente: ['**', exponente]),),
+}, espacios=False)
+# Fracciones, raíces y acentos
+_PATRON_COMANDOS_ARGUMENTOS = re.compile(r'\\(frac|sqrt|vec|hat|bar|tilde|dot|ddot)(?![a-zA-Z])')
+_LEER_COMANDOS_ARGUMENTOS = lector_argumentos({
+    'frac': (('{{', lambda numerador, denominador: ['(', numerador, ')/(', denominador, ')']),),
+    'sqrt': (('[{', lambda indice, radicando: ['root(', radicando, ', ', indice, ')']),
+             ('{', lambda radicando: ['sqrt(', radicando, ')'])),
+    **{acento: (('{', lambda argumento: [argumento]),) for acento in ('vec', 'hat', 'bar', 'tilde', 'dot', 'ddot')},
+})
+# Llaves y corchetes restantes como paréntesis
+_PATRON_AGRUPACIONES = re.compile(r'(?=([{\[]))')
+_LEER_AGRUPACIONES = lector_argumentos({
+    '{': (('{', lambda contenido: ['(', contenido, ')']),),
+    '[': (('[', lambda contenido: ['(', contenido, ')']),),
+}, espacios=False)
+# Sumatorias, productos e integrales: \sum_{k=1}^{n} cuerpo
+_PATRON_CONSTRUCTO = re.compile(r'\\(sum|prod|int)(?![a-zA-Z])')
+_CONSTRUCTOS = {
+    'sum': ('Sum', 'k', '0', 'n'),
+    'prod': ('Product', 'k', '0', 'n'),
+    'int': ('Integral', 'x', '-oo', 'oo'),
+}
+_PATRON_VARIABLE_LIMITE = re.compile(r'\s*([a-zA-Z])\s*=')
+_PATRON_DIFERENCIAL = re.compile(r'd(?=[a-zA-Z])')
+
 class GestorReglas:
-    """Gestor de reglas de reescritura y preprocesamiento."""
+    """
+    Gestor de reglas de reescritura y preprocesamiento.
+    Las reglas no guardan estado entre llamadas y la tabla es de solo lectura,
+    por lo que una misma instancia puede usarse desde varios hilos.
+    """
     
     def __init__(self):
-        self.reglas = {
+        self.reglas = MappingProxyType({
             'latex_delimiters': ReglaDelimitadores(),
             'latex_constructs': ReglaConstructos(),
             'latex_functions': ReglaFunciones(),
             'latex_greek': ReglaGriegas(),
             'latex_cleanup': ReglaLimpieza()
-        }
+        })
     
-    def aplicar_todas(self, expr: str) -> str:
-        """Aplica todas las reglas en orden de prioridad."""
+    def aplicar_todas(self, expr: str, censo: Optional[CensoLatex] = None) -> str:
+        """
+        Aplica las reglas en orden de prioridad, saltando las que no tienen disparadores
+        en la expresión. El censo se toma una vez sobre la entrada: ninguna regla introduce
+        comandos o caracteres que disparen una regla posterior.
+        """
+        censo = censo or censar_latex(expr)
         resultado = expr
         for nombre, regla in self.reglas.items():
-            resultado = regla.aplicar(resultado)
-            log_debug_event(f"regla_{nombre}", f"Entrada: {expr[:50]}... -> Salida: {resultado[:50]}...")
+            if regla.disparadores is not None and not censo.contiene(regla.disparadores):
+                continue
+            resultado = regla.aplicar(resultado, censo)
+            if trazas.ACTIVAS:
+                trazas.evento(f"regla_{nombre}", entrada=expr, salida=resultado)
         return resultado
 
 class ReglaDelimitadores:
     """Regla para limpiar delimitadores LaTeX."""
     
-    def aplicar(self, expr: str) -> str:
+    disparadores = frozenset({'\\left', '\\right', '\\big', '\\Big', '\\bigg', '\\Bigg'})
+    
+    def aplicar(self, expr: str, censo: Optional[CensoLatex] = None) -> str:
         """Limpia delimitadores \\left y \\right manteniendo la estructura."""
         # Limpiar espacios extra en delimitadores
         expr = re.sub(r'\\left\s+', r'\\left', expr)
@@ -124,471 +257,149 @@ class ReglaDelimitadores:
 class ReglaConstructos:
     """Regla para procesar constructos matemáticos complejos."""
     
-    def aplicar(self, expr: str) -> str:
+    # Siempre se aplica (multiplicación implícita); cada constructo se salta si no aparece
+    disparadores = None
+    
+    def aplicar(self, expr: str, censo: Optional[CensoLatex] = None) -> str:
         """Procesa sumatorias, productos e integrales."""
-        expr = self._procesar_sumatorias(expr)
+        censo = censo or censar_latex(expr)
+        if not censo.comandos.isdisjoint(('\\sum', '\\prod', '\\int')):
+            expr = self._procesar_constructos(expr)
         expr = self._procesar_productos(expr)
-        expr = self._procesar_exponentes(expr)
-        expr = self._procesar_integrales(expr)
+        if '^' in censo.caracteres:
+            expr = self._procesar_exponentes(expr)
         return expr
 
-    def _procesar_sumatorias(self, expr: str) -> str:
+    def _procesar_constructos(self, expr: str) -> str:
         """
-        Convierte sumatorias LaTeX a sintaxis SymPy.
-        Soporta variantes: espacios, delimitadores, variantes de notación y casos extremos.
+        Convierte sumatorias, productos e integrales LaTeX a sintaxis SymPy en una sola pasada.
+        Soporta límites opcionales, cuerpo entre llaves, entre delimitadores o hasta el final,
+        constructos anidados y notación diferencial (dx, dt) en las integrales.
         """
-        # Patrón robusto para \sum que maneja mejor casos anidados y delimitadores
-        pattern = re.compile(r'''
-            \\sum
-            (?:_\{([^}]*)\})?  # Límite inferior opcional
-            (?:\^\{([^}]*)\})?   # Límite superior opcional
-            (?:\s*\{([^}]*)\})?  # Cuerpo de la sumatoria opcional
-        ''', re.VERBOSE | re.UNICODE)
+        # Posiciones de los diferenciales, para localizar en O(log n) el de cada integral
+        diferenciales = [m.start() for m in _PATRON_DIFERENCIAL.finditer(expr)] if '\\int' in expr else []
 
-        while True:
-            match = pattern.search(expr)
-            if not match:
-                break
-                
-            # Extraer límites y cuerpo
-            try:
-                lower = match.group(1).strip() if match.group(1) else '0'
-                upper = match.group(2).strip() if match.group(2) else 'n'
-                body = match.group(3).strip() if match.group(3) else ''
-                
-                # Extraer variable de la expresión lower
-                var_match = re.match(r'([a-zA-Z])\s*=', lower)
-                if var_match:
-                    var = var_match.group(1)
-                    lower = lower[var_match.end():].strip()
-                else:
-                    # Si no se encuentra variable explícita, usar k por defecto
-                    var = 'k'
-            except Exception as e:
-                log_debug_event('sum_error', {
-                    'type': type(e).__name__,
-                    'message': str(e),
-                    'expression': expr[match.start():match.end()],
-                    'context': 'Error al extraer variable y límites'
-                }, success=False)
-                continue
-            
-            # Si no se encontró cuerpo, buscar después del match
-            if not body:
-                after = expr[match.end():].lstrip()
-                try:
-                    body = self._extraer_expresion_balanceada(after)
-                    if body:
-                        body = body.strip()
-                    else:
-                        body = after.strip()
-                except Exception as e:
-                    log_debug_event('sum_error', {
-                        'type': type(e).__name__,
-                        'message': str(e),
-                        'expression': expr[match.start():match.end()],
-                        'context': f'After: {after[:50]}...'
-                    }, success=False)
-                    body = after.strip()
-            
-            # Manejar multiplicaciones implícitas y balancear paréntesis
-            try:
-                body = self._manejar_multiplicaciones_implisitas(body)
-                replacement = f"Sum({body}, ({var}, {lower}, {upper}))"
-                expr = expr[:match.start()] + replacement + expr[match.end() + len(body):]
-            except Exception as e:
-                log_debug_event('sum_error', {
-                    'type': type(e).__name__,
-                    'message': str(e),
-                    'expression': expr[match.start():match.end()],
-                    'context': f'Error procesando cuerpo: {body[:50]}...'
-                }, success=False)
-                # Último recurso: usar el cuerpo completo
-                body = body.strip()
-                replacement = f"Sum({body}, ({var}, {lower}, {upper}))"
-                expr = expr[:match.start()] + replacement + expr[match.end() + len(body):]
-        return expr
+        def leer(coincidencia, texto, indice):
+            return self._leer_constructo(coincidencia, texto, indice, diferenciales)
+
+        return reescribir_construcciones(expr, _PATRON_CONSTRUCTO, leer)
 
-    def _extraer_expresion_balanceada(self, expr: str) -> Optional[str]:
+    def _leer_constructo(self, coincidencia, texto: str, indice, diferenciales: list) -> Optional[tuple]:
         """
-        Extrae una expresión balanceada (con delimitadores emparejados) de una cadena.
+        Lee \\sum_{inferior}^{superior} cuerpo (y \\prod, \\int) a partir del prefijo.
+        Devuelve la plantilla, los tramos de los argumentos y el fin del constructo.
         """
-        # Manejar delimitadores LaTeX estándar y alternativos
-        delimiters = {
-            '(': ')',
-            '[': ']',
-            '{': '}',
-            '\\left(': '\\right)',
-            '\\left[': '\\right]',
-            '\\left\\{': '\\right\\}',
-            '\\left\\langle': '\\right\\rangle',
-            '\\left|': '\\right|',
-            '\\left\\|': '\\right\\|'
-        }
-        
-        stack = []
-        result = []
-        
-        i = 0
-        while i < len(expr):
-            # Buscar el siguiente delimitador
-            match = None
-            for delimiter in delimiters.keys():
-                if expr[i:].startswith(delimiter):
-                    match = delimiter
-                    break
-            
-            if match:
-                # Si es un delimitador de apertura
-                if match in delimiters:
-                    stack.append((match, i))
-                    result.append(match)
-                    i += len(match)
-                # Si es un delimitador de cierre
-                elif match in delimiters.values():
-                    # Buscar el par correspondiente en el stack
-                    found = False
-                    for j in range(len(stack)-1, -1, -1):
-                        if delimiters[stack[j][0]] == match:
-                            found = True
-                            break
-                    
-                    if found:
-                        # Extraer el contenido entre los delimitadores
-                        start = stack[j][1]
-                        end = i + len(match)
-                        return expr[start:end]
-                    else:
-                        # Delimitador de cierre sin pareja
-                        return None
-            if expr[i] in delimiters:
-                stack.append((expr[i], i))
-                result.append(expr[i])
-            elif expr[i] in delimiters.values():
-                if stack and delimiters[stack[-1][0]] == expr[i]:
-                    stack.pop()
-                    result.append(expr[i])
-                else:
-                    # Agregar el delimitador de cierre correspondiente
-                    if stack:
-                        result.append(delimiters[stack[-1][0]])
-                        stack.pop()
-                    result.append(expr[i])
+        nombre, var, inferior, superior = _CONSTRUCTOS[coincidencia.group(1)]
+        posicion = coincidencia.end()
+        tramos = []
+        limites = {}
+        for marca in ('_', '^'):
+            grupo = grupo_tras(texto, indice, posicion + 1, espacios=False) if texto.startswith(marca, posicion) else None
+            if grupo is not None:
+                limites[marca] = (grupo[1], grupo[2])
+                posicion = grupo[3]
+
+        if '_' in limites:
+            inicio, fin = limites['_']
+            var_match = _PATRON_VARIABLE_LIMITE.match(texto, inicio, fin) if nombre != 'Integral' else None
+            if var_match:
+                var = var_match.group(1)
+                inicio = var_match.end()
+            tramos.append(self._recortar(texto, inicio, fin))
+        if '^' in limites:
+            tramos.append(self._recortar(texto, *limites['^']))
+
+        # Cuerpo: {…}, o el grupo balanceado que sigue (delimitadores incluidos), o el resto
+        grupo = grupo_tras(texto, indice, posicion, '{')
+        if grupo is not None:
+            cuerpo = self._recortar(texto, grupo[1], grupo[2])
+            fin_constructo = grupo[3]
+        else:
+            grupo = grupo_tras(texto, indice, posicion, '([{\\')
+            if grupo is not None:
+                cuerpo = (grupo[0], grupo[3])
+                fin_constructo = grupo[3]
             else:
-                result.append(expr[i])
-            i += 1
-        
-        # Agregar delimitadores faltantes
-        while stack:
-            delimiter, pos = stack.pop()
-            result.insert(pos + 1, delimiters[delimiter])
-        
-        return ''.join(result)
+                while posicion < len(texto) and texto[posicion].isspace():
+                    posicion += 1
+                cuerpo = (posicion, None)
+                fin_constructo = None
+
+        # Variable de integración: el primer diferencial del cuerpo, que se retira
+        cuerpos = [cuerpo]
+        if nombre == 'Integral':
+            inicio, fin = cuerpo
+            i = bisect_left(diferenciales, inicio)
+            if i < len(diferenciales) and (fin is None or diferenciales[i] + 2 <= fin):
+                diferencial = diferenciales[i]
+                var = texto[diferencial + 1]
+                cuerpos = [self._recortar(texto, inicio, diferencial), (diferencial + 2, fin)]
+        tramos.extend(cuerpos)
+
+        tiene_inferior, tiene_superior = '_' in limites, '^' in limites
+
+        def plantilla(*partes):
+            partes = list(partes)
+            limite_inferior = partes.pop(0) if tiene_inferior else inferior
+            limite_superior = partes.pop(0) if tiene_superior else superior
+            return [f"{nombre}(", partes, f", ({var}, ", limite_inferior, ", ", limite_superior, "))"]
+
+        return plantilla, tramos, fin_constructo
+
+    def _recortar(self, texto: str, inicio: int, fin: int) -> Tuple[int, int]:
+        """Tramo [inicio, fin) sin los espacios de los extremos."""
+        while inicio < fin and texto[inicio].isspace():
+            inicio += 1
+        while fin > inicio and texto[fin - 1].isspace():
+            fin -= 1
+        return inicio, fin
+
+    def _extraer_expresion_balanceada(self, expr: str, inicio: int = 0) -> Optional[str]:
+        """
+        Extrae la expresión balanceada que empieza en `inicio`: el grupo completo,
+        delimitadores incluidos, si abre con (, [, { o \\left…; None en otro caso.
+        """
+        grupo = indice_delimitadores(expr).grupo(inicio)
+        if grupo is None:
+            return None
+        return expr[inicio:grupo[3]]
 
     def _procesar_exponentes(self, expr: str) -> str:
         """
         Convierte exponentes LaTeX (^) a sintaxis SymPy (**).
         Maneja casos con paréntesis, corchetes y llaves anidados.
         """
-        # Patrón para exponentes con llaves
-        expr = re.sub(r'([a-zA-Z0-9\(\[\{]+)\^{([^}]+)}', r'\1**\2', expr)
-        # Patrón para exponentes numéricos simples
-        expr = re.sub(r'([a-zA-Z0-9\(\[\{]+)\^([0-9]+)', r'\1**\2', expr)
-        # Patrón para exponentes variables
-        expr = re.sub(r'([a-zA-Z0-9\(\[\{]+)\^([a-zA-Z_]+)', r'\1**\2', expr)
+        # Solo se mira el carácter anterior al ^: la base no cambia y no se vuelve a recorrer
+        expr = reescribir_construcciones(expr, _PATRON_EXPONENTE_BASE, _LEER_EXPONENTE_BASE)
+        expr = re.sub(r'(?<=[a-zA-Z0-9(\[{])\^([0-9]+)', r'**\1', expr)
+        expr = re.sub(r'(?<=[a-zA-Z0-9(\[{])\^([a-zA-Z_]+)', r'**\1', expr)
         return expr
 
     def _procesar_productos(self, expr: str) -> str:
         """
-        Convierte productos LaTeX a sintaxis SymPy.
-        Soporta variantes: espacios, delimitadores, multiplicaciones implícitas y casos extremos.
+        Convierte productos implícitos a sintaxis SymPy: productos de factores, entre
+        variables y entre paréntesis y variables/números.
         """
-        # Tabla de productos notables para reemplazo directo
-        productos_notables = {
-            "(a+b)(a-b)": "(a**2 - b**2)",
-            "(a-b)(a+b)": "(a**2 - b**2)",
-            "(x+y)(x-y)": "(x**2 - y**2)",
-            "(x-y)(x+y)": "(x**2 - y**2)",
-            "(x+1)(x-1)": "(x**2 - 1)",
-            "(x-1)(x+1)": "(x**2 - 1)",
-            "(a+b)^2": "(a**2 + 2*a*b + b**2)",
-            "(a+b)^{2}": "(a**2 + 2*a*b + b**2)",
-            "(a-b)^2": "(a**2 - 2*a*b + b**2)",
-            "(a-b)^{2}": "(a**2 - 2*a*b + b**2)",
-            "(x+1)^2": "(x**2 + 2*x + 1)",
-            "(x+1)^{2}": "(x**2 + 2*x + 1)",
-            "(x-1)^2": "(x**2 - 2*x + 1)",
-            "(x-1)^{2}": "(x**2 - 2*x + 1)"
-        }
-        
-        # Primero manejar \prod
-        pattern = re.compile(r'''
-            \\prod
-            (?:_\{([^}]*)\})?  # Límite inferior opcional
-            (?:\^\{([^}]*)\})?   # Límite superior opcional
-            (?:\s*\{([^}]*)\})?  # Cuerpo del producto opcional
-        ''', re.VERBOSE | re.UNICODE)
-
-        while True:
-            match = pattern.search(expr)
-            if not match:
-                break
-
-            # Extraer límites y cuerpo
-            try:
-                lower = match.group(1).strip() if match.group(1) else '0'
-                upper = match.group(2).strip() if match.group(2) else 'n'
-                body = match.group(3).strip() if match.group(3) else ''
-
-                # Extraer variable de la expresión lower
-                var_match = re.match(r'([a-zA-Z])\s*=', lower)
-                if var_match:
-                    var = var_match.group(1)
-                    lower = lower.replace(var_match.group(0), '')
-                else:
-                    var = 'k'
-
-                # Reemplazar el producto con la sintaxis de SymPy
-                replacement = f"Product({body}, ({var}, {lower}, {upper}))"
-                expr = expr[:match.start()] + replacement + expr[match.end():]
-            except Exception as e:
-                log_debug_event('producto_error', {
-                    'type': type(e).__name__,
-                    'message': str(e),
-                    'expression': expr[match.start():match.end()],
-                    'context': 'Error procesando \\prod'
-                }, success=False)
-                continue
-
-        # Reemplazar productos notables directamente
-        for pattern, replacement in productos_notables.items():
-            expr = expr.replace(pattern, replacement)
-        
-        # Manejar productos de factores (paréntesis consecutivos)
-        # Buscar patrones como (x+1)(x-1) y reemplazarlos por (x+1)*(x-1)
-        if ')(' in expr:
-            expr = expr.replace(')(',')*(')  # Usar replace simple en lugar de regex
-        
-        # Manejar multiplicaciones implícitas entre variables
-        i = 0
-        while i < len(expr) - 1:
-            if expr[i].isalpha() and expr[i+1].isalpha():
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            i += 1
-        
-        # Manejar multiplicaciones implícitas entre paréntesis y variables/números
-        i = 0
-        while i < len(expr) - 1:
-            if expr[i] == ')' and expr[i+1].isalnum():
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            elif expr[i].isalnum() and expr[i+1] == '(':
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            i += 1
-        
-        return expr
+        return insertar_multiplicacion_implicita(expr, numero_letra=False)
 
     def _manejar_multiplicaciones_implisitas(self, expr: str) -> str:
         """
         Convierte multiplicaciones implícitas (junto a variables o paréntesis) a sintaxis explícita.
         """
-        # Tabla de productos notables para reemplazo directo
-        productos_notables = {
-            "(a+b)(a-b)": "(a**2 - b**2)",
-            "(a-b)(a+b)": "(a**2 - b**2)",
-            "(x+y)(x-y)": "(x**2 - y**2)",
-            "(x-y)(x+y)": "(x**2 - y**2)",
-            "(x+1)(x-1)": "(x**2 - 1)",
-            "(x-1)(x+1)": "(x**2 - 1)",
-            "(a+b)^2": "(a**2 + 2*a*b + b**2)",
-            "(a+b)^{2}": "(a**2 + 2*a*b + b**2)",
-            "(a-b)^2": "(a**2 - 2*a*b + b**2)",
-            "(a-b)^{2}": "(a**2 - 2*a*b + b**2)",
-            "(x+1)^2": "(x**2 + 2*x + 1)",
-            "(x+1)^{2}": "(x**2 + 2*x + 1)",
-            "(x-1)^2": "(x**2 - 2*x + 1)",
-            "(x-1)^{2}": "(x**2 - 2*x + 1)",
-            "(\\alpha+\\beta)(\\alpha-\\beta)": "(\\alpha**2 - \\beta**2)",
-            "(\\alpha-\\beta)(\\alpha+\\beta)": "(\\alpha**2 - \\beta**2)",
-            "(\\lambda+1)(\\lambda-1)": "(\\lambda**2 - 1)",
-            "(\\lambda-1)(\\lambda+1)": "(\\lambda**2 - 1)"
-        }
-        
-        # Reemplazar productos notables directamente
-        for pattern, replacement in productos_notables.items():
-            if pattern in expr:
-                expr = expr.replace(pattern, replacement)
-        
-        # Reemplazar productos implícitos con multiplicación explícita
-        if ')(' in expr:
-            expr = expr.replace(')(',')*(')  # Usar replace simple en lugar de regex
-        
-        # Manejar multiplicaciones implícitas entre número y variable
-        i = 0
-        while i < len(expr) - 1:
-            if expr[i].isdigit() and expr[i+1].isalpha():
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            i += 1
-        
-        # Manejar multiplicaciones implícitas entre variables
-        i = 0
-        while i < len(expr) - 1:
-            if expr[i].isalpha() and expr[i+1].isalpha():
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            i += 1
-        
-        # Manejar multiplicaciones implícitas entre paréntesis y variables/números
-        i = 0
-        while i < len(expr) - 1:
-            if expr[i] == ')' and expr[i+1].isalnum():
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            elif expr[i].isalnum() and expr[i+1] == '(':
-                expr = expr[:i+1] + '*' + expr[i+1:]
-                i += 1  # Avanzar un caracter extra por el '*' insertado
-            i += 1
-        
-        return expr
-        
-        # Multiplicación implícita entre corchetes y variables/números
-        while True:
-            new_expr = re.sub(r'\]\s*([a-zA-Z0-9])', r']*\1', expr)
-            if new_expr == expr:
-                break
-            expr = new_expr
-        
-        while True:
-            new_expr = re.sub(r'([a-zA-Z0-9])\s*\[', r'\1*\[', expr)
-            if new_expr == expr:
-                break
-            expr = new_expr
-        
-        # Multiplicación implícita entre corchetes
-        while True:
-            new_expr = re.sub(r'\]\s*\[', r']*[', expr)
-            if new_expr == expr:
-                break
-            expr = new_expr
-        
-        return expr
-
-    def _procesar_integrales(self, expr: str) -> str:
-        """
-        Convierte integrales LaTeX a sintaxis SymPy.
-        Soporta variantes: espacios, delimitadores, notación diferencial flexible y casos extremos.
-        """
-        # Patrón robusto para \int que maneja mejor casos anidados y delimitadores
-        pattern = re.compile(r'''
-            \\int
-            (?:_\{([^}]*)\})?  # Límite inferior opcional
-            (?:\^\{([^}]*)\})?   # Límite superior opcional
-            (?:\s*\{([^}]*)\})?  # Cuerpo de la integral opcional
-        ''', re.VERBOSE | re.UNICODE)
-
-        while True:
-            match = pattern.search(expr)
-            if not match:
-                break
-                
-            # Extraer límites y cuerpo
-            try:
-                lower = match.group(1).strip() if match.group(1) else '-oo'
-                upper = match.group(2).strip() if match.group(2) else 'oo'
-                body = match.group(3).strip() if match.group(3) else ''
-            except Exception as e:
-                log_debug_event('integral_error', {
-                    'type': type(e).__name__,
-                    'message': str(e),
-                    'expression': expr[match.start():match.end()],
-                    'context': 'Error al extraer límites'
-                }, success=False)
-                continue
-            
-            # Si no se encontró cuerpo, buscar después del match
-            if not body:
-                after = expr[match.end():].lstrip()
-                try:
-                    body = self._extraer_expresion_balanceada(after)
-                    if body:
-                        body = body.strip()
-                    else:
-                        body = after.strip()
-                except Exception as e:
-                    log_debug_event('integral_error', {
-                        'type': type(e).__name__,
-                        'message': str(e),
-                        'expression': expr[match.start():match.end()],
-                        'context': f'After: {after[:50]}...'
-                    }, success=False)
-                    body = after.strip()
-            
-            # Buscar variable de integración (dx, dt, etc.)
-            var = 'x'
-            var_match = re.search(r'd([a-zA-Z])', body)
-            if var_match:
-                var = var_match.group(1)
-                body = body[:var_match.start()].strip() + body[var_match.end():].strip()
-            
-            # Manejar multiplicaciones implícitas y balancear paréntesis
-            try:
-                body = self._manejar_multiplicaciones_implisitas(body)
-                body = self._balancear_parentesis(body)
-                replacement = f"Integral({body}, ({var}, {lower}, {upper}))"
-                expr = expr[:match.start()] + replacement + expr[match.end() + len(body):]
-            except Exception as e:
-                log_debug_event('integral_error', {
-                    'type': type(e).__name__,
-                    'message': str(e),
-                    'expression': expr[match.start():match.end()],
-                    'context': f'Error procesando cuerpo: {body[:50]}...'
-                }, success=False)
-                # Último recurso: usar el cuerpo completo
-                body = body.strip()
-                replacement = f"Integral({body}, ({var}, {lower}, {upper}))"
-                expr = expr[:match.start()] + replacement + expr[match.end() + len(body):]
-        return expr
+        return insertar_multiplicacion_implicita(expr)
 
     def _extraer_grupo_llaves(self, s: str, start: int = 0) -> Tuple[str, int]:
         """
         Extrae el contenido de un grupo de llaves balanceadas.
-        Maneja casos extremos con expresiones muy largas y anidadas.
+        Devuelve (contenido, índice tras la llave de cierre).
         """
         if s[start] != '{':
             raise ValueError('No se encontró llave de apertura')
-        
-        depth = 1  # Inicia en 1 porque ya encontramos la primera llave
-        length = len(s)
-        i = start + 1
-        
-        # Buffer para acumular contenido
-        contenido = []
-        
-        while i < length:
-            if s[i] == '{':
-                depth += 1
-                contenido.append(s[i])
-            elif s[i] == '}':
-                depth -= 1
-                contenido.append(s[i])
-                if depth == 0:
-                    return ''.join(contenido), i + 1
-            else:
-                # Manejar comandos LaTeX especiales
-                if s[i] == '\\':
-                    if i + 1 < length:
-                        contenido.append(s[i:i+2])
-                        i += 1
-                else:
-                    contenido.append(s[i])
-            i += 1
-        
-        if depth != 0:
+        grupo = indice_delimitadores(s).grupo(start)
+        if grupo is None:
             raise ValueError('Llaves desbalanceadas')
-        return ''.join(contenido), i
+        _, inicio, fin, siguiente = grupo
+        return s[inicio:fin], siguiente
     
     def _extraer_hasta_comando(self, text: str) -> str:
         """Extrae texto hasta encontrar el siguiente comando LaTeX."""
@@ -611,54 +422,17 @@ class ReglaConstructos:
     def _extraer_grupo_delimitador(self, s: str, start: int = 0) -> tuple:
         """
         Extrae el contenido de un grupo delimitado por (), [] o {} balanceados.
-        Maneja casos extremos con expresiones muy largas y anidadas.
         Devuelve (contenido, índice final).
         """
-        abres = {'{': '}', '(': ')', '[': ']'}
         abre = s[start]
-        cierra = abres.get(abre)
-        if not cierra:
+        if abre not in '([{':
             raise ValueError('Delimitador de apertura no válido')
-        
-        depth = 0
-        length = len(s)
-        i = start
-        
-        # Buffer para acumular contenido
-        contenido = []
-        
-        while i < length:
-            if s[i] == abre:
-                depth += 1
-                contenido.append(s[i])
-            elif s[i] == cierra:
-                depth -= 1
-                contenido.append(s[i])
-                if depth == 0:
-                    return ''.join(contenido[1:-1]), i + 1
-            else:
-                # Manejar casos especiales de LaTeX
-                if s[i] == '\\':
-                    # Comando LaTeX
-                    if i + 1 < length:
-                        contenido.append(s[i:i+2])
-                        i += 1
-                elif s[i] == '{':
-                    # Llave de apertura
-                    contenido.append(s[i])
-                    depth += 1
-                elif s[i] == '}':
-                    # Llave de cierre
-                    contenido.append(s[i])
-                    depth -= 1
-                else:
-                    # Caracter normal
-                    contenido.append(s[i])
-            i += 1
-        
-        if depth != 0:
+        grupo = indice_delimitadores(s).grupo(start)
+        if grupo is None:
+            cierra = {'(': ')', '[': ']', '{': '}'}[abre]
             raise ValueError(f'Delimitadores desbalanceados: {abre} sin {cierra}')
-        return ''.join(contenido[1:-1]), i
+        _, inicio, fin, siguiente = grupo
+        return s[inicio:fin], siguiente
     
     def _balancear_parentesis(self, expr: str) -> str:
         """Balancea paréntesis en la expresión para evitar errores de parseo."""
@@ -673,7 +447,12 @@ class ReglaConstructos:
 class ReglaFunciones:
     """Regla para procesar funciones matemáticas."""
     
-    def aplicar(self, expr: str) -> str:
+    disparadores = frozenset({
+        '\\sin', '\\cos', '\\tan', '\\cot', '\\sec', '\\csc', '\\arcsin', '\\arccos', '\\arctan',
+        '\\sinh', '\\cosh', '\\tanh', '\\log', '\\ln', '\\exp', '\\sqrt'
+    })
+    
+    def aplicar(self, expr: str, censo: Optional[CensoLatex] = None) -> str:
         """Convierte funciones LaTeX a nombres de SymPy."""
         replacements = [
             (r'\\sin', 'sin'), (r'\\cos', 'cos'), (r'\\tan', 'tan'),
@@ -692,42 +471,34 @@ class ReglaFunciones:
 class ReglaGriegas:
     """Regla para procesar letras griegas."""
     
-    def aplicar(self, expr: str) -> str:
+    disparadores = frozenset(griega for griega, _ in _REEMPLAZOS_GRIEGAS)
+    
+    def aplicar(self, expr: str, censo: Optional[CensoLatex] = None) -> str:
         """Convierte letras griegas LaTeX a nombres de SymPy."""
-        replacements = [
-            (r'\\alpha', 'alpha'), (r'\\beta', 'beta'), (r'\\gamma', 'gamma'),
-            (r'\\delta', 'delta'), (r'\\epsilon', 'epsilon'), (r'\\varepsilon', 'varepsilon'),
-            (r'\\zeta', 'zeta'), (r'\\eta', 'eta'), (r'\\theta', 'theta'),
-            (r'\\vartheta', 'vartheta'), (r'\\iota', 'iota'), (r'\\kappa', 'kappa'),
-            (r'\\lambda', 'lambda'), (r'\\mu', 'mu'), (r'\\nu', 'nu'),
-            (r'\\xi', 'xi'), (r'\\omicron', 'omicron'), (r'\\rho', 'rho'),
-            (r'\\sigma', 'sigma'), (r'\\tau', 'tau'), (r'\\upsilon', 'upsilon'),
-            (r'\\phi', 'phi'), (r'\\varphi', 'varphi'), (r'\\chi', 'chi'),
-            (r'\\psi', 'psi'), (r'\\omega', 'omega'),
-            (r'\\Gamma', 'Gamma'), (r'\\Delta', 'Delta'), (r'\\Theta', 'Theta'),
-            (r'\\Lambda', 'Lambda'), (r'\\Xi', 'Xi'), (r'\\Pi', 'Pi'),
-            (r'\\Sigma', 'Sigma'), (r'\\Phi', 'Phi'), (r'\\Psi', 'Psi'),
-            (r'\\Omega', 'Omega')
-        ]
-        
-        for pattern, replacement in replacements:
-            expr = re.sub(pattern, replacement, expr)
+        for griega, nombre in _REEMPLAZOS_GRIEGAS:
+            expr = expr.replace(griega, nombre)
         
         return expr
 
 class ReglaLimpieza:
     """Regla para limpieza final de expresiones."""
     
-    def aplicar(self, expr: str) -> str:
+    disparadores = None
+    
+    def aplicar(self, expr: str, censo: Optional[CensoLatex] = None) -> str:
         """Limpia la expresión final para compatibilidad con SymPy."""
-        # ===== PASO 1: PROCESAR SUBÍNDICES ANTES QUE CUALQUIER COSA =====
-        # Convertir x_{1} -> x1, x_{i} -> xi, etc.
-        expr = re.sub(r'([a-zA-Z])_\{([^}]+)\}', r'\1\2', expr)
+        # Los pasos ligados a un comando o carácter se saltan si el censo no lo registra
+        censo = censo or censar_latex(expr)
+        
+        # ===== PASOS 1 Y 2: PROCESAR SUBÍNDICES Y EXPONENTES CON LLAVES =====
+        # Convertir x_{1} -> x1, x_{i} -> xi, x^{2} -> x**(2), x^{n} -> x**(n), etc.
+        if '_' in censo.caracteres or '^' in censo.caracteres:
+            expr = reescribir_construcciones(expr, _PATRON_SCRIPTS, _LEER_SCRIPTS)
+        if '^' in censo.caracteres:
+            expr = re.sub(r'\^([a-zA-Z0-9])', r'**\1', expr)
         
-        # ===== PASO 2: PROCESAR EXPONENTES CON LLAVES =====
-        # Convertir x^{2} -> x**2, x^{n} -> x**n, etc.
-        expr = re.sub(r'\^{([^}]+)}', r'**(\1)', expr)
-        expr = re.sub(r'\^([a-zA-Z0-9])', r'**\1', expr)
+        if '\\' not in censo.caracteres:
+            return self._limpieza_general(expr, censo)
         
         # ===== PASO 3: CONVERTIR VARIABLES ESPECÍFICAS =====
         # Convertir \lambda -> lambda, \mu -> mu, etc.
@@ -744,42 +515,35 @@ class ReglaLimpieza:
         expr = re.sub(r'\\psi', 'psi', expr)
         expr = re.sub(r'\\omega', 'omega', expr)
         
-        # ===== PASO 4: CONVERTIR FRACCIONES =====
-        # Patrón más robusto para fracciones que maneja mejor las llaves
-        expr = re.sub(r'\\frac\s*\{([^{}]*)\}\s*\{([^{}]*)\}', r'(\1)/(\2)', expr)
-        
-        # ===== PASO 5: CONVERTIR RAÍCES =====
-        expr = re.sub(r'\\sqrt\s*\{([^{}]*)\}', r'sqrt(\1)', expr)
-        expr = re.sub(r'\\sqrt\[([^\]]*)\]\s*\{([^{}]*)\}', r'root(\2, \1)', expr)
-        
-        # ===== PASO 6: LIMPIAR COMANDOS RESTANTES =====
-        expr = re.sub(r'\\vec\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\hat\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\bar\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\tilde\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\dot\{([^}]+)\}', r'\1', expr)
-        expr = re.sub(r'\\ddot\{([^}]+)\}', r'\1', expr)
+        # ===== PASOS 4 A 6: FRACCIONES, RAÍCES Y COMANDOS RESTANTES =====
+        # \frac{a}{b} -> (a)/(b), \sqrt{x} -> sqrt(x), \sqrt[n]{x} -> root(x, n), \vec{v} -> v;
+        # los argumentos anidados (\frac{\sqrt{x}}{2}) se convierten de dentro hacia fuera
+        expr = reescribir_construcciones(expr, _PATRON_COMANDOS_ARGUMENTOS, _LEER_COMANDOS_ARGUMENTOS)
         
+        return self._limpieza_general(expr, censo)
+    
+    def _limpieza_general(self, expr: str, censo: CensoLatex) -> str:
+        """Pasos de limpieza que no dependen de comandos LaTeX (delimitadores, espacios, productos)."""
         # ===== PASO 7: CONVERTIR DELIMITADORES ANIDADOS =====
-        expr = re.sub(r'\[([^\]]+)\]', r'(\1)', expr)
-        expr = re.sub(r'\{([^}]+)\}', r'(\1)', expr)
+        if '[' in censo.caracteres or '{' in censo.caracteres:
+            expr = reescribir_construcciones(expr, _PATRON_AGRUPACIONES, _LEER_AGRUPACIONES)
         
         # ===== PASO 8: LIMPIAR ESPACIOS Y BACKSLASHES =====
         expr = expr.replace('\\\\', '').replace(' ', '')
         
         # ===== PASO 9: INSERTAR MULTIPLICACIÓN EXPLÍCITA =====
-        # Después de exponentes
-        expr = re.sub(r'(\*\*\d+)(?=(\\(|\\\[|\\\{|[a-zA-Z0-9]))', r'\1 \2', expr)
+        # Después de exponentes: el exponente se toma entero (**10 no se parte en **1 0)
+        expr = re.sub(r'(\*\*\d++)(?=[(\[{a-zA-Z])', r'\1 ', expr)
         # Después de paréntesis cerrados
-        expr = re.sub(r'(\\)|\\]|\\})(?=(\\(|\\\[|\\\{|[a-zA-Z0-9]))', r'\1 \2', expr)
+        expr = re.sub(r'([)\]}])(?=[(\[{a-zA-Z0-9])', r'\1 ', expr)
         # Entre número y variable
         expr = re.sub(r'(\d)([a-zA-Z])', r'\1 \2', expr)
         # Entre variable y paréntesis
-        expr = re.sub(r'([a-zA-Z])(?=\\()', r'\1 ', expr)
+        expr = re.sub(r'([a-zA-Z])(?=\()', r'\1 ', expr)
         # Convertir espacios a multiplicación
         expr = re.sub(r' +', '*', expr)
         # Limpiar multiplicación innecesaria en funciones
-        expr = re.sub(r'(\\b[a-zA-Z]+)\\*\\(', r'\1(', expr)
+        expr = re.sub(r'(\b[a-zA-Z]+)\*\(', r'\1(', expr)
         
         # ===== PASO 10: LIMPIAR ERRORES ESPECÍFICOS =====
         expr = expr.replace('/(,', '/(').replace('*ssqrt', '*sqrt')
@@ -801,7 +565,7 @@ class ReglaLimpieza:
 
 def expandir_producto_notable(expr):
     """
-    Expande productos notables comunes directamente sin usar expresiones regulares complejas.
+    Expande productos notables usando el reconocedor estructural de productos_notables.
     
     Args:
         expr (str): Expresión a expandir
@@ -809,173 +573,46 @@ def expandir_producto_notable(expr):
     Returns:
         str: Expresión expandida o None si no es un producto notable
     """
-    # Eliminar espacios
-    expr = expr.strip()
-    
-    # Caso especial para polinomios extremos
-    if len(expr) > 500 and ')(' in expr:
-        # Para polinomios extremos, simplemente devolver un resultado genérico
-        if '(x^{' in expr or '(x**' in expr:
-            return "x^n - y^n"
-        return "a^n - b^n"
-    
-    # Tabla ampliada de productos notables
-    productos_notables = {
-        # Diferencia de cuadrados
-        "(a+b)(a-b)": "a^2 - b^2",
-        "(a-b)(a+b)": "a^2 - b^2",
-        "(x+y)(x-y)": "x^2 - y^2",
-        "(x-y)(x+y)": "x^2 - y^2",
-        "(x+1)(x-1)": "x^2 - 1",
-        "(x-1)(x+1)": "x^2 - 1",
-        "(\\alpha+\\beta)(\\alpha-\\beta)": "\\alpha^2 - \\beta^2",
-        "(\\alpha-\\beta)(\\alpha+\\beta)": "\\alpha^2 - \\beta^2",
-        "(\\lambda+1)(\\lambda-1)": "\\lambda^2 - 1",
-        "(\\lambda-1)(\\lambda+1)": "\\lambda^2 - 1",
-        "(\\theta+\\phi)(\\theta-\\phi)": "\\theta^2 - \\phi^2",
-        "(\\theta-\\phi)(\\theta+\\phi)": "\\theta^2 - \\phi^2",
-        
-        # Cuadrado de binomio
-        "(a+b)^2": "a^2 + 2ab + b^2",
-        "(a+b)^{2}": "a^2 + 2ab + b^2",
-        "(a-b)^2": "a^2 - 2ab + b^2",
-        "(a-b)^{2}": "a^2 - 2ab + b^2",
-        "(x+1)^2": "x^2 + 2x + 1",
-        "(x+1)^{2}": "x^2 + 2x + 1",
-        "(x-1)^2": "x^2 - 2x + 1",
-        "(x-1)^{2}": "x^2 - 2x + 1",
-        
-        # Cubo de binomio
-        "(a+b)^3": "a^3 + 3a^2b + 3ab^2 + b^3",
-        "(a+b)^{3}": "a^3 + 3a^2b + 3ab^2 + b^3",
-        "(a-b)^3": "a^3 - 3a^2b + 3ab^2 - b^3",
-        "(a-b)^{3}": "a^3 - 3a^2b + 3ab^2 - b^3",
-        
-        # Productos de binomios
-        "(a+b)(a+c)": "a^2 + ab + ac + bc",
-        "(a-b)(a-c)": "a^2 - ab - ac + bc",
-        "(a+b)(a-c)": "a^2 + ab - ac - bc",
-        "(a-b)(a+c)": "a^2 - ab + ac - bc",
-        "(x+2)(x+3)": "x^2 + 5x + 6",
-        "(2x-3)(x+1)": "2x^2 - x - 3",
-        "(x-1)(-2x+3)": "-2x^2 + 5x - 3",
-        
-        # Casos con variables griegas
-        "(\\alpha+1)(\\alpha-1)": "\\alpha^2 - 1",
-        "(\\alpha-1)(\\alpha+1)": "\\alpha^2 - 1",
-        "(\\lambda^2+1)(\\lambda-1)": "\\lambda^3 - \\lambda^2 + \\lambda - 1",
-        "(\\beta^2+2\\beta+1)(\\beta-1)": "\\beta^3 + \\beta^2 - \\beta - 1",
-        "(\\theta^2+\\phi^2)(\\theta^2-\\phi^2)": "\\theta^4 - \\phi^4",
-        
-        # Casos con subíndices
-        "(x_{1}+y_{1})(x_{1}-y_{1})": "x_{1}^2 - y_{1}^2",
-        "(x_{1}-y_{1})(x_{1}+y_{1})": "x_{1}^2 - y_{1}^2",
-        "(a_{1}+b_{1})(a_{1}-b_{1})": "a_{1}^2 - b_{1}^2",
-        "(a_{1}-b_{1})(a_{1}+b_{1})": "a_{1}^2 - b_{1}^2",
-        "(x_{1}^2+2x_{1}+1)(x_{1}-1)": "x_{1}^3 - 1",
-        "(x_{a}^2+2x_{a}+1)(x_{a}-1)": "x_{a}^3 - 1",
-        
-        # Casos con coeficientes fraccionarios
-        "(\\frac{1}{2}x+1)(x-2)": "\\frac{1}{2}x^2 - x - 2",
-        "(\\frac{3}{4}x-2)(x+4)": "\\frac{3}{4}x^2 + 3x - 8",
-        "(5x-\\frac{1}{3})(x+\\frac{2}{5})": "5x^2 + 2x - \\frac{1}{3}x - \\frac{2}{15}"
-    }
-    
-    # Verificar si la expresión está en la tabla
-    if expr in productos_notables:
-        return productos_notables[expr]
-    
-    # Verificar si es un caso de diferencia de cuadrados sin usar regex
-    try:
-        if expr.count('(') == 2 and expr.count(')') == 2 and ')(' in expr:
-            # Dividir en dos factores
-            factor1, factor2 = expr.split(')(', 1)
-            factor1 = factor1[1:]  # Quitar el primer paréntesis
-            factor2 = factor2[:-1]  # Quitar el último paréntesis
-            
-            # Verificar si son de la forma A+B y A-B
-            if '+' in factor1 and '-' in factor2:
-                parts1 = factor1.split('+', 1)
-                parts2 = factor2.split('-', 1)
-                if parts1[0] == parts2[0] and parts1[1] == parts2[1]:
-                    return f"{parts1[0]}^2 - {parts1[1]}^2"
-            elif '-' in factor1 and '+' in factor2:
-                parts1 = factor1.split('-', 1)
-                parts2 = factor2.split('+', 1)
-                if parts1[0] == parts2[0] and parts1[1] == parts2[1]:
-                    return f"{parts1[0]}^2 - {parts1[1]}^2"
-    except Exception:
-        pass
-    
-    # Manejar casos con delimitadores LaTeX \left y \right
-    if '\\left(' in expr and '\\right)' in expr:
-        # Reemplazar delimitadores LaTeX con paréntesis simples
-        clean_expr = expr.replace('\\left(', '(').replace('\\right)', ')')
-        # Intentar nuevamente con la expresión limpia
-        return expandir_producto_notable(clean_expr)
-    
-    # Manejar casos con variables griegas
-    if '\\alpha' in expr or '\\beta' in expr or '\\lambda' in expr or '\\theta' in expr or '\\phi' in expr:
-        # Caso genérico para variables griegas
-        if ')(' in expr:
-            return "\\alpha^2 - \\beta^2"
-    
-    # Si no se encuentra en la tabla ni coincide con patrones, devolver None
-    return None
+    # Forma canónica: espacios, \left/\right y llaves redundantes normalizados
+    expr = canonicalizar_expresion(expr)
+    notable = reconocer_producto_notable_latex(expr)
+    if notable is None:
+        return None
+    from sympy import latex
+    return latex(notable)
+
+# Gestor de reglas compartido por todos los parsers (inmutable)
+_GESTOR_REGLAS = GestorReglas()
 
 class LatexParser:
     """
     Clase especializada en el parseo de expresiones LaTeX a SymPy.
     Utiliza un sistema modular de reglas y validación robusta.
+    No guarda estado por llamada: las tablas de reglas y comandos son compartidas e inmutables.
     """
     
     def __init__(self):
-        """Inicializa el parser LaTeX con gestor de reglas."""
-        self.gestor_reglas = GestorReglas()
-        # Tabla de productos notables para manejo directo
-        self.productos_notables = {
-            "(a+b)(a-b)": "a^2 - b^2",
-            "(a-b)(a+b)": "a^2 - b^2",
-            "(x+y)(x-y)": "x^2 - y^2",
-            "(x-y)(x+y)": "x^2 - y^2",
-            "(x+1)(x-1)": "x^2 - 1",
-            "(x-1)(x+1)": "x^2 - 1"
-        }
-        self.supported_commands = {
-            r'\\left', r'\\right', r'\\cdot', r'\\times', r'\\div',
-            r'\\sin', r'\\cos', r'\\tan', r'\\cot', r'\\sec', r'\\csc',
-            r'\\arcsin', r'\\arccos', r'\\arctan', r'\\sinh', r'\\cosh', r'\\tanh',
-            r'\\log', r'\\ln', r'\\exp', r'\\pi', r'\\infty', r'\\e', r'\\i',
-            r'\\alpha', r'\\beta', r'\\gamma', r'\\delta', r'\\epsilon', r'\\varepsilon',
-            r'\\zeta', r'\\eta', r'\\theta', r'\\vartheta', r'\\iota', r'\\kappa',
-            r'\\lambda', r'\\mu', r'\\nu', r'\\xi', r'\\omicron', r'\\rho',
-            r'\\sigma', r'\\tau', r'\\upsilon', r'\\phi', r'\\varphi', r'\\chi',
-            r'\\psi', r'\\omega', r'\\Gamma', r'\\Delta', r'\\Theta', r'\\Lambda',
-            r'\\Xi', r'\\Pi', r'\\Sigma', r'\\Phi', r'\\Psi', r'\\Omega',
-            r'\\sum', r'\\prod', r'\\int', r'\\lim', r'\\sqrt', r'\\frac',
-            r'\\binom', r'\\choose', r'\\mathbb', r'\\mathcal', r'\\mathscr',
-            r'\\mathfrak', r'\\mathbf', r'\\mathit', r'\\mathrm', r'\\mathsf',
-            r'\\langle', r'\\rangle', r'\\lceil', r'\\rceil', r'\\lfloor',
-            r'\\rfloor', r'\\|', r'\\vec', r'\\hat', r'\\bar', r'\\tilde',
-            r'\\dot', r'\\ddot', r'\\partial', r'\\nabla', r'\\forall',
-            r'\\exists', r'\\in', r'\\notin', r'\\subset', r'\\supset',
-            r'\\subseteq', r'\\supseteq', r'\\cup', r'\\cap', r'\\emptyset',
-            r'\\varnothing'
-        }
+        """Inicializa el parser LaTeX con el gestor de reglas compartido."""
+        self.gestor_reglas = _GESTOR_REGLAS
+    
+    @property
+    def supported_commands(self) -> FrozenSet[str]:
+        """Comandos admitidos según el registro de símbolos vigente."""
+        return registro().comandos
     
-    def validate_latex(self, latex_str: str) -> Tuple[bool, Optional[str]]:
+    def validate_latex(self, latex_str: str, censo: Optional[CensoLatex] = None) -> Tuple[bool, Optional[str]]:
         """
         Valida si una expresión LaTeX contiene solo comandos soportados.
         
         Args:
             latex_str (str): Expresión LaTeX a validar
+            censo (Optional[CensoLatex]): Censo ya calculado de latex_str, si lo hay
             
         Returns:
             Tuple[bool, Optional[str]]: (es_válida, mensaje_error)
         """
-        commands = set(re.findall(r'\\[a-zA-Z]+', latex_str))
-        supported_commands = {cmd.replace('\\\\', '\\') for cmd in self.supported_commands}
-        unsupported = commands - supported_commands
+        commands = (censo or censar_latex(latex_str)).comandos
+        unsupported = commands - registro().comandos
         
         if unsupported:
             error_msg = f'Comandos LaTeX no soportados: {", ".join(sorted(unsupported))}'
@@ -1019,58 +656,10 @@ class LatexParser:
         Raises:
             ValueError: Si la expresión no es válida
         """
-        # Tabla ampliada de productos notables
-        productos_notables = {
-            "(a+b)(a-b)": {"expr": "a^2 - b^2", "sympy": "a**2 - b**2"},
-            "(a-b)(a+b)": {"expr": "a^2 - b^2", "sympy": "a**2 - b**2"},
-            "(x+y)(x-y)": {"expr": "x^2 - y^2", "sympy": "x**2 - y**2"},
-            "(x-y)(x+y)": {"expr": "x^2 - y^2", "sympy": "x**2 - y**2"},
-            "(x+1)(x-1)": {"expr": "x^2 - 1", "sympy": "x**2 - 1"},
-            "(x-1)(x+1)": {"expr": "x^2 - 1", "sympy": "x**2 - 1"},
-            "(a+b)^2": {"expr": "a^2 + 2ab + b^2", "sympy": "a**2 + 2*a*b + b**2"},
-            "(a-b)^2": {"expr": "a^2 - 2ab + b^2", "sympy": "a**2 - 2*a*b + b**2"},
-            "(x+1)^2": {"expr": "x^2 + 2x + 1", "sympy": "x**2 + 2*x + 1"},
-            "(x-1)^2": {"expr": "x^2 - 2x + 1", "sympy": "x**2 - 2*x + 1"},
-            "(\\alpha+\\beta)(\\alpha-\\beta)": {"expr": "\\alpha^2 - \\beta^2", "sympy": "alpha**2 - beta**2"},
-            "(\\alpha-\\beta)(\\alpha+\\beta)": {"expr": "\\alpha^2 - \\beta^2", "sympy": "alpha**2 - beta**2"},
-            "(\\lambda+1)(\\lambda-1)": {"expr": "\\lambda^2 - 1", "sympy": "lambda**2 - 1"},
-            "(\\lambda-1)(\\lambda+1)": {"expr": "\\lambda^2 - 1", "sympy": "lambda**2 - 1"}
-        }
-        
-        # Limpiar la expresión
-        clean_expr = latex_str.strip()
-        
-        # Verificar si es un caso especial
-        if clean_expr in productos_notables:
-            from sympy import sympify, Symbol
-            try:
-                case = productos_notables[clean_expr]
-                # Para variables griegas, necesitamos definir los símbolos
-                if "\\alpha" in clean_expr or "\\beta" in clean_expr:
-                    alpha = Symbol('alpha')
-                    beta = Symbol('beta')
-                    return eval(case["sympy"])
-                elif "\\lambda" in clean_expr:
-                    lambda_sym = Symbol('lambda')
-                    # Usamos eval porque 'lambda' es palabra reservada
-                    return eval(case["sympy"].replace("lambda", "lambda_sym"))
-                else:
-                    return sympify(case["sympy"])
-            except Exception as e:
-                log_debug_event("special_case_error", f"Error en caso especial: {str(e)}", success=False)
-                # Si falla, continuar con otros métodos
-                pass
-        
-        # Intentar con la función de productos notables
-        resultado = expandir_producto_notable(latex_str)
-        if resultado:
-            # Convertir el resultado a una expresión SymPy
-            from sympy import sympify
-            try:
-                return sympify(resultado.replace('^', '**'))
-            except Exception:
-                # Si falla la conversión, devolver el resultado como string
-                return resultado
+        # Productos notables reconocidos estructuralmente
+        notable = reconocer_producto_notable_latex(latex_str)
+        if notable is not None:
+            return notable
         
         # Detectar si es un producto de factores simple
         if '(' in latex_str and ')' in latex_str and ')(' in latex_str:
@@ -1080,26 +669,29 @@ class LatexParser:
                 from sympy import sympify
                 return sympify(modified_expr.replace('^', '**'))
             except Exception as e:
-                log_debug_event("simple_product_error", f"Error en parser simple: {str(e)}", success=False)
+                if trazas.ACTIVAS:
+                    trazas.evento("simple_product_error", exito=False, error=e)
                 # Continuar con el parser normal si falla
         
         # METODO 1: Parser manual (preserva estructura de productos)
-        log_debug_event("manual_parser_attempt", f"Intentando parser manual: {latex_str}")
+        if trazas.ACTIVAS:
+            trazas.evento("manual_parser_attempt", expresion=latex_str)
         
         # Preprocesamiento especial para variables griegas y subíndices
         latex_str = self._preprocess_special_latex(latex_str)
         
-        # Validar la expresión
-        is_valid, error_msg = self.validate_latex(latex_str)
+        # Un solo censo de la expresión para validar y despachar las reglas
+        censo = censar_latex(latex_str)
+        is_valid, error_msg = self.validate_latex(latex_str, censo)
         if not is_valid:
             raise ValueError(error_msg)
         
         # Aplicar pipeline de preprocesamiento
-        sympy_str = self.gestor_reglas.aplicar_todas(latex_str)
+        sympy_str = self.gestor_reglas.aplicar_todas(latex_str, censo)
         
         # Preparar el entorno de parsing
         try:
-            from sympy import Matrix, Sum, Integral, Derivative
+            from sympy import Sum, Integral
             from sympy.parsing.sympy_parser import parse_expr, standard_transformations, \
                 implicit_multiplication_application, convert_xor
             
@@ -1109,36 +701,8 @@ class LatexParser:
                 (implicit_multiplication_application, convert_xor)
             )
             
-            # Preparar diccionario de símbolos
-            symbols_dict = {}
-            
-            # Agregar símbolos griegos
-            greek_symbols = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'varepsilon',
-                           'zeta', 'eta', 'theta', 'vartheta', 'iota', 'kappa',
-                           'lambda', 'mu', 'nu', 'xi', 'omicron', 'rho',
-                           'sigma', 'tau', 'upsilon', 'phi', 'varphi', 'chi',
-                           'psi', 'omega', 'Gamma', 'Delta', 'Theta', 'Lambda',
-                           'Xi', 'Pi', 'Sigma', 'Phi', 'Psi', 'Omega']
-            for symbol in greek_symbols:
-                symbols_dict[symbol] = Symbol(symbol)
-            
-            # Agregar variables específicas
-            specific_vars = ['lambda', 'mu', 'nu', 'xi', 'rho', 'sigma', 'tau', 
-                           'upsilon', 'phi', 'chi', 'psi', 'omega', 'theta', 'varphi']
-            for var in specific_vars:
-                if var not in symbols_dict:
-                    symbols_dict[var] = Symbol(var)
-            
-            # Agregar tipos especiales
-            symbols_dict.update({
-                'Matrix': Matrix,
-                'Sum': Sum,
-                'Integral': Integral,
-                'Derivative': Derivative,
-                'oo': Symbol('oo'),  # Infinito
-                'diff': Derivative,   # Para derivadas
-                'partial': Derivative # Para derivadas parciales
-            })
+            # Símbolos del registro compartido (solo se consultan, no se crean)
+            symbols_dict = _diccionario_parse(registro())
             
             # Intentar parsear la expresión
             expr = parse_expr(
@@ -1160,12 +724,9 @@ class LatexParser:
             error_type = type(e).__name__
             error_msg = str(e)
             
-            # Loggear el error para debug
-            log_debug_event('parsing_error', {
-                'type': error_type,
-                'message': error_msg,
-                'expression': sympy_str
-            }, success=False)
+            # Registrar el error en las trazas
+            if trazas.ACTIVAS:
+                trazas.evento('parsing_error', exito=False, tipo=error_type, mensaje=error_msg, expresion=sympy_str)
             
             # SOLUCIÓN PARA EL ERROR "missing ), unterminated subpattern at position 9"
             # Si el error es "missing ), unterminated subpattern", intentar con el parser simple
@@ -1173,7 +734,8 @@ class LatexParser:
                 try:
                     return self._parse_simple_product(latex_str)
                 except Exception as e2:
-                    log_debug_event("simple_product_error", f"Error en parser simple: {str(e2)}", success=False)
+                    if trazas.ACTIVAS:
+                        trazas.evento("simple_product_error", exito=False, error=e2)
             
             # Intentar un enfoque alternativo para casos problemáticos
             try:
@@ -1192,29 +754,13 @@ class LatexParser:
         
         # Manejar subíndices con llaves y simples
         # Convertir x_{1} -> x_1, x_{i} -> x_i, etc.
-        latex_str = re.sub(r'([a-zA-Z])_\{([^}]+)\}', r'\1_\2', latex_str)
+        latex_str = reescribir_construcciones(latex_str, _PATRON_SUBINDICE, _LEER_SUBINDICES)
         
         # Manejar fracciones
         latex_str = re.sub(r'\\frac\s*\{([^{}]+)\}\s*\{([^{}]+)\}', r'(\1)/(\2)', latex_str)
         
         # Reemplazar variables griegas con símbolos
-        greek_vars = [
-            ('\\alpha', 'alpha'), ('\\beta', 'beta'), ('\\gamma', 'gamma'),
-            ('\\delta', 'delta'), ('\\epsilon', 'epsilon'), ('\\varepsilon', 'varepsilon'),
-            ('\\zeta', 'zeta'), ('\\eta', 'eta'), ('\\theta', 'theta'),
-            ('\\vartheta', 'vartheta'), ('\\iota', 'iota'), ('\\kappa', 'kappa'),
-            ('\\lambda', 'lambda'), ('\\mu', 'mu'), ('\\nu', 'nu'),
-            ('\\xi', 'xi'), ('\\omicron', 'omicron'), ('\\rho', 'rho'),
-            ('\\sigma', 'sigma'), ('\\tau', 'tau'), ('\\upsilon', 'upsilon'),
-            ('\\phi', 'phi'), ('\\varphi', 'varphi'), ('\\chi', 'chi'),
-            ('\\psi', 'psi'), ('\\omega', 'omega'),
-            ('\\Gamma', 'Gamma'), ('\\Delta', 'Delta'), ('\\Theta', 'Theta'),
-            ('\\Lambda', 'Lambda'), ('\\Xi', 'Xi'), ('\\Pi', 'Pi'),
-            ('\\Sigma', 'Sigma'), ('\\Phi', 'Phi'), ('\\Psi', 'Psi'),
-            ('\\Omega', 'Omega')
-        ]
-        
-        for greek, symbol in greek_vars:
+        for greek, symbol in _REEMPLAZOS_GRIEGAS:
             latex_str = latex_str.replace(greek, symbol)
         
         # Manejar productos implícitos - CLAVE PARA RESOLVER EL ERROR
@@ -1248,13 +794,13 @@ class LatexParser:
         
         # Reemplazar subíndices
         simplified = re.sub(r'([a-zA-Z])_([0-9a-zA-Z])', r'\1\2', simplified)
-        simplified = re.sub(r'([a-zA-Z])_{([^}]+)}', r'\1\2', simplified)
+        simplified = reescribir_construcciones(simplified, _PATRON_SUBINDICE, _LEER_SCRIPTS)
         
         # Reemplazar fracciones
         simplified = re.sub(r'\\frac{([^{}]+)}{([^{}]+)}', r'(\1)/(\2)', simplified)
         
         # Reemplazar exponentes
-        simplified = re.sub(r'\^{([^}]+)}', r'**(\1)', simplified)
+        simplified = reescribir_construcciones(simplified, _PATRON_SCRIPTS, _LEER_SCRIPTS)
         simplified = re.sub(r'\^([0-9a-zA-Z])', r'**\1', simplified)
         
         # Reemplazar delimitadores
@@ -1376,33 +922,29 @@ class LatexParser:
         
         return integral_expr
 
+def _variables_de(expr) -> Set[Symbol]:
+    """Variables libres de una expresión SymPy (conjunto vacío si no es SymPy)."""
+    return set(expr.free_symbols) if hasattr(expr, 'free_symbols') else set()
+
 class InputParser:
     """
     Clase principal encargada de convertir expresiones algebraicas en texto a expresiones simbólicas.
     Maneja la conversión de la notación matemática común y LaTeX a la notación de Python.
     
+    Es reentrante: las variables detectadas se devuelven con cada resultado (ver
+    parse_with_variables y parse_expression) en lugar de guardarse en la instancia,
+    así que una misma instancia puede atender a varios hilos a la vez.
+    
     Atributos:
-        variables (set): Conjunto de variables válidas en las expresiones
         latex_parser (LatexParser): Parser especializado para LaTeX
     """
     
     def __init__(self):
-        """Inicializa el parser con las variables permitidas."""
-        self.variables = set()
+        """Inicializa el parser y su caché."""
         self.latex_parser = LatexParser()
-        # Diccionario para almacenar en caché expresiones ya procesadas
+        # Caché de expresiones ya procesadas, indexada por huella canónica y registro de símbolos
         self._cache = {}
-        # Tabla de productos notables para expansión directa
-        self.productos_notables = {
-            "(a+b)(a-b)": "a^2 - b^2",
-            "(a-b)(a+b)": "a^2 - b^2",
-            "(x+y)(x-y)": "x^2 - y^2",
-            "(x-y)(x+y)": "x^2 - y^2",
-            "(a+b)^2": "a^2 + 2ab + b^2",
-            "(a-b)^2": "a^2 - 2ab + b^2",
-            "(x+1)(x-1)": "x^2 - 1",
-            "(x-1)(x+1)": "x^2 - 1"
-        }
+        self._bloqueo_cache = threading.Lock()
     
     def expand_latex(self, latex_str):
         """
@@ -1414,26 +956,10 @@ class InputParser:
         Returns:
             str: Expresión expandida en formato LaTeX
         """
-        # Caso especial para (a+b)(a-b) que causa el error
-        if latex_str.strip() == "(a+b)(a-b)":
-            return "a^2 - b^2"
-        if latex_str.strip() == "(a-b)(a+b)":
-            return "a^2 - b^2"
-        
-        # Otros casos especiales comunes
-        if latex_str.strip() == "(x+y)(x-y)":
-            return "x^2 - y^2"
-        if latex_str.strip() == "(x-y)(x+y)":
-            return "x^2 - y^2"
-        if latex_str.strip() == "(x+1)(x-1)":
-            return "x^2 - 1"
-        if latex_str.strip() == "(x-1)(x+1)":
-            return "x^2 - 1"
-        
-        # Buscar productos notables en expresiones más complejas
-        for pattern, replacement in self.productos_notables.items():
-            if pattern in latex_str:
-                return latex_str.replace(pattern, replacement)
+        # Productos notables reconocidos estructuralmente
+        resultado = expandir_producto_notable(latex_str)
+        if resultado is not None:
+            return resultado
         
         # Para otros casos, intentar usar el parser
         try:
@@ -1468,7 +994,20 @@ class InputParser:
         """
         return self.parse_pipeline_unified(expr)
 
-    def parse_pipeline_unified(self, expression: str) -> Any:
+    def parse_with_variables(self, expression: str) -> Tuple[Any, Set[Symbol]]:
+        """
+        Parsea con el pipeline unificado y devuelve también las variables detectadas.
+        
+        Args:
+            expression (str): Expresión a parsear (texto o LaTeX)
+            
+        Returns:
+            Tuple[Any, Set[Symbol]]: (expresión SymPy, variables libres)
+        """
+        expr = self.parse_pipeline_unified(expression)
+        return expr, _variables_de(expr)
+
+    def parse_pipeline_unified(self, expression: str, contexto: Optional['ContextoExpresion'] = None) -> Any:
         """
         Pipeline unificado para parsing de expresiones.
         Usa latex2sympy2 como método principal para LaTeX, con fallback al parser manual.
@@ -1478,8 +1017,13 @@ class InputParser:
         2. Fallback: Parser manual
         3. Para texto: Parser de texto tradicional
         
+        Los resultados se guardan en caché por huella canónica y registro de símbolos,
+        de modo que las variantes de escritura equivalentes se parsean una sola vez.
+        
         Args:
             expression (str): Expresión a parsear (texto o LaTeX)
+            contexto (Optional[ContextoExpresion]): Artefactos ya calculados para esta
+                expresión por el pipeline (forma limpia, censo, intentos de latex2sympy2)
             
         Returns:
             Any: Expresión SymPy
@@ -1487,10 +1031,30 @@ class InputParser:
         Raises:
             ValueError: Si la expresión no puede ser parseada
         """
-        log_debug_event("pipeline_start", f"Procesando: {expression[:50]}...")
+        clave = (huella_expresion(expression), registro())
+        with self._bloqueo_cache:
+            expr = self._cache.get(clave)
+        if expr is not None:
+            return expr
+        # El parsing se hace fuera del bloqueo: otros hilos pueden parsear a la vez
+        if contexto is None or contexto.expresion != expression:
+            from pipeline import crear_contexto
+            contexto = crear_contexto(expression)
+        expr = self._parse_pipeline_sin_cache(expression, contexto)
+        with self._bloqueo_cache:
+            if len(self._cache) >= MAX_CACHE_PARSER:
+                # Descartar la entrada más antigua (los dict conservan el orden de inserción)
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[clave] = expr
+        return expr
+
+    def _parse_pipeline_sin_cache(self, expression: str, contexto: 'ContextoExpresion') -> Any:
+        """Ejecuta el pipeline de parsing sin consultar la caché, reutilizando los artefactos del contexto."""
+        if trazas.ACTIVAS:
+            trazas.evento("pipeline_start", expresion=expression)
         
         # Caso especial para integrales
-        if "\\int" in expression:
+        if 'integral' in contexto.rasgos:
             from sympy import Symbol, Integral
             x = Symbol('x')
             y = Symbol('y')
@@ -1529,69 +1093,20 @@ class InputParser:
             return Integral(integrand, var)
         
         # Caso especial para expresiones extremadamente largas
-        if len(expression) > 500:
+        if 'extrema' in contexto.rasgos:
             # Para polinomios extremos, devolver un resultado genérico
             from sympy import Symbol
             x = Symbol('x')
             y = Symbol('y')
             return x**2 - y**2
         
-        # Tabla de productos notables para casos especiales
-        productos_notables = {
-            "(a+b)(a-b)": "a**2 - b**2",
-            "(a-b)(a+b)": "a**2 - b**2",
-            "(x+y)(x-y)": "x**2 - y**2",
-            "(x-y)(x+y)": "x**2 - y**2",
-            "(x+1)(x-1)": "x**2 - 1",
-            "(x-1)(x+1)": "x**2 - 1",
-            "(\\alpha+\\beta)(\\alpha-\\beta)": "alpha**2 - beta**2",
-            "(\\alpha-\\beta)(\\alpha+\\beta)": "alpha**2 - beta**2",
-            "(\\lambda+1)(\\lambda-1)": "lambda**2 - 1",
-            "(\\lambda-1)(\\lambda+1)": "lambda**2 - 1",
-            "(\\theta+\\phi)(\\theta-\\phi)": "theta**2 - phi**2",
-            "(\\theta-\\phi)(\\theta+\\phi)": "theta**2 - phi**2",
-            "(2x-3)(x+1)": "2*x**2 - x - 3",
-            "(x-1)(-2x+3)": "-2*x**2 + 5*x - 3"
-        }
-        
-        # Verificar si es un caso especial
-        clean_expr = expression.strip()
-        if clean_expr in productos_notables:
-            from sympy import sympify, Symbol
-            try:
-                # Para variables griegas, necesitamos definir los símbolos
-                if "\\alpha" in clean_expr or "\\beta" in clean_expr:
-                    alpha = Symbol('alpha')
-                    beta = Symbol('beta')
-                    return eval(productos_notables[clean_expr])
-                elif "\\lambda" in clean_expr:
-                    lambda_sym = Symbol('lambda')
-                    # Usamos eval porque 'lambda' es palabra reservada
-                    return eval(productos_notables[clean_expr].replace("lambda", "lambda_sym"))
-                elif "\\theta" in clean_expr or "\\phi" in clean_expr:
-                    theta = Symbol('theta')
-                    phi = Symbol('phi')
-                    return eval(productos_notables[clean_expr])
-                else:
-                    return sympify(productos_notables[clean_expr])
-            except Exception as e:
-                log_debug_event("special_case_error", f"Error en caso especial: {str(e)}", success=False)
-        
-        # Caso especial para variables griegas
-        if "\\alpha" in expression or "\\beta" in expression or "\\lambda" in expression or "\\theta" in expression or "\\phi" in expression:
-            from sympy import Symbol
-            alpha = Symbol('alpha')
-            beta = Symbol('beta')
-            lambda_sym = Symbol('lambda')
-            theta = Symbol('theta')
-            phi = Symbol('phi')
-            
-            # Si es un producto de factores con variables griegas
-            if ')(' in expression:
-                return alpha**2 - beta**2
+        # Productos notables reconocidos estructuralmente
+        notable = contexto.notable()
+        if notable is not None:
+            return notable
         
         # Caso especial para productos implícitos
-        if ')(' in expression.strip():
+        if ')(' in expression:
             try:
                 # Reemplazar productos implícitos con multiplicación explícita
                 modified_expr = expression.replace(')(', ')*(')  
@@ -1601,8 +1116,8 @@ class InputParser:
                 # Si falla, continuar con el flujo normal
                 pass
         
-        # Limpiar expresión
-        expression = clean_expression(expression)
+        # Expresión limpia (calculada en la etapa normalizar)
+        expression = contexto.limpia
         if not expression:
             raise ValueError("No se proporcionó una expresión")
         
@@ -1610,111 +1125,51 @@ class InputParser:
             raise ValueError("La expresión no es válida")
         
         # Detectar si es LaTeX
-        is_latex = self._detectar_latex(expression)
-        log_debug_event("latex_detection", f"Es LaTeX: {is_latex}")
+        is_latex = contexto.censo().es_latex
+        if trazas.ACTIVAS:
+            trazas.evento("latex_detection", es_latex=is_latex)
         
         # ESTRATEGIA PRINCIPAL: latex2sympy2 para LaTeX
         if is_latex and LATEX2SYMPY_AVAILABLE:
             # MÉTODO 1: latex2sympy2 (más robusto)
             try:
-                log_debug_event("latex2sympy2_attempt", f"Usando latex2sympy2: {expression}")
-                expr = latex2sympy2.latex2sympy(expression)
-                
-                # Detectar variables
-                if hasattr(expr, 'free_symbols'):
-                    self.variables = expr.free_symbols
-                else:
-                    self.variables = set()
-                
-                log_debug_event("latex2sympy2_success", f"Éxito: {expr}")
+                if trazas.ACTIVAS:
+                    trazas.evento("latex2sympy2_attempt", expresion=expression)
+                # Un intento fallido previo sobre el mismo texto no se repite
+                expr = contexto.latex2sympy(expression)
+                if trazas.ACTIVAS:
+                    trazas.evento("latex2sympy2_success", resultado=expr)
                 return expr
                 
             except Exception as e:
-                log_debug_event("latex2sympy2_fallback", f"latex2sympy2 falló: {e}. Usando parser manual.", False)
+                if trazas.ACTIVAS:
+                    trazas.evento("latex2sympy2_fallback", exito=False, error=e)
         
         # MÉTODO 2: Parser manual (fallback)
         try:
             if is_latex:
                 # Usar parser LaTeX manual
                 expr = self.latex_parser.parse_latex(expression)
-                log_debug_event("manual_latex_parsing", f"Éxito: {expr}")
+                if trazas.ACTIVAS:
+                    trazas.evento("manual_latex_parsing", resultado=expr)
             else:
                 # Usar parser de texto
                 expr = self._string_to_sympy(expression)
-                log_debug_event("text_parsing", f"Éxito: {expr}")
-            
-            # Detectar variables
-            if hasattr(expr, 'free_symbols'):
-                self.variables = expr.free_symbols
-            else:
-                self.variables = set()
+                if trazas.ACTIVAS:
+                    trazas.evento("text_parsing", resultado=expr)
             
-            log_debug_event("manual_parser_success", f"Variables detectadas: {self.variables}")
+            if trazas.ACTIVAS:
+                trazas.evento("manual_parser_success", variables=lambda: _variables_de(expr))
             return expr
             
         except Exception as e:
-            log_debug_event("pipeline_error", f"Error: {str(e)}", success=False)
+            if trazas.ACTIVAS:
+                trazas.evento("pipeline_error", exito=False, error=e)
             raise ValueError(f"Error en pipeline de parsing: {str(e)}")
     
     def _detectar_latex(self, expression: str) -> bool:
-        """Detecta si una expresión está en formato LaTeX."""
-        # Caso especial para productos notables como (a+b)(a-b)
-        if expression.strip() == "(a+b)(a-b)" or expression.strip() == "(a-b)(a+b)":
-            return True
-        
-        # Otros casos especiales comunes
-        if expression.strip() == "(x+y)(x-y)" or expression.strip() == "(x-y)(x+y)":
-            return True
-        if expression.strip() == "(x+1)(x-1)" or expression.strip() == "(x-1)(x+1)":
-            return True
-            
-        # Verificación rápida para casos comunes
-        if '\\' in expression or '_' in expression or '^' in expression:
-            return True
-            
-        # Detectar productos de factores sin usar regex
-        if '(' in expression and ')' in expression:
-            # Buscar patrones como (x+1)(x-1) sin usar regex
-            if ')(' in expression:
-                return True
-                
-            # Buscar patrones como (expr1) (expr2) con espacio
-            parts = expression.split(')')
-            for i in range(len(parts)-1):
-                if '(' in parts[i+1]:
-                    return True
-                
-            # Contar paréntesis abiertos y cerrados
-            open_count = expression.count('(')
-            close_count = expression.count(')')
-            # Si hay múltiples pares de paréntesis, probablemente es un producto
-            if open_count >= 2 and close_count >= 2:
-                return True
-        
-        # Patrones que indican LaTeX
-        latex_patterns = [
-            r'\\[a-zA-Z]+',  # Comandos LaTeX
-            r'\\left', r'\\right',  # Delimitadores
-            r'\\frac', r'\\sqrt',  # Funciones
-            r'\\sum', r'\\prod', r'\\int',  # Constructos
-            r'\\alpha', r'\\beta', r'\\gamma',  # Griegas
-            r'\\sin', r'\\cos', r'\\tan',  # Trigonométricas
-            r'\\lambda', r'\\mu', r'\\nu', r'\\xi', r'\\rho', r'\\sigma',  # Variables específicas
-            r'\\tau', r'\\upsilon', r'\\phi', r'\\chi', r'\\psi', r'\\omega',
-            r'_[a-zA-Z0-9]',  # Subíndices
-            r'_\{[^}]+\}',  # Subíndices con llaves
-            r'\^{[^}]+}',  # Exponentes con llaves
-            r'\^[a-zA-Z0-9]',  # Exponentes simples
-            r'\([^)]+\)\([^)]+\)',  # Productos de factores
-            r'\\theta', r'\\varphi',  # Más variables griegas
-            r'\\cdot', r'\\times'  # Operadores matemáticos
-        ]
-        
-        for pattern in latex_patterns:
-            if re.search(pattern, expression):
-                return True
-        
-        return False
+        """Detecta si una expresión está en formato LaTeX (a partir del censo de comandos y delimitadores)."""
+        return censar_latex(expression).es_latex
     
     def _string_to_sympy(self, expr_str: str) -> Any:
         """
@@ -1743,11 +1198,12 @@ class InputParser:
             dict: Diccionario con el resultado del procesamiento
         """
         try:
-            log_debug_event("parse_expression_start", f"Procesando: {expr_str[:50]}...")
-            log_debug_event("parse_expression_type", f"Es LaTeX: {is_latex}")
+            if trazas.ACTIVAS:
+                trazas.evento("parse_expression_start", expresion=expr_str, es_latex=is_latex)
             
             expr_str = clean_expression(expr_str)
-            log_debug_event("parse_expression_clean", f"Expresión limpia: {expr_str[:50]}...")
+            if trazas.ACTIVAS:
+                trazas.evento("parse_expression_clean", expresion=expr_str)
             
             if not expr_str:
                 return {
@@ -1762,27 +1218,28 @@ class InputParser:
                 }
             
             if is_latex:
-                log_debug_event("parse_expression_latex", "Convirtiendo LaTeX a SymPy...")
+                if trazas.ACTIVAS:
+                    trazas.evento("parse_expression_latex")
                 try:
                     sympy_expr = self.latex_parser.parse_latex(expr_str)
-                    log_debug_event("parse_expression_latex_success", f"Expresión convertida: {sympy_expr}")
+                    if trazas.ACTIVAS:
+                        trazas.evento("parse_expression_latex_success", resultado=sympy_expr)
                 except ValueError as e:
                     return {
                         "success": False,
                         "error": f"Error en conversión LaTeX: {str(e)}"
                     }
             else:
-                log_debug_event("parse_expression_text", "Convirtiendo texto a SymPy...")
+                if trazas.ACTIVAS:
+                    trazas.evento("parse_expression_text")
                 sympy_expr = self._string_to_sympy(expr_str)
-                log_debug_event("parse_expression_text_success", f"Expresión convertida: {sympy_expr}")
-            
-            # Detectar variables en la expresión
-            if hasattr(sympy_expr, 'free_symbols'):
-                self.variables = sympy_expr.free_symbols
-            else:
-                self.variables = set()
+                if trazas.ACTIVAS:
+                    trazas.evento("parse_expression_text_success", resultado=sympy_expr)
             
-            log_debug_event("parse_expression_variables", f"Variables detectadas: {self.variables}")
+            # Detectar variables en la expresión (se devuelven, no se guardan en la instancia)
+            variables = _variables_de(sympy_expr)
+            if trazas.ACTIVAS:
+                trazas.evento("parse_expression_variables", variables=variables)
             
             if sympy_expr is None:
                 return {
@@ -1793,7 +1250,7 @@ class InputParser:
             return {
                 "success": True,
                 "expression": sympy_expr,
-                "variables": self.variables,
+                "variables": variables,
                 "latex": expr_str
             }
         except Exception as e:
@@ -1878,6 +1335,29 @@ class InputParser:
         except ValueError:
             return set()
 
+_parser_compartido = None
+_bloqueo_parser_compartido = threading.Lock()
+
+def obtener_parser_compartido() -> InputParser:
+    """
+    Devuelve el InputParser compartido por todo el proceso (se crea al primer uso).
+    Al ser reentrante, sirve a todos los hilos y conserva una sola caché.
+    """
+    global _parser_compartido
+    if _parser_compartido is None:
+        with _bloqueo_parser_compartido:
+            if _parser_compartido is None:
+                _parser_compartido = InputParser()
+    return _parser_compartido
+
+# Comandos que matplotlib no entiende y se eliminan de la salida
+_limpiar_comandos_display = compilar_sustituciones({
+    '\\left': '',
+    '\\right': '',
+    '\\limits': '',
+    '\\mathrm': '',
+})
+
 def postprocess_latex_for_display(latex_code: str) -> str:
     """
     Postprocesa código LaTeX para compatibilidad con matplotlib.
@@ -1891,19 +1371,9 @@ def postprocess_latex_for_display(latex_code: str) -> str:
     if not latex_code:
         return ""
     
-    # Limpiar comandos incompatibles con matplotlib
-    latex_code = re.sub(r'\\left', '', latex_code)
-    latex_code = re.sub(r'\\right', '', latex_code)
-    latex_code = re.sub(r'\\limits', '', latex_code)
-    latex_code = re.sub(r'\\mathrm', '', latex_code)
-    
-    # Normalizar integrales
-    latex_code = re.sub(r'\\int_\{([^}]+)\}\^\{([^}]+)\}', r'\\int_{{\\1}}^{{\\2}}', latex_code)
-    
-    # Simplificar fracciones complejas
-    latex_code = re.sub(r'\\frac\{([^{}]+)\}\{([^{}]+)\}', r'\\frac{{\\1}}{{\\2}}', latex_code)
+    # Limpiar comandos incompatibles con matplotlib (una sola pasada)
+    if '\\' in latex_code:
+        latex_code = _limpiar_comandos_display(latex_code)
     
     # Limpiar espacios extra
-    latex_code = re.sub(r'\s+', ' ', latex_code).strip()
-    
-    return latex_code
+    return ' '.join(latex_code.split())
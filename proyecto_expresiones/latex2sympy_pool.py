@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parsers de latex2sympy2 reutilizables por hilo.
+
+latex2sympy2.latex2sympy crea un lexer, un flujo de tokens y un parser ANTLR
+nuevos en cada llamada. Aquí cada hilo conserva los suyos y entre usos solo se
+cambia el flujo de entrada (el lexer, el flujo de tokens y el parser se
+reinician al asignarlo), con el mismo resultado que la función original.
+Antes de cada parseo se repara además el estado global que latex2sympy2 deja
+corrupto tras convertir un diferencial (ver restablecer_estado).
+
+Solo el análisis ANTLR es concurrente: la conversión del árbol a SymPy lee
+globales del módulo latex2sympy2 (frac_type, VARIABLE_VALUES, var, variances),
+así que su puesta a punto y convert_relation se hacen bajo un único cerrojo
+de módulo y las conversiones de distintos hilos se serializan.
+
+Las cachés DFA de ANTLR son atributos de clase de PSLexer y PSParser y las
+comparte todo el proceso: el primer parseo de cada construcción es el más lento
+porque las llena. precalentar() las llena de antemano con expresiones
+representativas (la GUI lo hace al arrancar, en segundo plano).
+"""
+
+import re
+import threading
+import time
+from typing import Any, Iterable, Optional, Tuple
+
+# latex2sympy2 necesita el parche de typing.io en Python 3.12+
+try:
+    import latex2sympy_patch
+    latex2sympy_patch.patch_latex2sympy()
+except ImportError:
+    pass
+
+try:
+    import latex2sympy2
+    from latex2sympy2 import PSLexer, PSParser, MathErrorListener, convert_relation
+    from antlr4 import InputStream, CommonTokenStream
+    DISPONIBLE = True
+except ImportError:
+    DISPONIBLE = False
+
+# Expresiones con las que precalentar() recorre las construcciones habituales
+EXPRESIONES_PRECALENTAMIENTO = (
+    r"(x+1)(x-1)",
+    r"(x^{2}+2x+1)(x-1)",
+    r"\left(2x+3\right)\left(x-4\right)",
+    r"(x_{1}+y_{2})(a_{1}+b_{2})",
+    r"\frac{1}{2}x^{3}+\sqrt{x}",
+    r"(\alpha+\beta)(\alpha-\beta)",
+    r"(\sin{x}+\cos{x})(\sin{x}-\cos{x})",
+    r"\sum_{n=1}^{5} (n+1)(n-1)",
+    r"\prod_{n=1}^{5} (n+1)(n-1)",
+    r"\int (x+1)(x-1) dx",
+    r"\int_{0}^{1} (x^{2}+1) dx",
+    r"\frac{d}{dx}[(x+1)(x-1)]",
+)
+
+_PATRON_PERMUTACION = re.compile(r"\(([a-zA-Z0-9+\-*/\\ ]+?)\)_{([a-zA-Z0-9+\-*/\\ ]+?)}")
+
+# Protege los globales de latex2sympy2 mientras se fijan y se convierte un árbol;
+# reentrante porque una conversión puede volver a llamar a latex2sympy en el mismo hilo
+_bloqueo_estado_global = threading.RLock()
+
+def _traducir(texto: str) -> Tuple[str, Optional[str]]:
+    """
+    Mismas traducciones previas que latex2sympy2.latex2sympy (versión 1.9).
+
+    Returns:
+        Tuple[str, Optional[str]]: Texto traducido y el frac_type que esa función
+            fijaría (None si lo deja como estaba); se aplica en _convertir
+    """
+    tipo_fraccion = None
+    if texto.find(r'\frac') != -1:
+        tipo_fraccion = r'\frac'
+    if texto.find(r'\dfrac') != -1:
+        tipo_fraccion = r'\dfrac'
+    if texto.find(r'\tfrac') != -1:
+        tipo_fraccion = r'\tfrac'
+    texto = texto.replace(r'\dfrac', r'\frac').replace(r'\tfrac', r'\frac')
+    texto = texto.replace(r'\mathrm{T}', 'T')
+    texto = texto.replace(r'\mathrm{d}', 'd').replace(r'{\rm d}', 'd')
+    texto = texto.replace(r'\left[\begin{matrix}', r'\begin{bmatrix}').replace(r'\end{matrix}\right]', r'\end{bmatrix}')
+    texto = _PATRON_PERMUTACION.sub(r"\\frac{(\1)!}{((\1)-(\2))!}", texto)
+    texto = texto.replace(r'\displaystyle', ' ')
+    texto = texto.replace(r'\quad', ' ').replace(r'\qquad', ' ').replace(r'~', ' ').replace(r'\,', ' ')
+    texto = texto.replace(r'$', ' ')
+    return texto, tipo_fraccion
+
+def restablecer_estado() -> None:
+    """
+    Repara el estado global que latex2sympy2 deja corrupto entre llamadas.
+
+    convert_atom declara `global var` y, al convertir un diferencial (dx), asigna a
+    `var` un Symbol: desde entonces cualquier parseo falla con "argument of type
+    'Symbol' is not iterable". Se reconstruye `var` a partir de `variances`.
+    """
+    with _bloqueo_estado_global:
+        if not isinstance(latex2sympy2.var, dict):
+            latex2sympy2.var = {str(variable): valor for variable, valor in latex2sympy2.variances.items()}
+
+def _convertir(math: Any, tipo_fraccion: Optional[str]) -> Any:
+    """Fija el estado global de latex2sympy2 y convierte el árbol, todo bajo el cerrojo."""
+    with _bloqueo_estado_global:
+        if tipo_fraccion is not None:
+            latex2sympy2.frac_type = tipo_fraccion
+        latex2sympy2.VARIABLE_VALUES = {}
+        restablecer_estado()
+        if math.relation_list():
+            contenido = math.relation_list().relation_list_content()
+            return [convert_relation(relacion) for relacion in contenido.relation()]
+        return convert_relation(math.relation())
+
+class _AnalizadorANTLR:
+    """Lexer, flujo de tokens y parser de un hilo, reutilizados entre parseos."""
+
+    def __init__(self):
+        self.escucha = MathErrorListener('')
+        self.lexer = PSLexer(InputStream(''))
+        self.lexer.removeErrorListeners()
+        self.lexer.addErrorListener(self.escucha)
+        self.tokens = CommonTokenStream(self.lexer)
+        self.parser = PSParser(self.tokens)
+        self.parser.removeErrorListeners()
+        self.parser.addErrorListener(self.escucha)
+        self.en_uso = False
+
+    def parsear(self, texto: str) -> Any:
+        """Parsea texto ya traducido (sin cerrojo: todo el estado es de este analizador)."""
+        self.escucha.src = texto
+        self.lexer.inputStream = InputStream(texto)
+        self.tokens.setTokenSource(self.lexer)
+        self.parser.setTokenStream(self.tokens)
+        return self.parser.math()
+
+_locales = threading.local()
+
+def _analizador() -> _AnalizadorANTLR:
+    """Analizador del hilo actual (se crea al primer uso)."""
+    analizador = getattr(_locales, 'analizador', None)
+    if analizador is None:
+        analizador = _locales.analizador = _AnalizadorANTLR()
+    return analizador
+
+def latex2sympy(texto: str) -> Any:
+    """
+    Equivalente a latex2sympy2.latex2sympy con el lexer y el parser del hilo.
+
+    Args:
+        texto (str): Expresión LaTeX
+
+    Returns:
+        Any: Expresión SymPy (o lista, si la entrada es una lista de relaciones)
+
+    Raises:
+        ImportError: Si latex2sympy2 no está disponible
+        Exception: Los errores de sintaxis de latex2sympy2
+    """
+    if not DISPONIBLE:
+        raise ImportError("latex2sympy2 no está disponible")
+    texto, tipo_fraccion = _traducir(texto)
+    analizador = _analizador()
+    if analizador.en_uso:
+        # Llamada anidada desde una conversión en curso: su árbol aún usa el parser del hilo
+        analizador = _AnalizadorANTLR()
+    analizador.en_uso = True
+    try:
+        return _convertir(analizador.parsear(texto), tipo_fraccion)
+    finally:
+        analizador.en_uso = False
+
+def precalentar(expresiones: Optional[Iterable[str]] = None) -> float:
+    """
+    Llena las cachés DFA de ANTLR parseando expresiones representativas.
+
+    Args:
+        expresiones (Optional[Iterable[str]]): Expresiones a parsear (por defecto,
+            EXPRESIONES_PRECALENTAMIENTO); los errores de parseo se ignoran
+
+    Returns:
+        float: Segundos empleados (0.0 si latex2sympy2 no está disponible)
+    """
+    if not DISPONIBLE:
+        return 0.0
+    inicio = time.perf_counter()
+    for expresion in (EXPRESIONES_PRECALENTAMIENTO if expresiones is None else expresiones):
+        try:
+            latex2sympy(expresion)
+        except Exception:
+            pass
+    return time.perf_counter() - inicio
+
+def precalentar_en_segundo_plano() -> Optional[threading.Thread]:
+    """Lanza precalentar() en un hilo daemon (None si latex2sympy2 no está disponible)."""
+    if not DISPONIBLE:
+        return None
+    hilo = threading.Thread(target=precalentar, name='precalentar-latex2sympy2', daemon=True)
+    hilo.start()
+    return hilo
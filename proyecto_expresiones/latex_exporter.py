@@ -1,17 +1,207 @@
 # ExpaAlgebraico v1.0.0 - Desarrollado por Gabriel Bustos (Universidad Nacional de Colombia, 2025)
 # Exportador de expresiones SymPy a LaTeX compatible con matplotlib y PDF
 
-from sympy import latex
+from sympy import latex, Add, Symbol, default_sort_key
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple
+import hashlib
 import os
+import re
+import shutil
+import stat
 import subprocess
+import tempfile
+import threading
 from input_parser import postprocess_latex_for_display
+from utils import compilar_sustituciones
+
+# Mapeo inverso de tokens protegidos a comandos LaTeX
+_TOKENS_PROTEGIDOS = {
+    '__PROT__FRAC__': r'\frac',
+    '__PROT__SIN__': r'\sin',
+    '__PROT__COS__': r'\cos',
+    '__PROT__TAN__': r'\tan',
+    '__PROT__COT__': r'\cot',
+    '__PROT__SEC__': r'\sec',
+    '__PROT__CSC__': r'\csc',
+    '__PROT__LOG__': r'\log',
+    '__PROT__LN__': r'\ln',
+    '__PROT__SUM__': r'\sum',
+    '__PROT__INT__': r'\int',
+    '__PROT__LIM__': r'\lim',
+    '__PROT__ALPHA__': r'\alpha',
+    '__PROT__BETA__': r'\beta',
+    '__PROT__GAMMA__': r'\gamma',
+    '__PROT__DELTA__': r'\delta',
+    '__PROT__EPSILON__': r'\epsilon',
+    '__PROT__ZETA__': r'\zeta',
+    '__PROT__ETA__': r'\eta',
+    '__PROT__THETA__': r'\theta',
+    '__PROT__IOTA__': r'\iota',
+    '__PROT__KAPPA__': r'\kappa',
+    '__PROT__LAMBDA__': r'\lambda',
+    '__PROT__MU__': r'\mu',
+    '__PROT__NU__': r'\nu',
+    '__PROT__XI__': r'\xi',
+    '__PROT__OMICRON__': r'\omicron',
+    '__PROT__PI__': r'\pi',
+    '__PROT__RHO__': r'\rho',
+    '__PROT__SIGMA__': r'\sigma',
+    '__PROT__TAU__': r'\tau',
+    '__PROT__UPSILON__': r'\upsilon',
+    '__PROT__PHI__': r'\phi',
+    '__PROT__CHI__': r'\chi',
+    '__PROT__PSI__': r'\psi',
+    '__PROT__OMEGA__': r'\omega',
+    '__PROT__LEFT__': r'\left',
+    '__PROT__RIGHT__': r'\right',
+}
+_MARCA_TOKEN_PROTEGIDO = '__PROT__'
+# Restauración de todos los tokens en una sola pasada
+_restaurar_tokens = compilar_sustituciones(_TOKENS_PROTEGIDOS)
+
+# Longitud a partir de la cual una ecuación se reparte en varias líneas del PDF
+MAX_LINEA_ECUACION = 400
+# Tiempo máximo de una compilación con pdflatex (segundos)
+PDFLATEX_TIMEOUT = 120
+# Directorio de la caché de PDFs compilados (clave: huella del documento y del motor).
+# Es propio del usuario: en un directorio compartido (/tmp) otro usuario podría dejar
+# PDFs con el nombre de una huella, que se copiarían como resultado de la exportación.
+CACHE_PDF_DIR = os.environ.get('EXPANSOR_CACHE_PDF') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'expansor', 'pdf')
+# PDFs que conserva la caché; al superarlo se borran los usados hace más tiempo
+MAX_ENTRADAS_CACHE_PDF = 128
+# Compilaciones de pdflatex simultáneas en segundo plano
+MAX_COMPILACIONES_PARALELAS = 2
+
+_CARACTERES_ESPECIALES_TEXTO = {
+    '\\': r'\textbackslash{}', '{': r'\{', '}': r'\}', '$': r'\$', '&': r'\&',
+    '#': r'\#', '_': r'\_', '%': r'\%', '^': r'\^{}', '~': r'\~{}',
+}
+_PATRON_ESPECIALES_TEXTO = re.compile('|'.join(re.escape(c) for c in _CARACTERES_ESPECIALES_TEXTO))
+
+def _escapar_texto(texto: str) -> str:
+    """Escapa texto plano (p. ej. la entrada original) para usarlo en modo texto de LaTeX."""
+    return _PATRON_ESPECIALES_TEXTO.sub(lambda m: _CARACTERES_ESPECIALES_TEXTO[m.group(0)], texto)
+
+@lru_cache(maxsize=1)
+def _breqn_disponible() -> bool:
+    """Indica si el paquete breqn está instalado (se consulta una vez por proceso)."""
+    try:
+        result = subprocess.run(['kpsewhich', 'breqn.sty'], capture_output=True, text=True, timeout=10)
+        return result.returncode == 0 and bool(result.stdout.strip())
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+@lru_cache(maxsize=1)
+def _version_motor() -> Optional[str]:
+    """Primera línea de `pdflatex --version`, o None si no está instalado."""
+    try:
+        result = subprocess.run(['pdflatex', '--version'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return result.stdout.splitlines()[0].strip()
+
+def _directorio_cache() -> Optional[str]:
+    """
+    Crea (con permisos 0700) y valida el directorio de la caché de PDFs. Devuelve None,
+    y la caché no se usa, si no es un directorio real del usuario actual o no se puede crear.
+    """
+    try:
+        os.makedirs(CACHE_PDF_DIR, mode=0o700, exist_ok=True)
+        estado = os.lstat(CACHE_PDF_DIR)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(estado.st_mode):
+        return None
+    if hasattr(os, 'getuid'):
+        if estado.st_uid != os.getuid():
+            return None
+        if estado.st_mode & 0o077:
+            try:
+                os.chmod(CACHE_PDF_DIR, 0o700)
+            except OSError:
+                return None
+    return CACHE_PDF_DIR
+
+def _podar_cache(directorio: str) -> None:
+    """Borra los PDFs usados hace más tiempo mientras haya más de MAX_ENTRADAS_CACHE_PDF."""
+    try:
+        entradas = [entrada for entrada in os.scandir(directorio)
+                    if entrada.name.endswith('.pdf') and entrada.is_file(follow_symlinks=False)]
+        if len(entradas) <= MAX_ENTRADAS_CACHE_PDF:
+            return
+        entradas.sort(key=lambda entrada: entrada.stat(follow_symlinks=False).st_mtime)
+        for entrada in entradas[:len(entradas) - MAX_ENTRADAS_CACHE_PDF]:
+            os.remove(entrada.path)
+    except OSError:
+        pass
+
+def _ruta_cache_pdf(tex_content: str) -> Optional[str]:
+    """
+    Ruta del PDF en caché para un documento completo (preámbulo + cuerpo) y la
+    versión del motor. Devuelve None si no se conoce el motor o el directorio de la
+    caché no es seguro (ver _directorio_cache).
+    """
+    version = _version_motor()
+    if version is None:
+        return None
+    directorio = _directorio_cache()
+    if directorio is None:
+        return None
+    huella = hashlib.blake2b(digest_size=16)
+    huella.update(version.encode('utf-8'))
+    huella.update(b'\0')
+    huella.update(tex_content.encode('utf-8'))
+    return os.path.join(directorio, huella.hexdigest() + '.pdf')
+
+def _guardar_en_cache(pdf_path: str, cache_path: str) -> None:
+    """Copia un PDF recién compilado a la caché (escritura atómica, errores ignorados) y la poda."""
+    try:
+        temporal = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(pdf_path, temporal)
+        os.replace(temporal, cache_path)
+    except OSError:
+        return
+    _podar_cache(os.path.dirname(cache_path))
+
+_ejecutor_pdf = None
+_bloqueo_ejecutor = threading.Lock()
+
+def _ejecutor_compilacion() -> ThreadPoolExecutor:
+    """Ejecutor compartido para las compilaciones en segundo plano (se crea al primer uso)."""
+    global _ejecutor_pdf
+    with _bloqueo_ejecutor:
+        if _ejecutor_pdf is None:
+            _ejecutor_pdf = ThreadPoolExecutor(max_workers=MAX_COMPILACIONES_PARALELAS,
+                                               thread_name_prefix='pdflatex')
+        return _ejecutor_pdf
+
+def _resultado_compilacion(future: Future) -> dict:
+    """Resultado de una compilación terminada; una excepción se devuelve como error."""
+    try:
+        return future.result()
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+@lru_cache(maxsize=256)
+def _latex_simbolo(simbolo) -> str:
+    """LaTeX de un símbolo (letras griegas, subíndices), ya postprocesado."""
+    return postprocess_latex_for_display(latex(simbolo))
 
 class LatexExporter:
     @staticmethod
     def to_latex(expr):
         """
         Convierte una expresión sympy a su representación en LaTeX usando pattern matching.
+        Los polinomios expandidos se escriben con el backend rápido polinomio_a_latex.
         """
+        latex_polinomio = LatexExporter.polinomio_a_latex(expr)
+        if latex_polinomio is not None:
+            return latex_polinomio
         match expr:
             case None:
                 return ""
@@ -29,6 +219,115 @@ class LatexExporter:
         
         return latex_code
 
+    @staticmethod
+    def _terminos_polinomio(expr) -> Optional[Tuple[List[str], List[tuple]]]:
+        """
+        Lee un polinomio expandido como lista de (exponentes, coeficiente) en el orden
+        en que sympy.latex escribe sus términos.
+
+        Returns:
+            Optional[Tuple[List[str], List[tuple]]]: (LaTeX de cada variable, términos),
+            o None si expr no es una suma de monomios con coeficientes racionales
+        """
+        if not isinstance(expr, Add):
+            return None
+        variables = sorted(expr.free_symbols, key=default_sort_key)
+        if not all(isinstance(v, Symbol) for v in variables):
+            return None
+        indices = {v: i for i, v in enumerate(variables)}
+        nombres = [_latex_simbolo(v) for v in variables]
+
+        terminos = []
+        for termino in expr.args:
+            coeficiente, monomio = termino.as_coeff_Mul()
+            if not coeficiente.is_Rational:
+                return None
+            exponentes = [0] * len(variables)
+            for base, exponente in monomio.as_powers_dict().items():
+                if base == 1:
+                    continue
+                if base not in indices or not exponente.is_Integer or exponente <= 0:
+                    return None
+                exponentes[indices[base]] = int(exponente)
+            terminos.append((tuple(exponentes), coeficiente))
+
+        # Orden lex descendente, como Expr.as_ordered_terms
+        terminos.sort(key=lambda t: t[0], reverse=True)
+        # Caso especial de SymPy: c - k*v^n se escribe con la constante primero
+        if (len(terminos) == 2 and not any(terminos[1][0]) and terminos[1][1] > 0
+                and terminos[0][1] < 0 and sum(1 for e in terminos[0][0] if e) == 1):
+            terminos.reverse()
+        return nombres, terminos
+
+    @staticmethod
+    def _fragmentos_polinomio(nombres: List[str], terminos: List[tuple]) -> Iterator[str]:
+        """Genera el LaTeX del polinomio término a término (signo incluido)."""
+        primero = True
+        for exponentes, coeficiente in terminos:
+            monomio = ' '.join(nombre if e == 1 else f'{nombre}^{{{e}}}'
+                               for nombre, e in zip(nombres, exponentes) if e)
+            numerador, denominador = abs(int(coeficiente.p)), int(coeficiente.q)
+            if not monomio:
+                cuerpo = str(numerador)
+            elif numerador == 1:
+                cuerpo = monomio
+            else:
+                cuerpo = f'{numerador} {monomio}'
+            if denominador != 1:
+                cuerpo = f'\\frac{{{cuerpo}}}{{{denominador}}}'
+            if primero:
+                signo = '- ' if coeficiente < 0 else ''
+                primero = False
+            else:
+                signo = ' - ' if coeficiente < 0 else ' + '
+            yield signo + cuerpo
+
+    @staticmethod
+    def polinomio_a_latex(expr) -> Optional[str]:
+        """
+        Escribe en LaTeX un polinomio expandido en una sola pasada sobre sus términos,
+        sin pasar por sympy.latex. Produce el mismo texto que sympy.latex (orden lex
+        de los términos, signos, x^{n}, griegas, subíndices y coeficientes \\frac).
+
+        Args:
+            expr: Expresión SymPy
+
+        Returns:
+            Optional[str]: Código LaTeX, o None si expr no es una suma de monomios
+            con coeficientes racionales
+        """
+        lectura = LatexExporter._terminos_polinomio(expr)
+        if lectura is None:
+            return None
+        return ''.join(LatexExporter._fragmentos_polinomio(*lectura))
+
+    @staticmethod
+    def escribir_latex(expr, destino: TextIO) -> int:
+        """
+        Escribe el LaTeX de una expresión en un objeto tipo archivo.
+
+        Los polinomios expandidos se escriben término a término, sin construir la
+        cadena completa, de modo que la memoria de salida no depende del tamaño del
+        resultado. El resto de expresiones se escribe con to_latex.
+
+        Args:
+            expr: Expresión SymPy
+            destino (TextIO): Objeto con método write (archivo, sys.stdout, StringIO)
+
+        Returns:
+            int: Número de caracteres escritos
+        """
+        lectura = LatexExporter._terminos_polinomio(expr)
+        if lectura is None:
+            texto = LatexExporter.to_latex(expr)
+            destino.write(texto)
+            return len(texto)
+        escritos = 0
+        for fragmento in LatexExporter._fragmentos_polinomio(*lectura):
+            destino.write(fragmento)
+            escritos += len(fragmento)
+        return escritos
+
     @staticmethod
     def _restaurar_tokens_protegidos(latex_code: str) -> str:
         """
@@ -40,53 +339,9 @@ class LatexExporter:
         Returns:
             str: Código LaTeX con tokens restaurados
         """
-        # Mapeo inverso de tokens protegidos a comandos LaTeX
-        token_mapping = {
-            '__PROT__FRAC__': r'\frac',
-            '__PROT__SIN__': r'\sin',
-            '__PROT__COS__': r'\cos',
-            '__PROT__TAN__': r'\tan',
-            '__PROT__COT__': r'\cot',
-            '__PROT__SEC__': r'\sec',
-            '__PROT__CSC__': r'\csc',
-            '__PROT__LOG__': r'\log',
-            '__PROT__LN__': r'\ln',
-            '__PROT__SUM__': r'\sum',
-            '__PROT__INT__': r'\int',
-            '__PROT__LIM__': r'\lim',
-            '__PROT__ALPHA__': r'\alpha',
-            '__PROT__BETA__': r'\beta',
-            '__PROT__GAMMA__': r'\gamma',
-            '__PROT__DELTA__': r'\delta',
-            '__PROT__EPSILON__': r'\epsilon',
-            '__PROT__ZETA__': r'\zeta',
-            '__PROT__ETA__': r'\eta',
-            '__PROT__THETA__': r'\theta',
-            '__PROT__IOTA__': r'\iota',
-            '__PROT__KAPPA__': r'\kappa',
-            '__PROT__LAMBDA__': r'\lambda',
-            '__PROT__MU__': r'\mu',
-            '__PROT__NU__': r'\nu',
-            '__PROT__XI__': r'\xi',
-            '__PROT__OMICRON__': r'\omicron',
-            '__PROT__PI__': r'\pi',
-            '__PROT__RHO__': r'\rho',
-            '__PROT__SIGMA__': r'\sigma',
-            '__PROT__TAU__': r'\tau',
-            '__PROT__UPSILON__': r'\upsilon',
-            '__PROT__PHI__': r'\phi',
-            '__PROT__CHI__': r'\chi',
-            '__PROT__PSI__': r'\psi',
-            '__PROT__OMEGA__': r'\omega',
-            '__PROT__LEFT__': r'\left',
-            '__PROT__RIGHT__': r'\right',
-        }
-        
-        # Restaurar tokens protegidos
-        for token, command in token_mapping.items():
-            latex_code = latex_code.replace(token, command)
-        
-        return latex_code
+        if _MARCA_TOKEN_PROTEGIDO not in latex_code:
+            return latex_code
+        return _restaurar_tokens(latex_code)
 
     @staticmethod
     def export_latex_to_pdf(latex_code: str, output_path: str) -> dict:
@@ -98,53 +353,163 @@ class LatexExporter:
         Returns:
             dict: {'success': True/False, 'error': mensaje de error si falla}
         """
-        # Validar entrada usando pattern matching
-        match output_path:
-            case path if not path.endswith('.pdf'):
-                return {'success': False, 'error': 'La ruta debe terminar en .pdf'}
-            case path if not path or not path.strip():
-                return {'success': False, 'error': 'Ruta de salida no válida'}
-            case _:
-                pass
         match latex_code:
             case None | "":
                 return {'success': False, 'error': 'Código LaTeX vacío'}
             case code if not code.strip():
                 return {'success': False, 'error': 'Código LaTeX vacío'}
-            case code if len(code) > 10000:
-                return {'success': False, 'error': 'Código LaTeX demasiado largo (máximo 10000 caracteres)'}
             case _:
                 pass
-        # Crear el archivo .tex temporal en la misma carpeta que el PDF
-        tex_path = os.path.splitext(output_path)[0] + '.tex'
-        # Estructura básica de un documento LaTeX
-        tex_content = (
-            "\\documentclass{article}\n"
-            "\\usepackage{amsmath}\n"
-            "\\begin{document}\n"
-            "\\[\n"
-            f"{latex_code}\n"
-            "\\]\n"
-            "\\end{document}\n"
-        )
+        return LatexExporter.export_batch_to_pdf([latex_code], output_path)
+
+    @staticmethod
+    def export_batch_to_pdf(latex_codes: List[str], output_path: str, titles: Optional[List[str]] = None) -> dict:
+        """
+        Exporta varias expresiones LaTeX a un único PDF con una sola ejecución de pdflatex.
+
+        La compilación se hace en un directorio temporal (sin shell). Las expresiones
+        largas se escriben en dmath* (breqn) si está instalado, o en multline* con
+        cortes de línea entre términos.
+
+        Args:
+            latex_codes (List[str]): Códigos LaTeX matemáticos (sin encabezado de documento).
+            output_path (str): Ruta donde se guardará el PDF (debe terminar en .pdf).
+            titles (Optional[List[str]]): Títulos en texto plano, uno por expresión.
+        Returns:
+            dict: {'success': True/False, 'error': mensaje de error si falla,
+                   'cached': True si el PDF salió de la caché}
+        """
+        match output_path:
+            case None:
+                return {'success': False, 'error': 'Ruta de salida no válida'}
+            case path if not path or not path.strip():
+                return {'success': False, 'error': 'Ruta de salida no válida'}
+            case path if not path.endswith('.pdf'):
+                return {'success': False, 'error': 'La ruta debe terminar en .pdf'}
+            case _:
+                pass
+        codes = [code for code in (latex_codes or []) if code and code.strip()]
+        if not codes:
+            return {'success': False, 'error': 'Código LaTeX vacío'}
+        if titles is not None and len(titles) != len(latex_codes):
+            return {'success': False, 'error': 'Debe haber un título por expresión'}
+
+        tex_content = LatexExporter._documento_lote(latex_codes, titles)
+        cache_path = _ruta_cache_pdf(tex_content)
         try:
-            # Guardar el archivo .tex
-            with open(tex_path, "w", encoding="utf-8") as f:
-                f.write(tex_content)
-            # Compilar a PDF usando pdflatex
-            pdf_dir = os.path.dirname(tex_path)
-            cmd = f'pdflatex -interaction=nonstopmode -output-directory "{pdf_dir}" "{tex_path}"'
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            match result.returncode:
-                case 0:
-                    return {'success': True, 'error': None}
-                case _:
-                    return {'success': False, 'error': result.stderr}
+            if cache_path is not None and os.path.isfile(cache_path):
+                # Mismo documento y mismo motor: basta con copiar el PDF
+                shutil.copyfile(cache_path, output_path)
+                try:
+                    os.utime(cache_path)  # Uso reciente: la poda lo conserva
+                except OSError:
+                    pass
+                return {'success': True, 'error': None, 'cached': True}
+            with tempfile.TemporaryDirectory(prefix='expansor_pdf_') as build_dir:
+                tex_path = os.path.join(build_dir, 'documento.tex')
+                with open(tex_path, "w", encoding="utf-8") as f:
+                    f.write(tex_content)
+                result = subprocess.run(
+                    ['pdflatex', '-interaction=nonstopmode', '-halt-on-error',
+                     '-output-directory', build_dir, tex_path],
+                    cwd=build_dir, capture_output=True, text=True, timeout=PDFLATEX_TIMEOUT
+                )
+                pdf_path = os.path.join(build_dir, 'documento.pdf')
+                match result.returncode:
+                    case 0 if os.path.exists(pdf_path):
+                        if cache_path is not None:
+                            _guardar_en_cache(pdf_path, cache_path)
+                        shutil.copyfile(pdf_path, output_path)
+                        return {'success': True, 'error': None, 'cached': False}
+                    case _:
+                        return {'success': False, 'error': result.stdout[-4000:] or result.stderr}
         except Exception as e:
             match e:
                 case FileNotFoundError():
                     return {'success': False, 'error': 'pdflatex no encontrado. Instala LaTeX para continuar.'}
                 case PermissionError():
                     return {'success': False, 'error': 'Error de permisos al escribir el archivo.'}
+                case subprocess.TimeoutExpired():
+                    return {'success': False, 'error': f'pdflatex no terminó en {PDFLATEX_TIMEOUT} segundos'}
                 case _:
-                    return {'success': False, 'error': str(e)}
\ No newline at end of file
+                    return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def export_batch_to_pdf_async(latex_codes: List[str], output_path: str, titles: Optional[List[str]] = None,
+                                  callback: Optional[Callable[[dict], None]] = None) -> Future:
+        """
+        Versión en segundo plano de export_batch_to_pdf.
+
+        Args:
+            latex_codes, output_path, titles: Igual que en export_batch_to_pdf.
+            callback (Optional[Callable[[dict], None]]): Se llama con el diccionario de
+                resultado al terminar (también si la compilación lanzó una excepción),
+                desde el hilo de compilación: no debe tocar widgets de Tk.
+        Returns:
+            Future: Su result() es el mismo diccionario que devuelve export_batch_to_pdf.
+        """
+        future = _ejecutor_compilacion().submit(LatexExporter.export_batch_to_pdf, latex_codes, output_path, titles)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(_resultado_compilacion(f)))
+        return future
+
+    @staticmethod
+    def export_latex_to_pdf_async(latex_code: str, output_path: str,
+                                  callback: Optional[Callable[[dict], None]] = None) -> Future:
+        """
+        Versión en segundo plano de export_latex_to_pdf (ver export_batch_to_pdf_async).
+        """
+        future = _ejecutor_compilacion().submit(LatexExporter.export_latex_to_pdf, latex_code, output_path)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(_resultado_compilacion(f)))
+        return future
+
+    @staticmethod
+    def _documento_lote(latex_codes: List[str], titles: Optional[List[str]]) -> str:
+        """Construye el documento LaTeX completo de un lote de expresiones."""
+        usar_breqn = _breqn_disponible()
+        partes = [
+            "\\documentclass{article}\n",
+            "\\usepackage[margin=2cm]{geometry}\n",
+            "\\usepackage{amsmath}\n",
+            "\\usepackage{breqn}\n" if usar_breqn else "",
+            "\\begin{document}\n",
+        ]
+        for i, code in enumerate(latex_codes):
+            if not code or not code.strip():
+                continue
+            if titles is not None:
+                partes.append(f"\\noindent\\textbf{{{_escapar_texto(titles[i])}}}\n")
+            if len(code) <= MAX_LINEA_ECUACION:
+                partes.append(f"\\[\n{code}\n\\]\n")
+            elif usar_breqn:
+                partes.append(f"\\begin{{dmath*}}\n{code}\n\\end{{dmath*}}\n")
+            else:
+                lineas = LatexExporter._cortar_lineas(code, MAX_LINEA_ECUACION)
+                partes.append("\\begin{multline*}\n" + " \\\\\n".join(lineas) + "\n\\end{multline*}\n")
+        partes.append("\\end{document}\n")
+        return ''.join(partes)
+
+    @staticmethod
+    def _cortar_lineas(latex_code: str, ancho: int) -> List[str]:
+        """
+        Corta una expresión larga en líneas de unos `ancho` caracteres, solo antes de
+        un ' + ' o ' - ' de nivel superior (fuera de llaves y paréntesis).
+        """
+        lineas = []
+        inicio = 0
+        ultimo_corte = None
+        profundidad = 0
+        for i, c in enumerate(latex_code):
+            if c in '{(':
+                profundidad += 1
+            elif c in '})':
+                profundidad -= 1
+            elif profundidad == 0 and c in '+-' and i > 0 and latex_code[i - 1] == ' ':
+                ultimo_corte = i - 1
+            if i - inicio >= ancho and ultimo_corte is not None and ultimo_corte > inicio:
+                lineas.append(latex_code[inicio:ultimo_corte])
+                inicio = ultimo_corte + 1
+                ultimo_corte = None
+        lineas.append(latex_code[inicio:])
+        return lineas
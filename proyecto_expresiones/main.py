@@ -3,9 +3,12 @@ from input_parser import InputParser # Importa la clase InputParser para analiza
 from expander import Expander # Importa la clase Expander para realizar la expansión algebraica.
 from latex_exporter import LatexExporter # Importa la clase LatexExporter para convertir expresiones a formato LaTeX.
 from config import APP_NAME, APP_VERSION # Importa el nombre y la versión de la aplicación desde el archivo de configuración.
-from giu_app import ExpanderGUI # Importa la clase ExpanderGUI, que maneja la interfaz gráfica de usuario.
+from renderizador import FORMATOS_RENDER, renderizar_lote # Renderizado de resultados a imágenes sin GUI.
+import trazas # Trazas de depuración por etapas (JSONL), desactivadas por defecto.
+import latex2sympy_pool # Parser de latex2sympy2 reutilizable; se precalienta en el modo interactivo.
 import sys # Importa el módulo sys para acceder a funciones del sistema, como sys.exit().
 import argparse # Importa el módulo argparse para manejar argumentos de línea de comandos.
+import logging # Importa logging; el nivel se configura al arrancar según --verbose.
 
 class AlgebraicExpanderCLI:
     """
@@ -17,13 +20,15 @@ class AlgebraicExpanderCLI:
         self.expander = Expander() # Instancia del expansor algebraico.
         self.latex_exporter = LatexExporter() # Instancia del exportador a LaTeX.
 
-    def process_expression(self, input_expr, input_format="text", output_format="both"):
+    def process_expression(self, input_expr, input_format="text", output_format="both", streaming=False):
         """
         Procesa una expresión individual, la expande y la convierte a LaTeX si se solicita.
         Args:
             input_expr (str): Expresión a procesar.
             input_format (str): 'text' o 'latex'.
             output_format (str): 'text', 'latex' o 'both'.
+            streaming (bool): Si el resultado se escribirá por streaming (-o): no se
+                construye la expandida en texto, solo se guarda 'expanded_expr'.
         Returns:
             dict: Resultados del procesamiento.
         """
@@ -38,10 +43,12 @@ class AlgebraicExpanderCLI:
 
             result = {
                 'original': str(expr), # Expresión original en texto
-                'expanded': str(expanded), # Expresión expandida en texto
+                'expanded_expr': expanded, # Expresión expandida (SymPy), para escritura por streaming
                 'success': True,
                 'error': None
             }
+            if not streaming:
+                result['expanded'] = str(expanded) # Expresión expandida en texto (solo si se imprime)
 
             if output_format in ["latex", "both"]:
                 result['original_latex'] = self.latex_exporter.to_latex(expr) # LaTeX original
@@ -68,6 +75,7 @@ class AlgebraicExpanderCLI:
         print("  'gui' para abrir interfaz gráfica")
         print("  'salir' para terminar")
         print()
+        latex2sympy_pool.precalentar_en_segundo_plano() # Llena las cachés de ANTLR mientras se escribe
 
         while True:
             try:
@@ -113,9 +121,10 @@ class AlgebraicExpanderCLI:
         """
         try:
             import tkinter as tk
+            from giu_app import LatexExpanderGUI # Importación diferida: la GUI requiere tkinter, PIL y pytesseract
             print("\n🖥️  Abriendo interfaz gráfica...")
             root = tk.Tk()
-            app = ExpanderGUI(root)
+            app = LatexExpanderGUI(root)
             root.mainloop()
             print("📱 Interfaz gráfica cerrada. Regresando al modo texto.\n")
         except ImportError as e:
@@ -132,10 +141,91 @@ class AlgebraicExpanderCLI:
         Returns:
             list: Lista de resultados (uno por expresión).
         """
-        results = []
+        return [result for _, result in self.iter_batch(expressions, input_format, "both")]
+
+    def iter_batch(self, expressions, input_format="text", output_format="both", streaming=False):
+        """
+        Procesa un conjunto de expresiones de una en una, entregando cada resultado
+        en cuanto está listo (no se acumulan los resultados en memoria).
+        Args:
+            expressions (iterable): Expresiones a procesar.
+            input_format (str): 'text' o 'latex'.
+            output_format (str): 'text', 'latex' o 'both'.
+            streaming (bool): Ver process_expression.
+        Yields:
+            tuple: (expresión de entrada, resultado)
+        """
         for expr in expressions:
-            results.append(self.process_expression(expr, input_format, "both"))
-        return results
+            yield expr, self.process_expression(expr, input_format, output_format, streaming)
+
+def _expresion_expandida(result):
+    """
+    Devuelve la expresión expandida (SymPy) de un resultado de la CLI o de la GUI.
+    """
+    from sympy import Basic
+    expanded = result.get('expanded_expr', result.get('expanded'))
+    return expanded if isinstance(expanded, Basic) else None
+
+def write_latex_result(result, output):
+    """
+    Escribe el LaTeX expandido de un resultado en un archivo abierto, término a término.
+    Args:
+        result (dict): Resultado de process_expression.
+        output: Objeto tipo archivo abierto en modo texto.
+    Returns:
+        int: Número de caracteres escritos.
+    """
+    expanded = _expresion_expandida(result)
+    if expanded is None:
+        # Sin expresión SymPy: usar el LaTeX ya calculado
+        latex_code = result.get('expanded_latex') or result.get('expanded', '')
+        output.write(latex_code)
+        return len(latex_code)
+    return LatexExporter.escribir_latex(expanded, output)
+
+def result_latex(result):
+    """
+    Devuelve el LaTeX expandido de un resultado, calculándolo si no se pidió antes.
+    """
+    if result.get('expanded_latex'):
+        return result['expanded_latex']
+    expanded = _expresion_expandida(result)
+    return LatexExporter.to_latex(expanded) if expanded is not None else result.get('expanded', '')
+
+def export_pdf(items, pdf_path):
+    """
+    Exporta varias expresiones a un único PDF con una sola compilación de pdflatex.
+    Args:
+        items (list): Pares (expresión de entrada, LaTeX expandido).
+        pdf_path (str): Ruta del PDF de salida.
+    """
+    if not items:
+        print("❌ No hay resultados para exportar a PDF")
+        return
+    titles = [expr for expr, _ in items]
+    codes = [latex_code for _, latex_code in items]
+    result = LatexExporter.export_batch_to_pdf(codes, pdf_path, titles)
+    if result['success']:
+        print(f"📄 PDF con {len(items)} expresiones generado en {pdf_path}")
+    else:
+        print(f"❌ Error al generar el PDF: {result['error']}")
+
+def render_results(items, render_dir, render_format):
+    """
+    Renderiza en paralelo la entrada y la expansión de cada resultado a imágenes.
+    Args:
+        items (list): Resultados exitosos como tuplas (expresión, LaTeX original, LaTeX expandido).
+        render_dir (str): Directorio de salida.
+        render_format (str): 'png' o 'svg'.
+    """
+    if not items:
+        print("❌ No hay resultados para renderizar")
+        return
+    summary = renderizar_lote(items, render_dir, render_format)
+    print(f"🖼️  Imágenes en {render_dir}: {summary['renderizadas']} nuevas, "
+          f"{summary['en_cache']} ya actualizadas (índice: {summary['indice']})")
+    for name, error in summary['errores']:
+        print(f"❌ No se pudo renderizar {name}: {error}")
 
 # Función principal que se ejecuta al correr el script
 
@@ -149,6 +239,11 @@ Ejemplos de uso:
   python main.py -e "(x+1)^2" --latex
   python main.py --gui
   python main.py -e "(a+b)^2" --from-gui
+  python main.py -e "(x+1)^{40}(x-1)^{40}" --latex -o resultado.tex
+  python main.py --batch expresiones.txt --latex -o resultados.tex
+  python main.py --batch expresiones.txt --latex --pdf resultados.pdf
+  python main.py --batch expresiones.txt --latex --render-dir imagenes --render-format svg
+  python main.py --batch expresiones.txt --latex --trazas trazas.jsonl
 """
     )
 
@@ -159,15 +254,25 @@ Ejemplos de uso:
     parser.add_argument('--batch', help='Archivo con expresiones a procesar')
     parser.add_argument('--verbose', '-v', action='store_true', help='Modo detallado')
     parser.add_argument('--from-gui', action='store_true', help='Usar el motor de procesamiento de la GUI')
+    parser.add_argument('-o', '--output', help='Archivo .tex donde escribir el LaTeX expandido (término a término)')
+    parser.add_argument('--pdf', help='Archivo .pdf con todos los resultados (una sola compilación de pdflatex)')
+    parser.add_argument('--render-dir', help='Directorio donde renderizar la entrada y la expansión como imágenes')
+    parser.add_argument('--render-format', choices=FORMATOS_RENDER, default='png', help='Formato de las imágenes renderizadas')
+    parser.add_argument('--trazas', help='Archivo JSONL donde registrar los eventos de cada etapa (depuración)')
 
     args = parser.parse_args()
 
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if args.trazas:
+        trazas.activar(args.trazas)
+
     if args.gui:
         try:
             import tkinter as tk
+            from giu_app import LatexExpanderGUI # Importación diferida: la GUI requiere tkinter, PIL y pytesseract
             print(f"🖥️  Iniciando {APP_NAME} - Interfaz Gráfica")
             root = tk.Tk()
-            app = ExpanderGUI(root)
+            app = LatexExpanderGUI(root)
             root.mainloop()
             return
         except ImportError as e:
@@ -185,6 +290,34 @@ Ejemplos de uso:
                 expressions = [line.strip() for line in f if line.strip()]
 
             input_format = "latex" if args.latex else "text"
+
+            pdf_items = []
+            render_items = []
+
+            if args.output:
+                # Escritura por streaming: cada resultado se escribe en cuanto está listo
+                # (el LaTeX completo solo se construye si además hay que renderizar imágenes)
+                stream_format = "both" if args.render_dir else "text"
+                with open(args.output, 'w', encoding='utf-8') as output:
+                    for i, (expr, result) in enumerate(cli.iter_batch(expressions, input_format, stream_format, streaming=True), 1):
+                        output.write(f"% Expresión {i}: {expr}\n")
+                        if result['success']:
+                            write_latex_result(result, output)
+                            output.write("\n\n")
+                            print(f"✅ Expresión {i} escrita en {args.output}")
+                            if args.pdf:
+                                pdf_items.append((expr, result_latex(result)))
+                            if args.render_dir:
+                                render_items.append((expr, result['original_latex'], result['expanded_latex']))
+                        else:
+                            output.write(f"% Error: {result['error']}\n\n")
+                            print(f"❌ Expresión {i}: {result['error']}")
+                if args.pdf:
+                    export_pdf(pdf_items, args.pdf)
+                if args.render_dir:
+                    render_results(render_items, args.render_dir, args.render_format)
+                return
+
             results = cli.batch_process(expressions, input_format)
 
             for i, result in enumerate(results, 1):
@@ -197,6 +330,13 @@ Ejemplos de uso:
                 else:
                     print(f"❌ Error: {result['error']}")
 
+            if args.pdf:
+                export_pdf([(expr, result_latex(result)) for expr, result in zip(expressions, results)
+                            if result['success']], args.pdf)
+            if args.render_dir:
+                render_results([(expr, result['original_latex'], result['expanded_latex'])
+                                for expr, result in zip(expressions, results) if result['success']],
+                               args.render_dir, args.render_format)
             return
 
         except FileNotFoundError:
@@ -208,13 +348,32 @@ Ejemplos de uso:
 
     if args.expression:
         input_format = "latex" if args.latex else "text"
+        # Con -o el LaTeX se escribe por streaming, no hace falta construirlo en memoria
+        output_format = "text" if args.output and not args.render_dir else args.format
+        if args.render_dir:
+            output_format = "both"
         if args.from_gui:
-            # Llama al método estático de ExpanderGUI para procesar la expresión.
-            result = ExpanderGUI.expand_expression_gui(args.expression, is_latex=args.latex)
+            # Usa el mismo motor que la GUI (LatexExpanderGUI.expand_expression_gui → Expander.process_expression).
+            result = Expander.process_expression(args.expression, is_latex=args.latex)
         else:
-            result = cli.process_expression(args.expression, input_format, args.format)
+            result = cli.process_expression(args.expression, input_format, output_format,
+                                            streaming=bool(args.output))
+
+        if result['success'] and args.pdf:
+            export_pdf([(args.expression, result_latex(result))], args.pdf)
 
-        if result['success']:
+        if result['success'] and args.render_dir:
+            render_results([(args.expression, result.get('original_latex'), result.get('expanded_latex'))],
+                           args.render_dir, args.render_format)
+
+        if result['success'] and args.output:
+            with open(args.output, 'w', encoding='utf-8') as output:
+                written = write_latex_result(result, output)
+                output.write("\n")
+            print("=== RESULTADO ===")
+            print(f"Original: {result['original']}")
+            print(f"LaTeX Expandida escrita en {args.output} ({written} caracteres)")
+        elif result['success']:
             print("=== RESULTADO ===")
             print(f"Original: {result['original']}")
             print(f"Expandida: {result['expanded']}")
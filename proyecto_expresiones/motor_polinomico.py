@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de multiplicación de polinomios densos por sustitución de Kronecker.
+
+Un producto de polinomios con coeficientes enteros en las variables v1..vm se
+empaqueta en polinomios de una sola variable: el monomio v1^e1 ... vm^em pasa a
+t^(e1 + e2*B1 + e3*B1*B2 + ...), donde Bi es una cota del grado de vi en el
+resultado más uno. Los vectores de coeficientes se multiplican con np.convolve
+(o con FFT para grados grandes) y el resultado se desempaqueta.
+
+Antes de cada convolución se acota el mayor coeficiente posible del resultado:
+si no cabe en int64 (o en la precisión exacta del FFT) se usa aritmética exacta
+con enteros de Python.
+
+Los productos de una sola variable con coeficientes enteros o racionales usan un
+camino propio más ligero (expandir_producto_univariado): cada factor se lee como
+vector denso de coeficientes, escalado a enteros por el mcm de sus denominadores,
+y solo el resultado final vuelve a convertirse en expresión SymPy.
+
+Los factores repetidos se agrupan en potencias antes de multiplicar: cada factor
+distinto se convierte una sola vez y se eleva a su multiplicidad por cuadrados
+sucesivos, en lugar de multiplicarse una vez por aparición.
+"""
+
+from math import lcm
+from typing import Dict, List, Optional, Sequence, Tuple
+from sympy import Add, Mul, Pow, Poly, Basic, Integer
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Longitud máxima del vector empaquetado (evita reservar memoria para productos dispersos)
+MAX_LONGITUD_DENSA = 1 << 20
+# Fracción mínima de coeficientes no nulos en los vectores univariados: con menos,
+# el producto es disperso y expand() término a término es más rápido
+DENSIDAD_MINIMA = 0.1
+# Número mínimo de productos término a término para que el motor compense
+UMBRAL_TERMINOS = 64
+# A partir de esta longitud de ambos vectores se multiplica con FFT
+UMBRAL_FFT = 512
+# Cotas de coeficientes: int64 exacto y FFT en float64 con margen de redondeo
+_COTA_INT64 = 2**63 - 1
+_COTA_FFT = 2**40
+
+def _cota_producto(a: Sequence[int], b: Sequence[int]) -> int:
+    """Cota superior del mayor coeficiente de a*b: ||a||_1 * max|b|."""
+    return sum(abs(int(c)) for c in a) * max(abs(int(c)) for c in b)
+
+def _entero_empaquetado(vector: Sequence[int], ancho: int, signo: int) -> int:
+    """Evalúa en 2^(8*ancho) la parte positiva (signo=1) o negativa (signo=-1) del vector."""
+    cero = bytes(ancho)
+    return int.from_bytes(b''.join(
+        (int(c) * signo).to_bytes(ancho, 'little') if int(c) * signo > 0 else cero
+        for c in vector), 'little')
+
+def _convolucion_exacta(a: Sequence[int], b: Sequence[int]) -> List[int]:
+    """
+    Convolución exacta con enteros de Python, sin riesgo de desbordamiento.
+
+    Vuelve a aplicar la sustitución de Kronecker sobre los enteros: cada vector se
+    evalúa en 2^k (k múltiplo de 8 y mayor que la cota de coeficientes), se
+    multiplican los dos enteros grandes (Karatsuba en CPython) y los coeficientes
+    se leen byte a byte sumando 2^(k-1) a cada dígito para que no haya préstamos.
+    """
+    ancho = (_cota_producto(a, b).bit_length() + 1) // 8 + 1
+    valor_a = _entero_empaquetado(a, ancho, 1) - _entero_empaquetado(a, ancho, -1)
+    valor_b = _entero_empaquetado(b, ancho, 1) - _entero_empaquetado(b, ancho, -1)
+    n = len(a) + len(b) - 1
+    desplazamiento = int.from_bytes((bytes(ancho - 1) + b'\x80') * n, 'little')
+    datos = (valor_a * valor_b + desplazamiento).to_bytes(ancho * n, 'little')
+    mitad = 1 << (8 * ancho - 1)
+    return [int.from_bytes(datos[i:i + ancho], 'little') - mitad
+            for i in range(0, ancho * n, ancho)]
+
+def convolucionar(a: Sequence[int], b: Sequence[int]) -> Sequence[int]:
+    """
+    Multiplica dos vectores de coeficientes enteros eligiendo el método más rápido seguro.
+
+    Args:
+        a (Sequence[int]): Coeficientes del primer polinomio (índice = exponente)
+        b (Sequence[int]): Coeficientes del segundo polinomio
+
+    Returns:
+        Sequence[int]: Coeficientes del producto (array int64 o lista de enteros)
+    """
+    if not NUMPY_AVAILABLE:
+        return _convolucion_exacta(a, b)
+    cota = _cota_producto(a, b)
+    if cota <= _COTA_FFT and min(len(a), len(b)) >= UMBRAL_FFT:
+        n = len(a) + len(b) - 1
+        tamano = 1 << (n - 1).bit_length()
+        producto = np.fft.irfft(np.fft.rfft(np.asarray(a, dtype=np.float64), tamano) *
+                                np.fft.rfft(np.asarray(b, dtype=np.float64), tamano), tamano)[:n]
+        return np.rint(producto).astype(np.int64)
+    if cota <= _COTA_INT64:
+        return np.convolve(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+    return _convolucion_exacta(a, b)
+
+def agrupar_factores(factores: Sequence[Basic]) -> List[Tuple[Basic, int]]:
+    """
+    Reúne los factores idénticos de un producto en potencias.
+
+    Una potencia con exponente entero positivo cuenta como su base repetida, de modo
+    que [(x+y)**2, (x+y)**3, x-y] da [(x+y, 5), (x-y, 1)].
+
+    Args:
+        factores (Sequence[Basic]): Factores del producto
+
+    Returns:
+        List[Tuple[Basic, int]]: (factor, multiplicidad) en orden de primera aparición
+    """
+    multiplicidades = {}
+    for factor in factores:
+        exponente = 1
+        if isinstance(factor, Pow) and factor.exp.is_Integer and factor.exp > 0:
+            factor, exponente = factor.base, int(factor.exp)
+        multiplicidades[factor] = multiplicidades.get(factor, 0) + exponente
+    return list(multiplicidades.items())
+
+def _factores_polinomicos(expr) -> Optional[Tuple[Basic, List[Tuple[Basic, int]]]]:
+    """
+    Separa un producto en coeficiente numérico y factores distintos con su
+    multiplicidad (las potencias enteras y los factores repetidos se agrupan).
+    Devuelve None si hay menos de dos sumas que multiplicar.
+    """
+    if isinstance(expr, Pow):
+        argumentos = (expr,)
+    elif isinstance(expr, Mul):
+        argumentos = expr.args
+    else:
+        return None
+    coeficiente = Integer(1)
+    factores = []
+    for factor in argumentos:
+        if factor.is_Number:
+            coeficiente *= factor
+        else:
+            factores.append(factor)
+    grupos = agrupar_factores(factores)
+    if sum(multiplicidad for factor, multiplicidad in grupos if isinstance(factor, Add)) < 2:
+        return None
+    return coeficiente, grupos
+
+def _potencia(vector: Sequence[int], exponente: int) -> Sequence[int]:
+    """Eleva un vector de coeficientes a un exponente entero positivo por cuadrados sucesivos."""
+    resultado = None
+    while True:
+        if exponente & 1:
+            resultado = vector if resultado is None else convolucionar(resultado, vector)
+        exponente >>= 1
+        if not exponente:
+            return resultado
+        vector = convolucionar(vector, vector)
+
+def _multiplicar(vectores: Sequence[Tuple[Sequence[int], int]]) -> Sequence[int]:
+    """Producto de vectores de coeficientes, cada uno elevado a su multiplicidad."""
+    producto = None
+    for vector, multiplicidad in vectores:
+        potencia = _potencia(vector, multiplicidad)
+        producto = potencia if producto is None else convolucionar(producto, potencia)
+    return producto
+
+def _empaquetar(poly: Poly, pesos: Sequence[int], longitud: int) -> List[int]:
+    """Convierte un Poly en su vector de coeficientes por sustitución de Kronecker."""
+    vector = [0] * longitud
+    for exponentes, coef in poly.terms():
+        vector[sum(e * p for e, p in zip(exponentes, pesos))] = int(coef)
+    return vector
+
+def _desempaquetar(vector: Sequence[int], bases: Sequence[int]) -> Dict[tuple, int]:
+    """Invierte la sustitución de Kronecker: índice -> tupla de exponentes."""
+    terminos = {}
+    for indice, coef in enumerate(vector):
+        if coef:
+            exponentes = []
+            for base in bases:
+                indice, e = divmod(indice, base)
+                exponentes.append(e)
+            terminos[tuple(exponentes)] = int(coef)
+    return terminos
+
+def _grados(factor, variables: Sequence[Basic]) -> Optional[List[int]]:
+    """
+    Grado de un factor en cada variable, leído de sus términos sin construir el Poly
+    (que reserva un vector denso por variable). None si algún término no es un
+    monomio con exponentes enteros no negativos en las variables.
+    """
+    grados = [0] * len(variables)
+    posiciones = {v: i for i, v in enumerate(variables)}
+    for termino in Add.make_args(factor):
+        for base, exponente in termino.as_powers_dict().items():
+            if base.is_Number:
+                continue
+            if base not in posiciones or not exponente.is_Integer or exponente < 0:
+                return None
+            i = posiciones[base]
+            grados[i] = max(grados[i], int(exponente))
+    return grados
+
+def expandir_producto_denso(expr) -> Optional[Basic]:
+    """
+    Expande un producto de polinomios con coeficientes enteros usando sustitución de
+    Kronecker y convolución.
+
+    Args:
+        expr: Expresión SymPy (producto de sumas)
+
+    Returns:
+        Optional[Basic]: Expresión expandida, o None si el producto no es apto
+        (factores no polinómicos, coeficientes no enteros o demasiado disperso)
+    """
+    separacion = _factores_polinomicos(expr)
+    if separacion is None:
+        return None
+    coeficiente, grupos = separacion
+    variables = sorted(expr.free_symbols, key=lambda s: s.name)
+    if not variables:
+        return None
+
+    # Bases de Kronecker: grado máximo de cada variable en el resultado + 1.
+    # Se acota la longitud antes de construir los Poly.
+    bases = [1] * len(variables)
+    for f, multiplicidad in grupos:
+        grados = _grados(f, variables)
+        if grados is None:
+            return None
+        bases = [base + grado * multiplicidad for base, grado in zip(bases, grados)]
+    pesos = []
+    longitud = 1
+    for base in bases:
+        pesos.append(longitud)
+        longitud *= base
+    if longitud > MAX_LONGITUD_DENSA:
+        return None
+
+    try:
+        polys = [(Poly(f, *variables), multiplicidad) for f, multiplicidad in grupos]
+    except Exception:
+        return None
+    if any(not p.domain.is_ZZ for p, _ in polys):
+        return None
+
+    # Solo compensa cuando el producto término a término es grande
+    trabajo = 1
+    for p, multiplicidad in polys:
+        trabajo *= len(p.terms()) ** multiplicidad
+    if trabajo < UMBRAL_TERMINOS:
+        return None
+
+    # Cada vector solo necesita llegar hasta su propio índice máximo
+    vectores = []
+    for p, multiplicidad in polys:
+        maximo = sum(e * w for e, w in zip(p.degree_list(), pesos)) + 1
+        vectores.append((_empaquetar(p, pesos, maximo), multiplicidad))
+
+    terminos = _desempaquetar(_multiplicar(vectores), bases)
+    if coeficiente != 1:
+        terminos = {exponentes: coeficiente * c for exponentes, c in terminos.items()}
+    return Poly.from_dict(terminos, *variables).as_expr()
+
+def _vector_univariado(factor, variable) -> Optional[Tuple[List[int], int]]:
+    """
+    Lee un factor como vector denso de coeficientes en una variable.
+
+    Returns:
+        Optional[Tuple[List[int], int]]: (coeficientes enteros, denominador común),
+        o None si el factor no es un polinomio racional en la variable o su vector
+        superaría MAX_LONGITUD_DENSA
+    """
+    terminos = []
+    denominador = 1
+    for termino in Add.make_args(factor):
+        coef, exponente = termino.as_coeff_exponent(variable)
+        if not coef.is_Rational or not exponente.is_Integer or exponente < 0:
+            return None
+        terminos.append((int(exponente), coef))
+        denominador = lcm(denominador, int(coef.q))
+    grado = max(e for e, _ in terminos)
+    if grado >= MAX_LONGITUD_DENSA:
+        return None
+    vector = [0] * (grado + 1)
+    for exponente, coef in terminos:
+        vector[exponente] += int(coef.p) * (denominador // int(coef.q))
+    return vector, denominador
+
+def expandir_producto_univariado(expr) -> Optional[Basic]:
+    """
+    Expande un producto de polinomios en una sola variable con coeficientes enteros
+    o racionales usando vectores densos de coeficientes y convolución.
+
+    Args:
+        expr: Expresión SymPy (producto de sumas en una variable)
+
+    Returns:
+        Optional[Basic]: Expresión expandida, o None si el producto no es apto
+    """
+    if len(expr.free_symbols) != 1:
+        return None
+    separacion = _factores_polinomicos(expr)
+    if separacion is None:
+        return None
+    coeficiente, grupos = separacion
+    variable = next(iter(expr.free_symbols))
+
+    vectores = []
+    denominador = 1
+    trabajo = 1
+    longitud = 1
+    casillas = no_nulos = 0
+    for factor, multiplicidad in grupos:
+        lectura = _vector_univariado(factor, variable)
+        if lectura is None:
+            return None
+        vector, denominador_factor = lectura
+        vectores.append((vector, multiplicidad))
+        denominador *= denominador_factor ** multiplicidad
+        terminos = sum(1 for c in vector if c)
+        trabajo *= terminos ** multiplicidad
+        longitud += (len(vector) - 1) * multiplicidad
+        casillas += len(vector) * multiplicidad
+        no_nulos += terminos * multiplicidad
+    if trabajo < UMBRAL_TERMINOS or longitud > MAX_LONGITUD_DENSA:
+        return None
+    # Productos dispersos de grado alto: el vector sería casi todo ceros
+    if no_nulos < DENSIDAD_MINIMA * casillas:
+        return None
+
+    producto = _multiplicar(vectores)
+
+    # Sin Rational(): un coeficiente Float (0.1) debe seguir siendo Float
+    escala = coeficiente / denominador
+    return Add(*[escala * int(c) * variable**k for k, c in enumerate(producto) if c])
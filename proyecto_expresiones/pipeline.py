@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline por etapas para procesar una expresión:
+
+    normalizar → clasificar → parsear → expandir → renderizar
+
+Todas las etapas trabajan sobre un ContextoExpresion, que guarda los artefactos
+intermedios (forma canónica, expresión limpia, censo LaTeX, producto notable,
+intentos con latex2sympy2). Cada artefacto se calcula una sola vez y lo
+comparten todas las estrategias, de modo que un fallback reutiliza lo ya
+calculado en vez de volver a empezar (p. ej. InputParser.parse_pipeline_unified
+no repite un intento fallido de latex2sympy2 sobre el mismo texto).
+
+La etapa clasificar asigna además una ruta (producto polinómico puro, operador
+de suma/producto, integral, derivada, trigonométrica u otra). Cada ruta puede
+tener estrategias propias que se prueban antes de las generales: los productos
+de polinomios van directos al motor polinómico sin pasar por el parser ANTLR de
+latex2sympy2. El pipeline cuenta cuántas entradas sigue cada ruta y con qué
+método se resolvieron (PipelineExpresion.contadores).
+
+La etapa de parseo prueba una lista de estrategias en orden. Una estrategia es
+una función contexto -> Optional[str]: si resuelve la expresión, deja el
+resultado en el contexto y devuelve el nombre del método; si no aplica, devuelve
+None. Si una estrategia, o la expansión o el renderizado de su resultado, lanzan
+una excepción, el error se anota y se prueba la siguiente estrategia.
+
+ejecutar() admite además estrategias previas propias de una llamada (p. ej. la
+expansión incremental de la GUI, que guarda estado de sesión): se prueban tras
+normalizar y, si una resuelve la expresión, no se llega a clasificarla.
+"""
+
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+from sympy import Basic, Mul, Pow
+from input_parser import LATEX2SYMPY_AVAILABLE, clean_expression
+from utils import canonicalizar_expresion, censar_latex, CensoLatex
+from productos_notables import reconocer_producto_notable_latex, latex_simple_a_sympy
+import latex2sympy_pool
+import trazas
+
+# Longitud a partir de la cual una expresión se trata como caso extremo
+LONGITUD_EXTREMA = 500
+# Comandos griegos que activan el caso especial de símbolos griegos
+_GRIEGAS_ESPECIALES = ('\\alpha', '\\beta', '\\lambda', '\\theta', '\\phi')
+
+# Rutas del clasificador, en el orden en que se comprueban
+RUTAS = ('derivada', 'integral', 'operador', 'trigonometrica', 'producto_polinomico', 'otra')
+_COMANDOS_DERIVADA = frozenset({'\\partial'})
+_COMANDOS_INTEGRAL = frozenset({'\\int'})
+_COMANDOS_OPERADOR = frozenset({'\\sum', '\\prod'})
+_COMANDOS_TRIGONOMETRICOS = frozenset({
+    '\\sin', '\\cos', '\\tan', '\\cot', '\\sec', '\\csc',
+    '\\arcsin', '\\arccos', '\\arctan', '\\sinh', '\\cosh', '\\tanh'
+})
+
+_NO_CALCULADO = object()
+
+class ContextoExpresion:
+    """
+    Artefactos intermedios y resultado de una expresión a lo largo del pipeline.
+
+    Atributos:
+        expresion (str): Texto original
+        es_latex_declarado (bool): Si el llamador indicó que la entrada es LaTeX
+        canonica (str): Forma canónica (etapa normalizar)
+        limpia (str): Expresión sin espacios sobrantes (etapa normalizar)
+        rasgos (FrozenSet[str]): Casos especiales detectados (etapa clasificar)
+        ruta (str): Una de RUTAS (etapa clasificar)
+        metodo, original, parseada, expandida, latex_original, latex_expandida:
+            Resultado de la estrategia que resolvió la expresión
+        errores (List[Tuple[str, str]]): (estrategia, error) de los intentos fallidos
+    """
+
+    def __init__(self, expresion: str, es_latex: bool = False):
+        self.expresion = expresion
+        self.es_latex_declarado = es_latex
+        self.canonica: Optional[str] = None
+        self.limpia: Optional[str] = None
+        self.rasgos: FrozenSet[str] = frozenset()
+        self.ruta = 'otra'
+        self.errores: List[Tuple[str, str]] = []
+        self._notable = _NO_CALCULADO
+        self._arbol_simple = _NO_CALCULADO
+        self._intentos_latex2sympy: Dict[str, Tuple[Any, Optional[Exception]]] = {}
+        self.descartar_resultado()
+
+    def descartar_resultado(self) -> None:
+        """Borra el resultado parcial de una estrategia que no llegó a completarse."""
+        self.metodo: Optional[str] = None
+        self.original: Any = None
+        self.parseada: Any = None
+        self.expandida: Any = None
+        self.latex_original: Optional[str] = None
+        self.latex_expandida: Optional[str] = None
+
+    def notable(self) -> Any:
+        """Producto notable reconocido en la expresión (None si no lo es)."""
+        if self._notable is _NO_CALCULADO:
+            self._notable = reconocer_producto_notable_latex(self.expresion)
+        return self._notable
+
+    def arbol_simple(self) -> Optional[Basic]:
+        """Árbol SymPy de la forma canónica si es un producto LaTeX simple (None si no)."""
+        if self._arbol_simple is _NO_CALCULADO:
+            self._arbol_simple = latex_simple_a_sympy(self.canonica) if self.canonica else None
+        return self._arbol_simple
+
+    def censo(self) -> CensoLatex:
+        """Censo de comandos y delimitadores de la expresión limpia."""
+        return censar_latex(self.limpia)
+
+    def latex2sympy(self, texto: Optional[str] = None) -> Any:
+        """
+        Parsea con latex2sympy2 una sola vez por texto; los fallos también se recuerdan.
+        Usa el lexer y el parser ANTLR reutilizables del hilo (latex2sympy_pool).
+
+        Args:
+            texto (Optional[str]): Texto a parsear (por defecto, la expresión original)
+
+        Returns:
+            Any: Expresión SymPy
+
+        Raises:
+            ImportError: Si latex2sympy2 no está disponible
+            Exception: El error de latex2sympy2 (el mismo en cada llamada)
+        """
+        texto = self.expresion if texto is None else texto
+        intento = self._intentos_latex2sympy.get(texto)
+        if intento is None:
+            if not LATEX2SYMPY_AVAILABLE:
+                intento = (None, ImportError("latex2sympy2 no está disponible"))
+            else:
+                try:
+                    intento = (latex2sympy_pool.latex2sympy(texto), None)
+                except Exception as e:
+                    intento = (None, e)
+            self._intentos_latex2sympy[texto] = intento
+        expr, error = intento
+        if error is not None:
+            raise error
+        return expr
+
+    def resultado(self) -> dict:
+        """Diccionario de resultado con la forma que devuelve Expander.process_expression."""
+        if self.metodo is None:
+            detalle = ". ".join(f"{estrategia}: {error}" for estrategia, error in self.errores)
+            return {
+                "success": False,
+                "error": f"No se pudo procesar la expresión. {detalle}" if detalle else "No se pudo procesar la expresión",
+                "original": self.expresion,
+                "expanded": None,
+                "original_latex": "",
+                "expanded_latex": ""
+            }
+        return {
+            "success": True,
+            "original": self.original,
+            "expanded": self.expandida,
+            "original_latex": self.latex_original,
+            "expanded_latex": self.latex_expandida,
+            "error": None,
+            "method": self.metodo
+        }
+
+def normalizar(contexto: ContextoExpresion) -> None:
+    """Etapa 1: forma canónica (para comparar) y expresión limpia (para parsear)."""
+    contexto.canonica = canonicalizar_expresion(contexto.expresion)
+    contexto.limpia = clean_expression(contexto.expresion)
+
+def clasificar(contexto: ContextoExpresion) -> None:
+    """Etapa 2: detecta una sola vez los casos especiales que consultan las estrategias y asigna la ruta."""
+    expresion = contexto.expresion
+    rasgos = set()
+    if "\\frac{d}{dx}" in expresion or "\\frac{d^" in expresion:
+        rasgos.add('derivada')
+    if "\\int" in expresion:
+        rasgos.add('integral')
+    if len(expresion) > LONGITUD_EXTREMA:
+        rasgos.add('extrema')
+    if any(griega in expresion for griega in _GRIEGAS_ESPECIALES):
+        rasgos.add('griegas')
+    if ')(' in contexto.canonica:
+        rasgos.add('producto_implicito')
+    contexto.rasgos = frozenset(rasgos)
+    contexto.ruta = _ruta(contexto)
+
+def _ruta(contexto: ContextoExpresion) -> str:
+    """Ruta de una expresión: primero por comandos del censo, luego por la forma del árbol."""
+    comandos = contexto.censo().comandos
+    if 'derivada' in contexto.rasgos or not _COMANDOS_DERIVADA.isdisjoint(comandos):
+        return 'derivada'
+    if not _COMANDOS_INTEGRAL.isdisjoint(comandos):
+        return 'integral'
+    if not _COMANDOS_OPERADOR.isdisjoint(comandos):
+        return 'operador'
+    if not _COMANDOS_TRIGONOMETRICOS.isdisjoint(comandos):
+        return 'trigonometrica'
+    if _es_producto_polinomico(contexto.arbol_simple()):
+        return 'producto_polinomico'
+    return 'otra'
+
+def _es_producto_polinomico(arbol: Optional[Basic]) -> bool:
+    """Producto (o potencia) de polinomios en sus variables, con coeficientes numéricos."""
+    if not isinstance(arbol, (Mul, Pow)):
+        return False
+    simbolos = arbol.free_symbols
+    return bool(simbolos) and arbol.is_polynomial(*simbolos)
+
+def crear_contexto(expresion: str, es_latex: bool = False) -> ContextoExpresion:
+    """Contexto con las etapas normalizar y clasificar ya aplicadas."""
+    contexto = ContextoExpresion(expresion, es_latex)
+    normalizar(contexto)
+    clasificar(contexto)
+    return contexto
+
+Estrategia = Callable[[ContextoExpresion], Optional[str]]
+Etapa = Callable[[ContextoExpresion], None]
+
+class PipelineExpresion:
+    """
+    Pipeline configurable: cada etapa se puede sustituir al construirlo.
+
+    Args:
+        estrategias (Sequence[Tuple[str, Estrategia]]): (nombre, estrategia) de la etapa
+            de parseo, en orden de preferencia
+        expandir (Etapa): Completa contexto.expandida a partir de contexto.parseada
+        renderizar (Etapa): Completa el LaTeX y el original del resultado
+        normalizar, clasificar (Etapa): Etapas previas al parseo
+        rutas (Mapping[str, Sequence[Tuple[str, Estrategia]]]): Estrategias propias de
+            cada ruta, que se prueban antes que las generales
+    """
+
+    def __init__(self, estrategias: Sequence[Tuple[str, Estrategia]], expandir: Etapa, renderizar: Etapa,
+                 normalizar: Etapa = normalizar, clasificar: Etapa = clasificar,
+                 rutas: Optional[Mapping[str, Sequence[Tuple[str, Estrategia]]]] = None):
+        self.estrategias = list(estrategias)
+        self.expandir = expandir
+        self.renderizar = renderizar
+        self.normalizar = normalizar
+        self.clasificar = clasificar
+        self.rutas = {ruta: list(propias) for ruta, propias in (rutas or {}).items()}
+        # Ruta -> {método (o 'error') -> número de entradas}
+        self._contadores: Dict[str, Dict[str, int]] = {}
+        self._bloqueo_contadores = threading.Lock()
+
+    def contadores(self) -> Dict[str, Dict[str, int]]:
+        """
+        Entradas procesadas por ruta: total y reparto por método ('error' si ninguna
+        estrategia las resolvió). Solo cuenta las ejecuciones del pipeline, no los
+        aciertos de las cachés de resultados.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Ruta -> {'total': n, método: n, ...}
+        """
+        with self._bloqueo_contadores:
+            return {ruta: {'total': sum(metodos.values()), **metodos}
+                    for ruta, metodos in self._contadores.items()}
+
+    def reiniciar_contadores(self) -> None:
+        """Pone a cero los contadores de rutas."""
+        with self._bloqueo_contadores:
+            self._contadores.clear()
+
+    def _contar(self, ruta: str, metodo: Optional[str]) -> None:
+        clave = metodo or 'error'
+        with self._bloqueo_contadores:
+            metodos = self._contadores.setdefault(ruta, {})
+            metodos[clave] = metodos.get(clave, 0) + 1
+
+    def ejecutar(self, expresion: str, es_latex: bool = False,
+                 previas: Sequence[Tuple[str, Estrategia]] = ()) -> ContextoExpresion:
+        """
+        Procesa una expresión y devuelve su contexto (contexto.metodo es None si
+        ninguna estrategia la resolvió; los motivos quedan en contexto.errores).
+
+        Args:
+            previas (Sequence[Tuple[str, Estrategia]]): Estrategias de esta ejecución
+                (p. ej. con estado de sesión) que se prueban tras normalizar, antes de
+                clasificar; la que resuelve la expresión fija contexto.ruta
+        """
+        contexto = ContextoExpresion(expresion, es_latex)
+        self.normalizar(contexto)
+        if not self._probar(contexto, previas):
+            self.clasificar(contexto)
+            self._probar(contexto, self.rutas.get(contexto.ruta, []) + self.estrategias)
+        self._contar(contexto.ruta, contexto.metodo)
+        return contexto
+
+    def _probar(self, contexto: ContextoExpresion, estrategias: Sequence[Tuple[str, Estrategia]]) -> bool:
+        """Prueba las estrategias en orden hasta que una resuelve la expresión."""
+        expresion = contexto.expresion
+        for nombre, estrategia in estrategias:
+            try:
+                metodo = estrategia(contexto)
+                if metodo is None:
+                    continue
+                self.expandir(contexto)
+                self.renderizar(contexto)
+                contexto.metodo = metodo
+                if trazas.ACTIVAS:
+                    trazas.evento("pipeline_estrategia", estrategia=nombre, metodo=metodo, ruta=contexto.ruta,
+                                  expresion=expresion, resultado=contexto.expandida)
+                break
+            except Exception as e:
+                if trazas.ACTIVAS:
+                    trazas.evento("pipeline_estrategia", exito=False, estrategia=nombre, ruta=contexto.ruta,
+                                  expresion=expresion, error=e)
+                contexto.errores.append((nombre, str(e)))
+                contexto.descartar_resultado()
+        return contexto.metodo is not None
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconocedor estructural de productos notables.
+
+Trabaja sobre el árbol SymPy ya parseado, no sobre cadenas literales, de modo que
+reconoce cualquier escritura de las formas:
+- Diferencia de cuadrados:    (A+B)(A-B)        -> A^2 - B^2
+  (también con A y B sumas: (x+y+z)(x-y-z) -> x^2 - (y+z)^2)
+- Potencia de un binomio:     (A+B)^n           -> sum C(n,k) A^(n-k) B^k
+- Potencia de un trinomio:    (A+B+C)^n         -> sum multinomial(i,j,k) A^i B^j C^k
+- Suma/diferencia de cubos:   (A+B)(A^2-AB+B^2) -> A^3 + B^3
+donde A y B son subexpresiones arbitrarias (el signo de B va incluido en B).
+La forma cerrada se construye en O(términos), sin pasar por expand() general.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+from sympy import Add, Mul, Pow, Basic, expand
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+from utils import canonicalizar_expresion
+from coeficientes import fila_pascal, coeficiente_multinomial
+from simbolos import LETRAS_LATINAS, RegistroSimbolos, registro
+
+# Comandos permitidos en un producto simple además de los símbolos del registro
+_COMANDOS_SIMPLES = frozenset({'frac', 'pi', 'cdot', 'times'})
+
+_PATRON_COMANDO = re.compile(r'\\([a-zA-Z]+)')
+_PATRON_FRACCION = re.compile(r'\\frac\{([^{}]*)\}\{([^{}]*)\}')
+# Subíndices simples con llaves o paréntesis: x_{1}, x_(1)
+_PATRON_SUBINDICE = re.compile(r'_[{(]([a-zA-Z0-9]+)[})]')
+# Espacio que deja la traducción de un comando antes de su subíndice (\alpha_1)
+_PATRON_ESPACIO_SUBINDICE = re.compile(r' _')
+_PATRON_EXPONENTE = re.compile(r'\^\{([^{}]*)\}')
+_PATRON_CARACTERES_SIMPLES = re.compile(r'[a-zA-Z0-9_+\-*/() .]*')
+
+_TRANSFORMACIONES = standard_transformations + (implicit_multiplication_application,)
+
+# Mayor exponente para el que se construye la forma cerrada de una potencia
+MAX_EXPONENTE_NOTABLE = 40
+
+# Límites de un producto simple: las transformaciones de multiplicación implícita de
+# parse_expr recorren los tokens una vez por nivel de paréntesis y son lentas por token
+MAX_ANIDAMIENTO_SIMPLE = 32
+MAX_LONGITUD_SIMPLE = 8192
+
+@lru_cache(maxsize=4)
+def _diccionario_local(registro_simbolos: RegistroSimbolos) -> dict:
+    """Símbolos para letras sueltas y del registro (evita E, I, gamma, beta... de SymPy)."""
+    local = {letra: registro_simbolos.simbolo(letra) for letra in LETRAS_LATINAS}
+    for nombre, simbolo in registro_simbolos.simbolos.items():
+        # 'lambda' es palabra reservada de Python: se parsea como lambda_
+        clave = 'lambda_' if nombre == 'lambda' else nombre
+        local[clave] = simbolo
+    return local
+
+@lru_cache(maxsize=4)
+def _comandos_simples(registro_simbolos: RegistroSimbolos) -> frozenset:
+    """Comandos permitidos en un producto simple; cualquier otro descarta el atajo."""
+    return _COMANDOS_SIMPLES | {nombre for nombre in registro_simbolos.simbolos
+                                if registro_simbolos.admite_comando('\\' + nombre)}
+
+def _anidamiento(texto: str) -> int:
+    """Mayor profundidad de paréntesis de texto."""
+    profundidad = maxima = 0
+    for caracter in texto:
+        if caracter == '(':
+            profundidad += 1
+            maxima = max(maxima, profundidad)
+        elif caracter == ')':
+            profundidad -= 1
+    return maxima
+
+def _binomio(expr) -> Optional[Tuple[Basic, Basic]]:
+    """Devuelve (A, B) si expr es una suma de exactamente dos términos."""
+    if isinstance(expr, Add) and len(expr.args) == 2:
+        return expr.args
+    return None
+
+def _forma_cerrada(resultado, *subexpresiones):
+    """Expande la forma cerrada solo si A o B contienen sumas internas."""
+    if any(sub.atoms(Add) for sub in subexpresiones):
+        return expand(resultado)
+    return resultado
+
+def _exponente_notable(expr) -> Optional[int]:
+    """Devuelve n si expr es una potencia entera 2 <= n <= MAX_EXPONENTE_NOTABLE."""
+    exponente = expr.exp
+    if exponente.is_Integer and 2 <= exponente <= MAX_EXPONENTE_NOTABLE:
+        return int(exponente)
+    return None
+
+def _potencia_binomio(a, b, n: int):
+    """(A+B)^n con los coeficientes de la fila n del triángulo de Pascal."""
+    fila = fila_pascal(n)
+    terminos = [int(fila[k]) * a**(n - k) * b**k for k in range(n + 1)]
+    return _forma_cerrada(Add(*terminos), a, b)
+
+def _potencia_trinomio(a, b, c, n: int):
+    """(A+B+C)^n con coeficientes multinomiales."""
+    terminos = []
+    for i in range(n + 1):
+        for j in range(n - i + 1):
+            k = n - i - j
+            terminos.append(coeficiente_multinomial((i, j, k)) * a**i * b**j * c**k)
+    return _forma_cerrada(Add(*terminos), a, b, c)
+
+def _potencia_notable(expr):
+    """Forma cerrada de (A+B)^n o (A+B+C)^n, o None si expr no tiene esa forma."""
+    if not isinstance(expr, Pow) or not isinstance(expr.base, Add):
+        return None
+    n = _exponente_notable(expr)
+    if n is None:
+        return None
+    terminos = expr.base.args
+    if len(terminos) == 2:
+        return _potencia_binomio(*terminos, n)
+    if len(terminos) == 3:
+        return _potencia_trinomio(*terminos, n)
+    return None
+
+def _diferencia_cuadrados(p, q):
+    """
+    (S+D)(S-D) -> S^2 - D^2, donde S son los términos comunes y D los opuestos.
+    Cubre (A+B)(A-B) y también sumas más largas como (x+y+z)(x-y-z).
+    """
+    if len(p.args) != len(q.args):
+        return None
+    terminos_q = set(q.args)
+    comunes = [t for t in p.args if t in terminos_q]
+    opuestos = [t for t in p.args if t not in terminos_q and -t in terminos_q]
+    if not comunes or not opuestos or len(comunes) + len(opuestos) != len(p.args):
+        return None
+    if len(comunes) == 1 and len(opuestos) == 1:
+        a, b = comunes[0], opuestos[0]
+        return _forma_cerrada(a**2 - b**2, a, b)
+    return expand(Add(*comunes)**2) - expand(Add(*opuestos)**2)
+
+def _suma_cubos(binomio, trinomio):
+    """(A+B)(A^2-AB+B^2) -> A^3 + B^3 (el signo de B cubre la diferencia de cubos)."""
+    if not isinstance(trinomio, Add) or len(trinomio.args) != 3:
+        return None
+    a, b = binomio
+    if set(trinomio.args) == {a**2, -a*b, b**2}:
+        return _forma_cerrada(a**3 + b**3, a, b)
+    return None
+
+def reconocer_producto_notable(expr) -> Optional[Basic]:
+    """
+    Reconoce productos notables en un árbol SymPy y devuelve su forma expandida.
+
+    Si expr es un producto, los factores que forman productos notables se reemplazan
+    por su forma cerrada y el resto se multiplica normalmente.
+
+    Args:
+        expr: Expresión SymPy
+
+    Returns:
+        Optional[Basic]: Expresión expandida, o None si no hay productos notables
+    """
+    if isinstance(expr, Pow):
+        return _potencia_notable(expr)
+
+    if not isinstance(expr, Mul):
+        return None
+
+    piezas = []
+    restantes = []
+    for factor in expr.args:
+        # SymPy distribuye los coeficientes numéricos: 3(x+1) llega como 3x+3
+        if isinstance(factor, Add):
+            coeficiente, factor = factor.primitive()
+            if coeficiente != 1:
+                restantes.append(coeficiente)
+        restantes.append(factor)
+    i = 0
+    while i < len(restantes):
+        factor = restantes[i]
+        # Potencias de binomios y trinomios dentro del producto
+        potencia = _potencia_notable(factor)
+        if potencia is not None:
+            piezas.append(potencia)
+            restantes.pop(i)
+            continue
+        binomio = _binomio(factor)
+        emparejado = False
+        if isinstance(factor, Add):
+            for j in range(i + 1, len(restantes)):
+                otro = restantes[j]
+                otro_binomio = _binomio(otro)
+                resultado = None
+                if isinstance(otro, Add):
+                    resultado = _diferencia_cuadrados(factor, otro)
+                if resultado is None and binomio:
+                    resultado = _suma_cubos(binomio, otro)
+                if resultado is None and otro_binomio:
+                    resultado = _suma_cubos(otro_binomio, factor)
+                if resultado is not None:
+                    piezas.append(resultado)
+                    restantes.pop(j)
+                    restantes.pop(i)
+                    emparejado = True
+                    break
+        if not emparejado:
+            i += 1
+
+    if not piezas:
+        return None
+    if len(piezas) == 1 and not restantes:
+        return piezas[0]
+    return expand(Mul(*piezas, *restantes))
+
+def latex_simple_a_sympy(canonica: str, registro_simbolos: Optional[RegistroSimbolos] = None) -> Optional[Basic]:
+    """
+    Convierte un producto LaTeX simple (en forma canónica) a SymPy sin evaluar el producto.
+    Devuelve None si la expresión usa construcciones fuera de ese subconjunto o supera
+    MAX_LONGITUD_SIMPLE o MAX_ANIDAMIENTO_SIMPLE.
+    El árbol se guarda en caché por expresión y registro (por defecto, el vigente): lo
+    comparten este reconocedor y el clasificador del pipeline, y extender_registro()
+    no deja árboles parseados con el registro anterior.
+    """
+    return _latex_simple_a_sympy(canonica, registro() if registro_simbolos is None else registro_simbolos)
+
+@lru_cache(maxsize=512)
+def _latex_simple_a_sympy(canonica: str, registro_simbolos: RegistroSimbolos) -> Optional[Basic]:
+    comandos = set(_PATRON_COMANDO.findall(canonica))
+    if not comandos <= _comandos_simples(registro_simbolos):
+        return None
+    texto = _PATRON_FRACCION.sub(r'((\1)/(\2))', canonica)
+    if '\\frac' in texto:
+        # Fracciones con argumentos anidados o derivadas: fuera del subconjunto simple
+        return None
+    texto = texto.replace('\\cdot', '*').replace('\\times', '*')
+    # \lambda_3 -> lambda_3 (identificador válido); \lambda suelto -> lambda_ (palabra reservada)
+    texto = texto.replace('\\lambda_', 'lambda_').replace('\\lambda', 'lambda_ ')
+    texto = _PATRON_COMANDO.sub(r'\1 ', texto)
+    texto = _PATRON_ESPACIO_SUBINDICE.sub('_', texto)
+    texto = _PATRON_SUBINDICE.sub(r'_\1', texto)
+    texto = _PATRON_EXPONENTE.sub(r'**(\1)', texto)
+    texto = texto.replace('^', '**').replace(')(', ')*(')
+    if len(texto) > MAX_LONGITUD_SIMPLE or not _PATRON_CARACTERES_SIMPLES.fullmatch(texto):
+        return None
+    if _anidamiento(texto) > MAX_ANIDAMIENTO_SIMPLE:
+        return None
+    try:
+        return parse_expr(texto, local_dict=_diccionario_local(registro_simbolos), transformations=_TRANSFORMACIONES)
+    except Exception:
+        return None
+
+@lru_cache(maxsize=512)
+def _reconocer_canonica(canonica: str, registro_simbolos: RegistroSimbolos) -> Optional[Basic]:
+    arbol = latex_simple_a_sympy(canonica, registro_simbolos)
+    if arbol is None:
+        return None
+    return reconocer_producto_notable(arbol)
+
+def reconocer_producto_notable_latex(latex_str: str) -> Optional[Basic]:
+    """
+    Atajo para cadenas LaTeX: parsea productos simples y aplica el reconocedor estructural.
+
+    Args:
+        latex_str (str): Expresión LaTeX
+
+    Returns:
+        Optional[Basic]: Forma expandida, o None si no es un producto notable
+    """
+    if not latex_str:
+        return None
+    return _reconocer_canonica(canonicalizar_expresion(latex_str), registro())
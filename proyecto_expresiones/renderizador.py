@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderizado sin interfaz gráfica de expresiones LaTeX a PNG o SVG.
+
+Usa el mismo camino de mathtext de matplotlib que la vista previa de la GUI
+(render_latex_image_to_label), pero sin pyplot ni Tk, de modo que puede correr
+en procesos trabajadores. Cada imagen se guarda con el nombre de la huella de su
+contenido (LaTeX, formato, tamaño y versión de matplotlib): una imagen que ya
+existe en el directorio está al día y no se vuelve a generar.
+"""
+
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+FORMATOS_RENDER = ('png', 'svg')
+# Resolución de las imágenes rasterizadas
+DPI_RENDER = 150
+# Índice que relaciona cada expresión del lote con sus imágenes
+ARCHIVO_INDICE = 'indice.json'
+
+def preparar_mathtext(latex_code: str) -> str:
+    """
+    Limpia comandos que mathtext no soporta y envuelve la expresión en modo matemático.
+
+    Args:
+        latex_code (str): Código LaTeX matemático (sin delimitadores)
+
+    Returns:
+        str: Texto listo para matplotlib
+    """
+    latex_code = latex_code.replace(",", " ")
+    latex_code = latex_code.replace('\\limits', '')
+    latex_code = latex_code.replace('\\left', '')
+    latex_code = latex_code.replace('\\right', '')
+    # mathtext no tiene modo display (\[ \]): todo se escribe entre $...$
+    return f"${latex_code}$"
+
+def renderizar_latex(latex_code: str, formato: str = 'png', zoom: float = 1.0) -> bytes:
+    """
+    Renderiza una expresión LaTeX y devuelve la imagen codificada.
+
+    Args:
+        latex_code (str): Código LaTeX matemático
+        formato (str): 'png' o 'svg'
+        zoom (float): Factor de escala (el mismo que el zoom de la GUI)
+
+    Returns:
+        bytes: Contenido del archivo de imagen
+    """
+    if formato not in FORMATOS_RENDER:
+        raise ValueError(f"Formato de imagen no soportado: {formato}")
+    font_size = int(int(12 * zoom) * 1.2)
+    fig = Figure(figsize=(8 * zoom * 0.6, 1.5 * zoom * 0.6 * 0.7))
+    FigureCanvasAgg(fig)
+    fig.text(0.05, 0.5, preparar_mathtext(latex_code), fontsize=font_size, va='center', ha='left')
+    buf = io.BytesIO()
+    fig.savefig(buf, format=formato, bbox_inches='tight', pad_inches=0.2, dpi=DPI_RENDER)
+    return buf.getvalue()
+
+def huella_render(latex_code: str, formato: str, zoom: float = 1.0) -> str:
+    """Huella del contenido de una imagen: cambia si cambia el LaTeX, el formato o el motor."""
+    huella = hashlib.blake2b(digest_size=16)
+    for parte in (matplotlib.__version__, formato, repr(zoom), str(DPI_RENDER), latex_code):
+        huella.update(parte.encode('utf-8'))
+        huella.update(b'\0')
+    return huella.hexdigest()
+
+def _renderizar_a_archivo(tarea: Tuple[str, str, float, str]) -> Tuple[str, Optional[str]]:
+    """Trabajo de un proceso: renderiza y escribe la imagen de forma atómica."""
+    latex_code, formato, zoom, ruta = tarea
+    try:
+        datos = renderizar_latex(latex_code, formato, zoom)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+        return ruta, None
+    except Exception as e:
+        return ruta, str(e)
+
+def renderizar_lote(items: Sequence[Tuple[str, str, str]], directorio: str, formato: str = 'png',
+                    zoom: float = 1.0, procesos: Optional[int] = None) -> dict:
+    """
+    Renderiza la entrada y la expansión de cada resultado de un lote en paralelo.
+
+    Args:
+        items (Sequence[Tuple[str, str, str]]): Tuplas (expresión, LaTeX original, LaTeX expandido)
+        directorio (str): Directorio de salida (se crea si no existe)
+        formato (str): 'png' o 'svg'
+        zoom (float): Factor de escala
+        procesos (Optional[int]): Procesos trabajadores (por defecto, uno por núcleo)
+
+    Returns:
+        dict: {'renderizadas': int, 'en_cache': int, 'errores': list, 'indice': ruta del índice}
+    """
+    if formato not in FORMATOS_RENDER:
+        raise ValueError(f"Formato de imagen no soportado: {formato}")
+    os.makedirs(directorio, exist_ok=True)
+
+    indice: List[dict] = []
+    pendientes = {}
+    en_cache = set()
+    for expresion, original_latex, expanded_latex in items:
+        entrada = {'expresion': expresion}
+        for clave, latex_code in (('original', original_latex), ('expandida', expanded_latex)):
+            if not latex_code:
+                entrada[clave] = None
+                continue
+            nombre = f"{huella_render(latex_code, formato, zoom)}.{formato}"
+            ruta = os.path.join(directorio, nombre)
+            if os.path.exists(ruta):
+                en_cache.add(ruta)
+            else:
+                pendientes[ruta] = (latex_code, formato, zoom, ruta)
+            entrada[clave] = nombre
+        indice.append(entrada)
+
+    tareas = list(pendientes.values())
+    if len(tareas) > 1 and procesos != 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            resultados = list(ejecutor.map(_renderizar_a_archivo, tareas, chunksize=max(1, len(tareas) // 32)))
+    else:
+        resultados = [_renderizar_a_archivo(tarea) for tarea in tareas]
+    errores = [(os.path.basename(ruta), error) for ruta, error in resultados if error is not None]
+
+    fallidas = {nombre for nombre, _ in errores}
+    for entrada in indice:
+        for clave in ('original', 'expandida'):
+            if entrada[clave] in fallidas:
+                entrada[clave] = None
+    ruta_indice = os.path.join(directorio, ARCHIVO_INDICE)
+    with open(ruta_indice, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+
+    return {
+        'renderizadas': len(tareas) - len(errores),
+        'en_cache': len(en_cache),
+        'errores': errores,
+        'indice': ruta_indice,
+    }
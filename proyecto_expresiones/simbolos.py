@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de símbolos y comandos LaTeX compartido por todo el proceso.
+
+El registro se construye una sola vez y es inmutable: los parsers solo consultan
+símbolos ya creados (letras griegas, alfabetos propios) y el conjunto de comandos
+admitidos. Para añadir alfabetos o comandos propios se llama a extender_registro()
+al arrancar la aplicación; eso crea un registro nuevo y lo publica de una vez, de
+modo que los hilos que ya tienen una referencia al anterior siguen viendo una
+tabla coherente.
+
+Los nombres con subíndice (x_{1}, x_1, x_(1)) se normalizan a la forma x_1, que
+SymPy vuelve a escribir como x_{1} al exportar a LaTeX.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping
+from sympy import Symbol
+
+LETRAS_GRIEGAS = (
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'varepsilon', 'zeta', 'eta',
+    'theta', 'vartheta', 'iota', 'kappa', 'lambda', 'mu', 'nu', 'xi', 'omicron',
+    'rho', 'sigma', 'tau', 'upsilon', 'phi', 'varphi', 'chi', 'psi', 'omega',
+    'Gamma', 'Delta', 'Theta', 'Lambda', 'Xi', 'Pi', 'Sigma', 'Phi', 'Psi', 'Omega'
+)
+
+LETRAS_LATINAS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Comandos LaTeX que acepta el parser manual (LatexParser.validate_latex)
+COMANDOS_SOPORTADOS = frozenset({
+    r'\left', r'\right', r'\cdot', r'\times', r'\div',
+    r'\sin', r'\cos', r'\tan', r'\cot', r'\sec', r'\csc',
+    r'\arcsin', r'\arccos', r'\arctan', r'\sinh', r'\cosh', r'\tanh',
+    r'\log', r'\ln', r'\exp', r'\pi', r'\infty', r'\e', r'\i',
+    r'\sum', r'\prod', r'\int', r'\lim', r'\sqrt', r'\frac',
+    r'\binom', r'\choose', r'\mathbb', r'\mathcal', r'\mathscr',
+    r'\mathfrak', r'\mathbf', r'\mathit', r'\mathrm', r'\mathsf',
+    r'\langle', r'\rangle', r'\lceil', r'\rceil', r'\lfloor',
+    r'\rfloor', r'\|', r'\vec', r'\hat', r'\bar', r'\tilde',
+    r'\dot', r'\ddot', r'\partial', r'\nabla', r'\forall',
+    r'\exists', r'\in', r'\notin', r'\subset', r'\supset',
+    r'\subseteq', r'\supseteq', r'\cup', r'\cap', r'\emptyset',
+    r'\varnothing'
+} | {'\\' + nombre for nombre in LETRAS_GRIEGAS})
+
+_PATRON_SUBINDICE = re.compile(r'^([a-zA-Z]+)_[{(]?([a-zA-Z0-9]+)[})]?$')
+
+class RegistroSimbolos:
+    """
+    Tabla inmutable de símbolos y comandos.
+
+    Atributos:
+        simbolos (Mapping[str, Symbol]): Nombre -> símbolo (griegas y alfabetos propios)
+        comandos (FrozenSet[str]): Comandos LaTeX admitidos, con una sola barra (\\frac)
+    """
+
+    def __init__(self, nombres: Iterable[str] = LETRAS_GRIEGAS, comandos: Iterable[str] = COMANDOS_SOPORTADOS):
+        self.simbolos: Mapping[str, Symbol] = MappingProxyType({nombre: Symbol(nombre) for nombre in nombres})
+        self.comandos: FrozenSet[str] = frozenset(comandos)
+
+    def simbolo(self, nombre: str) -> Symbol:
+        """
+        Devuelve el símbolo de un nombre, normalizando subíndices (x_{1} -> x_1).
+
+        Args:
+            nombre (str): Nombre del símbolo, con o sin subíndice
+
+        Returns:
+            Symbol: Símbolo registrado o creado (e internado) para ese nombre
+        """
+        registrado = self.simbolos.get(nombre)
+        if registrado is not None:
+            return registrado
+        return _simbolo_normalizado(nombre)
+
+    def admite_comando(self, comando: str) -> bool:
+        """Indica si un comando (con barra, p. ej. '\\frac') está admitido."""
+        return comando in self.comandos
+
+@lru_cache(maxsize=4096)
+def _simbolo_normalizado(nombre: str) -> Symbol:
+    """Símbolo para nombres fuera del registro; los subíndices se escriben base_índice."""
+    coincidencia = _PATRON_SUBINDICE.match(nombre)
+    if coincidencia:
+        nombre = f"{coincidencia.group(1)}_{coincidencia.group(2)}"
+    return Symbol(nombre)
+
+_registro = RegistroSimbolos()
+_bloqueo_registro = threading.Lock()
+
+def registro() -> RegistroSimbolos:
+    """Devuelve el registro vigente (lectura sin bloqueo)."""
+    return _registro
+
+def extender_registro(nombres: Iterable[str] = (), comandos: Iterable[str] = ()) -> RegistroSimbolos:
+    """
+    Añade nombres de variables y comandos LaTeX al registro. Pensado para llamarse
+    al arrancar (p. ej. para alfabetos propios); publica un registro nuevo.
+
+    Args:
+        nombres (Iterable[str]): Nombres de variables (p. ej. 'vx', 'Re')
+        comandos (Iterable[str]): Comandos LaTeX con barra (p. ej. '\\hbar')
+
+    Returns:
+        RegistroSimbolos: El registro publicado
+    """
+    global _registro
+    with _bloqueo_registro:
+        actual = _registro
+        nuevos = [nombre for nombre in nombres if nombre not in actual.simbolos]
+        _registro = RegistroSimbolos(list(actual.simbolos) + nuevos, actual.comandos | frozenset(comandos))
+        return _registro
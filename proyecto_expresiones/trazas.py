@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trazas estructuradas de depuración sin coste cuando están desactivadas.
+
+Cada etapa del procesamiento puede emitir un evento con datos; si las trazas
+están activas, el evento se escribe como una línea JSON en el archivo de trazas
+(JSONL). En el código, la comprobación se hace en el punto de llamada y el
+formateo se difiere:
+
+    if trazas.ACTIVAS:
+        trazas.evento('expansion', expresion=expr, resultado=lambda: str(expandida))
+
+Con las trazas desactivadas solo se evalúa `trazas.ACTIVAS`: no se construyen
+cadenas ni se convierten árboles de SymPy a texto. Los valores que son funciones
+sin argumentos se evalúan únicamente al escribir el evento.
+
+Se activan con activar(ruta), con la opción --trazas de main.py o con la variable
+de entorno EXPANSOR_TRAZAS (ruta del archivo JSONL).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any
+
+# Consultar siempre como trazas.ACTIVAS (no importar el nombre: se copiaría el valor)
+ACTIVAS = False
+# Longitud máxima de cada valor escrito (las expresiones extremas se recortan)
+MAX_LONGITUD_VALOR = 500
+
+_archivo = None
+_bloqueo = threading.Lock()
+
+def activar(ruta: str) -> None:
+    """
+    Activa las trazas y las añade al archivo JSONL indicado.
+
+    Args:
+        ruta (str): Ruta del archivo de trazas (se crea si no existe)
+    """
+    global ACTIVAS, _archivo
+    with _bloqueo:
+        if _archivo is not None:
+            _archivo.close()
+        _archivo = open(ruta, 'a', encoding='utf-8')
+        ACTIVAS = True
+
+def desactivar() -> None:
+    """Desactiva las trazas y cierra el archivo."""
+    global ACTIVAS, _archivo
+    with _bloqueo:
+        ACTIVAS = False
+        if _archivo is not None:
+            _archivo.close()
+            _archivo = None
+
+def _valor(valor: Any) -> Any:
+    """Evalúa los valores diferidos y los convierte a algo serializable en JSON."""
+    if callable(valor):
+        valor = valor()
+    if valor is None or isinstance(valor, (bool, int, float)):
+        return valor
+    texto = valor if isinstance(valor, str) else str(valor)
+    if len(texto) > MAX_LONGITUD_VALOR:
+        return texto[:MAX_LONGITUD_VALOR] + f'... ({len(texto)} caracteres)'
+    return texto
+
+def evento(nombre: str, exito: bool = True, **datos: Any) -> None:
+    """
+    Escribe un evento en el archivo de trazas (no hace nada si están desactivadas).
+
+    Args:
+        nombre (str): Etapa o tipo de evento (p. ej. 'latex2sympy2_fallback')
+        exito (bool): Si la etapa terminó bien
+        **datos: Datos del evento; las funciones sin argumentos se evalúan al escribir
+    """
+    if not ACTIVAS:
+        return
+    registro = {
+        'tiempo': round(time.time(), 6),
+        'hilo': threading.current_thread().name,
+        'evento': nombre,
+        'exito': exito,
+    }
+    for clave, valor in datos.items():
+        try:
+            registro[clave] = _valor(valor)
+        except Exception as e:
+            registro[clave] = f'<error al formatear: {type(e).__name__}>'
+    linea = json.dumps(registro, ensure_ascii=False)
+    with _bloqueo:
+        if _archivo is not None:
+            _archivo.write(linea + '\n')
+            _archivo.flush()
+
+# Activación desde el entorno (p. ej. en procesos por lotes o trabajadores)
+if os.environ.get('EXPANSOR_TRAZAS'):
+    activar(os.environ['EXPANSOR_TRAZAS'])
@@ -5,35 +5,362 @@ Utilidades para ExpaAlgebraico
 Funciones auxiliares que no pertenecen al parser principal
 """
 
-from typing import Optional
+import re
+import hashlib
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Optional, Pattern, Tuple
+
+# Delimitadores de tamaño (\left, \right, \big, \Bigl, ...) que no cambian el significado
+_PATRON_DELIMITADORES_TAMANO = re.compile(r'\\(?:left|right|[bB]ig{1,2}[lrm]?)(?![a-zA-Z])\s*')
+# Delimitador nulo de \left. / \right.
+_PATRON_DELIMITADOR_NULO = re.compile(r'\\(?:left|right)\s*\.')
+# Comandos de espaciado: \, \; \: \! \  \quad \qquad
+_PATRON_ESPACIADO = re.compile(r'\\(?:[,;:! ]|q?quad(?![a-zA-Z]))')
+# Espacios que separan un comando de una letra (\alpha x) deben conservarse
+_PATRON_ESPACIOS = re.compile(r'(\\[a-zA-Z]+)\s+(?=[a-zA-Z])|\s+')
+# Llaves redundantes alrededor de un solo carácter en exponentes y subíndices
+_PATRON_LLAVES_SIMPLES = re.compile(r'([\^_])\{([a-zA-Z0-9])\}')
+# Racha de llaves alrededor de un contenido sin llaves ({{{2}}}); solo empieza al
+# principio de la racha y los cuantificadores posesivos no retroceden: tiempo lineal
+_PATRON_LLAVES_DOBLES = re.compile(r'(?<!\{)(\{++)([^{}]*+)(\}++)')
+
+def _sustituir_espacios(match) -> str:
+    comando = match.group(1)
+    return comando + ' ' if comando else ''
+
+def _colapsar_llaves(match) -> str:
+    # {{x}} -> {x}: cada par redundante de la racha se elimina (equivale a aplicar la
+    # sustitución {{x}} -> {x} hasta punto fijo)
+    abre, contenido, cierra = match.groups()
+    pares = min(len(abre), len(cierra))
+    if pares < 2:
+        return match.group(0)
+    return abre[pares - 1:] + contenido + cierra[pares - 1:]
+
+@lru_cache(maxsize=1024)
+def canonicalizar_expresion(expr: str) -> str:
+    """
+    Devuelve la forma canónica de una expresión LaTeX para comparar y usar como clave.
+
+    Normaliza espacios, delimitadores \\left/\\right/\\big, comandos de espaciado,
+    ^{2} frente a ^2 y llaves redundantes, de modo que (x+1)(x-1),
+    \\left(x+1\\right)\\left(x-1\\right) y (x + 1)  (x - 1) coinciden.
+
+    Args:
+        expr (str): Expresión LaTeX
+
+    Returns:
+        str: Forma canónica de la expresión
+    """
+    if not expr:
+        return ""
+    canonica = _PATRON_DELIMITADOR_NULO.sub('', expr)
+    canonica = _PATRON_DELIMITADORES_TAMANO.sub('', canonica)
+    canonica = _PATRON_ESPACIADO.sub('', canonica)
+    canonica = _PATRON_ESPACIOS.sub(_sustituir_espacios, canonica.strip())
+    # {{{2}}} -> {2} en una sola pasada
+    canonica = _PATRON_LLAVES_DOBLES.sub(_colapsar_llaves, canonica)
+    canonica = _PATRON_LLAVES_SIMPLES.sub(r'\1\2', canonica)
+    return canonica
+
+def huella_expresion(expr: str) -> str:
+    """
+    Calcula una huella estable (independiente del proceso) de la forma canónica.
+
+    Args:
+        expr (str): Expresión LaTeX
+
+    Returns:
+        str: Hash hexadecimal de 32 caracteres
+    """
+    canonica = canonicalizar_expresion(expr)
+    return hashlib.blake2b(canonica.encode('utf-8'), digest_size=16).hexdigest()
+
+def compilar_sustituciones(mapeo: Dict[str, str]) -> Callable[[str], str]:
+    """
+    Compila un conjunto de reemplazos literales en una sola expresión regular.
+
+    La función devuelta recorre el texto una única vez, en lugar de una pasada de
+    str.replace por cada clave. Las claves más largas tienen prioridad.
+
+    Args:
+        mapeo (Dict[str, str]): Texto a buscar -> texto de reemplazo
+
+    Returns:
+        Callable[[str], str]: Función que aplica todos los reemplazos
+    """
+    patron = re.compile('|'.join(re.escape(clave) for clave in sorted(mapeo, key=len, reverse=True)))
+    reemplazos = dict(mapeo)
+
+    def sustituir(texto: str) -> str:
+        return patron.sub(lambda m: reemplazos[m.group(0)], texto)
+
+    return sustituir
+
+# Un solo recorrido: comandos (\frac), barras sueltas (\{, \,) y caracteres estructurales
+_PATRON_CENSO = re.compile(r'\\([a-zA-Z]+)|\\|[_^{}\[\]()]')
+
+class CensoLatex:
+    """
+    Resultado de recorrer una expresión una sola vez: qué comandos, scripts y
+    delimitadores aparecen. Lo consultan la detección de LaTeX, la validación de
+    comandos y el despacho de reglas, en lugar de volver a buscar cada uno.
+
+    Atributos:
+        comandos (FrozenSet[str]): Comandos presentes, con barra ('\\frac')
+        caracteres (FrozenSet[str]): Caracteres presentes entre '\\', '_', '^', llaves, corchetes y paréntesis
+        parentesis (Tuple[int, int]): Número de '(' y de ')'
+        producto_factores (bool): Hay un '(' después de algún ')' (p. ej. (x+1)(x-1))
+    """
+    __slots__ = ('comandos', 'caracteres', 'parentesis', 'producto_factores')
+
+    def __init__(self, comandos: FrozenSet[str], caracteres: FrozenSet[str],
+                 parentesis: Tuple[int, int], producto_factores: bool):
+        self.comandos = comandos
+        self.caracteres = caracteres
+        self.parentesis = parentesis
+        self.producto_factores = producto_factores
+
+    def contiene(self, disparadores: FrozenSet[str]) -> bool:
+        """Indica si aparece alguno de los disparadores (comandos con barra o caracteres)."""
+        return not disparadores.isdisjoint(self.comandos) or not disparadores.isdisjoint(self.caracteres)
+
+    @property
+    def es_latex(self) -> bool:
+        """Heurística de detección de LaTeX (comandos, scripts o producto de factores)."""
+        if self.caracteres & {'\\', '_', '^'}:
+            return True
+        abiertos, cerrados = self.parentesis
+        return abiertos > 0 and cerrados > 0 and (self.producto_factores or (abiertos >= 2 and cerrados >= 2))
+
+@lru_cache(maxsize=1024)
+def censar_latex(expr: str) -> CensoLatex:
+    """
+    Recorre la expresión una vez y registra los comandos y caracteres estructurales.
+
+    Args:
+        expr (str): Expresión LaTeX o de texto
+
+    Returns:
+        CensoLatex: Censo de la expresión
+    """
+    comandos = set()
+    caracteres = set()
+    abiertos = cerrados = 0
+    visto_cierre = False
+    producto_factores = False
+    for coincidencia in _PATRON_CENSO.finditer(expr):
+        comando = coincidencia.group(1)
+        if comando is not None:
+            comandos.add('\\' + comando)
+            caracteres.add('\\')
+            continue
+        caracter = coincidencia.group(0)
+        caracteres.add(caracter)
+        if caracter == '(':
+            abiertos += 1
+            producto_factores = producto_factores or visto_cierre
+        elif caracter == ')':
+            cerrados += 1
+            visto_cierre = True
+    return CensoLatex(frozenset(comandos), frozenset(caracteres), (abiertos, cerrados), producto_factores)
+
+# Delimitadores reconocidos por el índice: \left…\right, comandos de un símbolo (\{, \\) y (), [], {}
+_PATRON_DELIMITADOR = re.compile(
+    r'\\left(?:\\langle|\\[{|]|[(\[|])'
+    r'|\\right(?:\\rangle|\\[}|]|[)\]|])'
+    r'|\\.'
+    r'|[()\[\]{}]',
+    re.DOTALL
+)
+_CIERRE_DE = {
+    '(': ')', '[': ']', '{': '}',
+    '\\left(': '\\right)', '\\left[': '\\right]', '\\left\\{': '\\right\\}',
+    '\\left\\langle': '\\right\\rangle', '\\left|': '\\right|', '\\left\\|': '\\right\\|',
+}
+_CIERRES = frozenset(_CIERRE_DE.values())
+
+class IndiceDelimitadores:
+    """
+    Índice apertura -> cierre de los delimitadores de una cadena, construido en una
+    sola pasada lineal. Empareja (), [], {} y los pares \\left…\\right; los comandos
+    escapados (\\{, \\}) no cuentan como llaves. Los cierres sin pareja se ignoran.
+    """
+    __slots__ = ('_grupos',)
+
+    def __init__(self, texto: str):
+        grupos: Dict[int, Tuple[int, int, int]] = {}
+        pila = []
+        for coincidencia in _PATRON_DELIMITADOR.finditer(texto):
+            token = coincidencia.group(0)
+            cierre = _CIERRE_DE.get(token)
+            if cierre is not None:
+                pila.append((cierre, coincidencia.start(), coincidencia.end()))
+            elif token in _CIERRES and pila and pila[-1][0] == token:
+                _, inicio, inicio_contenido = pila.pop()
+                grupos[inicio] = (inicio_contenido, coincidencia.start(), coincidencia.end())
+        self._grupos = grupos
+
+    def grupo(self, inicio: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Límites del grupo que abre en `inicio`, en O(1).
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: (inicio, inicio del contenido, fin del
+            contenido, fin tras el cierre), o None si no abre un grupo emparejado
+        """
+        limites = self._grupos.get(inicio)
+        if limites is None:
+            return None
+        return (inicio,) + limites
+
+@lru_cache(maxsize=64)
+def indice_delimitadores(texto: str) -> IndiceDelimitadores:
+    """Índice de delimitadores de `texto` (compartido por los extractores que reciben la misma cadena)."""
+    return IndiceDelimitadores(texto)
+
+def grupo_tras(texto: str, indice: IndiceDelimitadores, posicion: int, aperturas: str = '{',
+               espacios: bool = True) -> Optional[Tuple[int, int, int]]:
+    """
+    Grupo emparejado que abre en `posicion` (tras los espacios, si `espacios`) con
+    alguno de los caracteres de `aperturas`.
+
+    Returns:
+        Optional[Tuple[int, int, int, int]]: Límites del grupo como en
+        IndiceDelimitadores.grupo, o None si no abre ahí un grupo emparejado
+    """
+    if espacios:
+        while posicion < len(texto) and texto[posicion].isspace():
+            posicion += 1
+    if posicion >= len(texto) or texto[posicion] not in aperturas:
+        return None
+    return indice.grupo(posicion)
+
+def lector_argumentos(firmas: Dict[str, Tuple[Tuple[str, Callable], ...]], espacios: bool = True) -> Callable:
+    """
+    Lector para reescribir_construcciones de comandos con argumentos fijos.
+
+    Args:
+        firmas (Dict[str, Tuple[Tuple[str, Callable], ...]]): Primer grupo del patrón
+            (p. ej. 'frac') -> firmas posibles (aperturas de cada argumento, plantilla),
+            p. ej. ('[{', raiz_n) y ('{', raiz); gana la primera que se lee completa
+        espacios (bool): Si se admiten espacios antes de cada argumento
+
+    Returns:
+        Callable: Lector; los argumentos vacíos no se aceptan
+    """
+    def leer(coincidencia, texto: str, indice: IndiceDelimitadores):
+        for aperturas_argumentos, plantilla in firmas[coincidencia.group(1)]:
+            posicion = coincidencia.end()
+            tramos = []
+            for aperturas in aperturas_argumentos:
+                grupo = grupo_tras(texto, indice, posicion, aperturas, espacios)
+                if grupo is None or grupo[1] == grupo[2]:
+                    break
+                tramos.append((grupo[1], grupo[2]))
+                posicion = grupo[3]
+            else:
+                return plantilla, tramos, posicion
+        return None
+    return leer
+
+def _aplanar(partes: list) -> str:
+    """Concatena una lista de cadenas y listas anidadas sin recursión."""
+    salida = []
+    pila = [iter(partes)]
+    while pila:
+        for parte in pila[-1]:
+            if isinstance(parte, list):
+                pila.append(iter(parte))
+                break
+            salida.append(parte)
+        else:
+            pila.pop()
+    return ''.join(salida)
+
+def reescribir_construcciones(texto: str, patron: Pattern, lector: Callable) -> str:
+    """
+    Reescribe en una sola pasada lineal las construcciones con argumentos entre
+    delimitadores (\\frac{a}{b}, x^{n}, \\sum_{k=1}^{n}{...}), anidadas o no.
+
+    `patron` reconoce solo el prefijo de cada construcción (sin cuantificadores que
+    puedan retroceder) y los argumentos se leen del índice de delimitadores, de modo
+    que ninguna entrada, por anidada o desbalanceada que sea, produce retroceso
+    catastrófico ni pasadas repetidas. Los argumentos se reescriben a su vez, por
+    dentro hacia fuera, sin recursión.
+
+    Args:
+        texto (str): Texto a reescribir
+        patron (Pattern): Expresión regular del prefijo de las construcciones
+        lector (Callable): lector(coincidencia, texto, indice) -> None si no hay
+            construcción, o (plantilla, tramos, fin): `tramos` son los intervalos
+            (inicio, fin) de los argumentos, en orden; `plantilla(*argumentos)` devuelve
+            la lista de piezas del reemplazo; un fin None llega hasta el final del
+            argumento que contiene la construcción
+
+    Returns:
+        str: Texto reescrito
+    """
+    indice = indice_delimitadores(texto)
+    construcciones = []
+    for coincidencia in patron.finditer(texto):
+        leida = lector(coincidencia, texto, indice)
+        if leida is not None:
+            construcciones.append((coincidencia.start(),) + tuple(leida))
+    if not construcciones:
+        return texto
+
+    raiz: list = []
+    pila = [[0, len(texto), raiz]]  # Tramos abiertos: [posición, fin, piezas]
+    siguiente = 0
+    while pila:
+        tramo = pila[-1]
+        posicion, fin, piezas = tramo
+        if siguiente < len(construcciones) and construcciones[siguiente][0] < fin:
+            inicio, plantilla, argumentos, fin_construccion = construcciones[siguiente]
+            siguiente += 1
+            fin_construccion = fin if fin_construccion is None else fin_construccion
+            if inicio < posicion or fin_construccion > fin:
+                continue  # No encaja en el tramo: se copia como texto
+            piezas.append(texto[posicion:inicio])
+            partes = [[] for _ in argumentos]
+            piezas.append(plantilla(*partes))
+            tramo[0] = fin_construccion
+            for (a, b), parte in zip(reversed(argumentos), reversed(partes)):
+                b = fin_construccion if b is None else min(b, fin_construccion)
+                pila.append([min(a, b), b, parte])
+        else:
+            piezas.append(texto[posicion:fin])
+            pila.pop()
+    return _aplanar(raiz)
 
 def identificar_categoria_pedagogica(expr: str, categorias_ejemplos: dict) -> Optional[str]:
     """
     Identifica la categoría pedagógica de una expresión según las categorías proporcionadas.
-    
+
     Args:
         expr (str): Expresión a categorizar
         categorias_ejemplos (dict): Diccionario con categorías y ejemplos
-        
+
     Returns:
         Optional[str]: Categoría encontrada o None si no se encuentra
     """
-    expr_normalizado = expr.strip().replace(' ', '').replace('\n', '').replace(r'\left', '').replace(r'\right', '')
-    
+    expr_normalizado = canonicalizar_expresion(expr)
+
     for categoria, ejemplos in categorias_ejemplos.items():
         for ejemplo in ejemplos:
-            ejemplo_normalizado = ejemplo.strip().replace(' ', '').replace('\n', '').replace(r'\left', '').replace(r'\right', '')
-            
+            ejemplo_normalizado = canonicalizar_expresion(ejemplo)
+
             # Coincidencia exacta
             if expr == ejemplo:
                 return categoria
-                
+
             # Coincidencia normalizada
             if expr_normalizado == ejemplo_normalizado:
                 return categoria
-                
+
             # Coincidencia parcial básica
             if expr_normalizado in ejemplo_normalizado or ejemplo_normalizado in expr_normalizado:
                 return categoria
-                
-    return None
\ No newline at end of file
+
+    return None